@@ -10,3 +10,12 @@ python manage.py collectstatic --no-input
 
 # 3. የዳታቤዝ ለውጦችን ይተግብሩ
 python manage.py migrate
+
+# 4. የአባልነት መለያ ቁጥር ቆጣሪዎችን ከነባር መረጃ ያዘጋጁ
+python manage.py seed_membership_sequences
+
+# 5. CACHE_BACKEND=db ሲሆን የካሽ ሰንጠረዡን ይፍጠሩ (ከሌለ ብቻ)
+python manage.py createcachetable
+
+# 6. የአባላት ፍለጋ ማውጫ ያልገቡትን አባላት ያስገቡ
+python manage.py rebuild_search_index --missing-only
@@ -1,19 +1,50 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils import timezone
 # Consolidate imports and remove the undefined 'Payment'
-from .models import Member, Meeting, Attendance, Announcement
+from .models import Member, Meeting, Attendance, Announcement, AnnouncementDispatch, Job
+from .cache import invalidate_announcements
+from .notifications import start_dispatch
+from .provisioning import provision_member
 
 # ------------------------------------------------------------------------
 
+class MemberAdminForm(forms.ModelForm):
+    class Meta:
+        model = Member
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        phone_number = cleaned_data.get('phone_number')
+        # A new member without a chosen user gets a login named after the phone number (see save_model)
+        if (not self.instance.pk and not cleaned_data.get('user') and phone_number
+                and User.objects.filter(username=phone_number).exists()):
+            self.add_error('phone_number', f"በዚህ ስልክ ቁጥር ({phone_number}) የተመዘገበ ተጠቃሚ ከዚህ በፊት አለ።")
+        return cleaned_data
+
+
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
+    form = MemberAdminForm
     list_display = ('membership_id', 'full_name', 'phone_number', 'address_region', 'is_active')
     search_fields = ('full_name', 'phone_number', 'membership_id')
-    list_filter = ('is_active', 'membership_level', 'address_region')
+    list_filter = ('is_active', 'membership_level', 'address_region', 'is_coordinator')
     ordering = ['full_name']
     
     # Making some fields read-only
     readonly_fields = ('membership_id', 'join_date', 'created_at', 'updated_at')
 
+    def save_model(self, request, obj, form, change):
+        # New members get their login account the same way as online registrations
+        if change or obj.user_id:
+            super().save_model(request, obj, form, change)
+        else:
+            provision_member(obj, base_url=request.build_absolute_uri('/'))
+
 # ------------------------------------------------------------------------
 
 class AttendanceInline(admin.TabularInline):
@@ -25,7 +56,7 @@ class AttendanceInline(admin.TabularInline):
 
 @admin.register(Meeting)
 class MeetingAdmin(admin.ModelAdmin):
-    list_display = ('title', 'meeting_date', 'location', 'created_by') # Added created_by to list display
+    list_display = ('title', 'meeting_date', 'location', 'created_by', 'checkin_link') # Added created_by to list display
     list_filter = ('meeting_date', 'location')
     search_fields = ('title', 'location')
     # Fields to display in the main form, excluding attendees which are managed by the inline
@@ -33,6 +64,11 @@ class MeetingAdmin(admin.ModelAdmin):
     inlines = [AttendanceInline] # Inline the attendance records
     readonly_fields = ('created_by',) # Ensure created_by is only set automatically
 
+    @admin.display(description="መግቢያ ምዝገባ")
+    def checkin_link(self, obj):
+        # Scanner page for the door; attendance for big meetings is recorded there in bulk
+        return format_html('<a href="{}">QR check-in</a>', reverse('meeting_checkin', args=[obj.pk]))
+
     def save_model(self, request, obj, form, change):
         # Automatically set the creator of the meeting ONLY on creation (if pk is None)
         if not obj.pk:
@@ -49,9 +85,46 @@ class AnnouncementAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'author')
     # Ensure 'author' is set automatically and cannot be changed manually
     readonly_fields = ('author', 'created_at', 'updated_at')
+    actions = ['send_as_sms']
 
     def save_model(self, request, obj, form, change):
         # Automatically set the author to the current logged-in user
         if not obj.pk:
             obj.author = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+        # Drop the cached rendering of the announcement list
+        invalidate_announcements()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_announcements()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_announcements()
+
+    @admin.action(description="ለሁሉም ንቁ አባላት በSMS ላክ")
+    def send_as_sms(self, request, queryset):
+        # Sending happens in the job worker; progress shows up under Announcement dispatches
+        for announcement in queryset:
+            start_dispatch(announcement, user=request.user)
+        self.message_user(request, f"{queryset.count()} ማስታወቂያ(ዎች) ለመላክ ተሰልፈዋል።")
+
+
+@admin.register(AnnouncementDispatch)
+class AnnouncementDispatchAdmin(admin.ModelAdmin):
+    list_display = ('announcement', 'region', 'status', 'total', 'sent', 'failed', 'created_at', 'finished_at')
+    list_filter = ('status', 'region')
+    readonly_fields = ('announcement', 'created_by', 'status', 'total', 'sent', 'failed', 'error', 'created_at', 'finished_at')
+# ------------------------------------------------------------------------
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('locked_by', 'locked_at', 'created_at', 'finished_at', 'last_error')
+    actions = ['retry_jobs']
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        queryset.exclude(status='running').update(status='queued', attempts=0, run_after=timezone.now(), finished_at=None)
@@ -0,0 +1,171 @@
+# ===================================================================
+#               members/analytics.py
+#       Attendance analytics from incrementally maintained summary tables
+# ===================================================================
+
+from bisect import bisect_left
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Attendance, Meeting, MeetingTurnout, Member, MemberParticipation
+from .stats import member_stats
+
+
+# ------------------ Incremental updates ------------------
+
+def record_attendance(meeting, member_ids, delta=1, regions=None):
+    """
+    Adds (delta=1) or removes (delta=-1) the attendance of `member_ids` at `meeting` to the
+    summary tables: one query for the members' regions, then a few set-based writes,
+    however many members there are. Bulk inserts that bypass signals call this directly.
+    `meeting` may be a bare pk when removing (the meeting date is only needed for additions).
+    Callers that already know the members' regions pass them as {member_id: region}.
+    """
+    member_ids = list(member_ids)
+    if not member_ids:
+        return
+    if regions is None:
+        regions = dict(Member.objects.filter(pk__in=member_ids).values_list('pk', 'address_region'))
+    regions = Counter(regions[pk] for pk in member_ids if pk in regions)
+    participation = MemberParticipation.objects.filter(member_id__in=member_ids)
+    with transaction.atomic():
+        if delta > 0:
+            # Rows start at zero and are incremented below, so concurrent first inserts can't lose a count
+            MeetingTurnout.objects.bulk_create(
+                [MeetingTurnout(meeting=meeting, region=region) for region in regions], ignore_conflicts=True,
+            )
+            MemberParticipation.objects.bulk_create(
+                [MemberParticipation(member_id=pk) for pk in member_ids], ignore_conflicts=True, batch_size=500,
+            )
+            meeting_date = Value(meeting.meeting_date, output_field=DateTimeField())
+            participation.update(
+                attended=F('attended') + 1,
+                last_meeting_date=Greatest(Coalesce('last_meeting_date', meeting_date), meeting_date),
+            )
+        else:
+            # Removals only touch existing rows (the meeting itself may be being deleted)
+            latest = (
+                Attendance.objects.filter(member_id=OuterRef('member_id'))
+                .order_by('-meeting__meeting_date').values('meeting__meeting_date')[:1]
+            )
+            participation.update(attended=F('attended') - 1, last_meeting_date=Subquery(latest))
+        for region, count in regions.items():
+            MeetingTurnout.objects.filter(meeting=meeting, region=region).update(
+                attendees=F('attendees') + delta * count,
+            )
+
+
+@receiver(post_save, sender=Attendance)
+def add_attendance(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_attendance(instance.meeting, [instance.member_id])
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_attendance(sender, instance, **kwargs):
+    record_attendance(instance.meeting_id, [instance.member_id], delta=-1)
+
+
+def rebuild():
+    """Recomputes both summary tables from the Attendance table. Returns the rows written."""
+    turnout = [
+        MeetingTurnout(meeting_id=row['meeting_id'], region=row['member__address_region'], attendees=row['n'])
+        for row in Attendance.objects.values('meeting_id', 'member__address_region').annotate(n=Count('id')).order_by()
+    ]
+    participation = [
+        MemberParticipation(**row)
+        for row in Attendance.objects.values('member_id').annotate(
+            attended=Count('id'), last_meeting_date=Max('meeting__meeting_date'),
+        ).order_by()
+    ]
+    with transaction.atomic():
+        MeetingTurnout.objects.all().delete()
+        MemberParticipation.objects.all().delete()
+        MeetingTurnout.objects.bulk_create(turnout, batch_size=1000)
+        MemberParticipation.objects.bulk_create(participation, batch_size=1000)
+    return len(turnout) + len(participation)
+
+
+# ------------------ Reading ------------------
+
+def meeting_attendees(meeting):
+    return MeetingTurnout.objects.filter(meeting=meeting).aggregate(n=Sum('attendees'))['n'] or 0
+
+
+def participation_rate(attended, join_date, meeting_dates):
+    """Share of the meetings held since the member joined that they attended (meeting_dates sorted)."""
+    if not join_date:
+        held = len(meeting_dates)
+    else:
+        held = len(meeting_dates) - bisect_left(meeting_dates, join_date)
+    return round(min(attended / held, 1.0), 3) if held else None
+
+
+def _turnout(region):
+    rows = MeetingTurnout.objects.all()
+    if region:
+        rows = rows.filter(region=region)
+    return rows
+
+
+def attendance_summary(region=None, meetings=20, months=12, top=20):
+    """
+    Everything the attendance report shows, as plain (JSON-able) data, for the whole
+    country or one region. Reads only the summary tables, Meeting and the top members.
+    """
+    active_members = sum(member_stats(region=region).get('total', {}).values())
+    turnout = _turnout(region)
+
+    recent = list(Meeting.objects.order_by('-meeting_date').values('id', 'title', 'meeting_date', 'location')[:meetings])
+    attendees = dict(
+        turnout.filter(meeting_id__in=[m['id'] for m in recent])
+        .values_list('meeting_id').annotate(n=Sum('attendees')).order_by()
+    )
+    for meeting in recent:
+        meeting['attendees'] = attendees.get(meeting['id'], 0)
+        meeting['turnout'] = round(meeting['attendees'] / active_members, 3) if active_members else None
+
+    by_region = [
+        {'region': row['region'], 'attendances': row['total'], 'meetings': row['meetings'],
+         'average': round(row['total'] / row['meetings'], 1) if row['meetings'] else 0}
+        for row in turnout.filter(attendees__gt=0).values('region').annotate(
+            total=Sum('attendees'), meetings=Count('meeting_id'),
+        ).order_by('-total')
+    ]
+
+    trend = [
+        {'month': row['month'].date().isoformat()[:7], 'attendances': row['total'], 'meetings': row['meetings']}
+        for row in turnout.annotate(month=TruncMonth('meeting__meeting_date')).values('month').annotate(
+            total=Sum('attendees'), meetings=Count('meeting_id', distinct=True),
+        ).order_by('-month')[:months]
+    ][::-1]
+
+    meeting_dates = sorted(date.date() for date in Meeting.objects.values_list('meeting_date', flat=True))
+    top_rows = MemberParticipation.objects.filter(member__is_active=True, attended__gt=0)
+    if region:
+        top_rows = top_rows.filter(member__address_region=region)
+    participants = []
+    for member_id, full_name, join_date, attended, last_meeting in top_rows.order_by('-attended').values_list(
+        'member_id', 'member__full_name', 'member__join_date', 'attended', 'last_meeting_date',
+    )[:top]:
+        participants.append({
+            'member_id': member_id,
+            'full_name': full_name,
+            'attended': attended,
+            'rate': participation_rate(attended, join_date, meeting_dates),
+            'last_meeting_date': last_meeting,
+        })
+
+    return {
+        'region': region,
+        'active_members': active_members,
+        'meetings': recent,
+        'by_region': by_region,
+        'trend': trend,
+        'top_participants': participants,
+    }
@@ -0,0 +1,136 @@
+# ===================================================================
+#               members/announcements.py
+#       Announcement list/feed freshness: ETags, paging and the ?since= cursor
+# ===================================================================
+
+import base64
+import hashlib
+import json
+import math
+from datetime import timezone as dt_timezone
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+from .models import Announcement
+
+ANNOUNCEMENTS_PER_PAGE = 10
+FEED_PAGE_SIZE = 50
+
+
+class FeedState:
+    """The newest updated_at and the number of announcements: one aggregate query."""
+
+    __slots__ = ('latest', 'count')
+
+    def __init__(self, latest, count):
+        self.latest = latest
+        self.count = count
+
+    @classmethod
+    def current(cls):
+        # COUNT as well as MAX, so deleting an older announcement also changes the ETag
+        state = Announcement.objects.order_by().aggregate(latest=Max('updated_at'), count=Count('id'))
+        return cls(state['latest'], state['count'])
+
+    def etag(self, *parts):
+        # The local date is included because the list shows a "new" badge for a week
+        raw = json.dumps([
+            self.latest.isoformat() if self.latest else None, self.count, timezone.localdate().isoformat(), *parts,
+        ], default=str)
+        return '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()[:24]
+
+    @property
+    def last_modified(self):
+        return int(self.latest.timestamp()) if self.latest else None
+
+
+def not_modified(request, state, etag):
+    """A 304 when the client's copy is current, else None. Never while flash messages wait to be shown."""
+    if len(get_messages(request)):
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=state.last_modified)
+
+
+def add_validators(response, state, etag):
+    response['ETag'] = etag
+    if state.last_modified is not None:
+        response['Last-Modified'] = http_date(state.last_modified)
+    # Per user (the page carries their name and CSRF token); always revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def list_page(state, number):
+    """Page `number` (1-based, clamped) of the list, counted from `state` so paging costs no COUNT query."""
+    num_pages = max(1, math.ceil(state.count / ANNOUNCEMENTS_PER_PAGE))
+    try:
+        number = min(max(int(number), 1), num_pages)
+    except (TypeError, ValueError):
+        number = 1
+    start = (number - 1) * ANNOUNCEMENTS_PER_PAGE
+    return {
+        'number': number,
+        'num_pages': num_pages,
+        'previous': number - 1 if number > 1 else None,
+        'next': number + 1 if number < num_pages else None,
+        # Lazy: only evaluated when the cached fragment has to be rendered again
+        'announcements': Announcement.objects.select_related('author')[start:start + ANNOUNCEMENTS_PER_PAGE],
+    }
+
+
+# ------------------ JSON feed (?since= cursor) ------------------
+
+def encode_since(updated_at, pk):
+    raw = json.dumps([updated_at.isoformat(), pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_since(token):
+    """(updated_at, id) from a feed cursor. A plain ISO datetime is accepted too. None if invalid."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        updated_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        updated_at, pk = parse_datetime(updated_at), int(pk)
+    except (ValueError, TypeError, UnicodeError):
+        updated_at, pk = parse_datetime(token.replace(' ', '+')), 0
+    if updated_at is None:
+        return None
+    if timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at, dt_timezone.utc)
+    return updated_at, pk
+
+
+def feed_payload(since=None, limit=FEED_PAGE_SIZE):
+    """
+    Announcements created or changed after the `since` position, oldest change first.
+    Clients store next_since and pass it back; has_more means another call is due now.
+    """
+    queryset = Announcement.objects.select_related('author').order_by('updated_at', 'id')
+    if since:
+        updated_at, pk = since
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        next_since = encode_since(rows[-1].updated_at, rows[-1].pk)
+    else:
+        next_since = encode_since(*since) if since else None
+    return {
+        'results': [{
+            'id': announcement.pk,
+            'title': announcement.title,
+            'content': announcement.content,
+            'author': announcement.author.username if announcement.author else None,
+            'created_at': announcement.created_at.isoformat(),
+            'updated_at': announcement.updated_at.isoformat(),
+        } for announcement in rows],
+        'next_since': next_since,
+        'has_more': has_more,
+    }
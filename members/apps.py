@@ -4,5 +4,12 @@ class MembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'members'
 
-    # def ready(self):
-        # import members.signals  # Import the signals file
+    def ready(self):
+        import members.stats  # Keeps the MemberStat rollups in sync with Member saves/deletes
+        import members.cache  # Invalidates cached dashboards when members change
+        import members.search  # Keeps the member search index up to date
+        import members.analytics  # Keeps the attendance summary tables up to date
+        import members.scoping  # Drops cached coordinator scopes when groups or coordinator fields change
+        import members.verification  # Drops cached membership ID lookups when members change
+        import members.instrumentation  # Counts the SQL of each request on every database connection
+        import members.tasks  # Registers the background job handlers run by `run_worker`
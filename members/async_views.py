@@ -0,0 +1,120 @@
+# ===================================================================
+#               members/async_views.py
+#       Async (ASGI) versions of the read-heavy pages and the CSV export
+# ===================================================================
+#
+# Same pages, templates and JSON as members/views.py, mounted under /app/async/.
+# Under an ASGI server (see party_management/gunicorn_asgi.py) a request waiting on
+# the database or on a slow client holds a coroutine, not a worker, and streamed
+# exports are fed to the client from the async ORM.
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import REDIRECT_FIELD_NAME, get_user
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from .announcements import FeedState, add_validators, not_modified
+from .cache import get_member_count
+from .exports import streaming_export_response
+from .filters import MemberFilters
+from .models import Member
+from .pagination import akeyset_page, parse_page_size
+from .scoping import member_scope
+from .views import (
+    MEMBER_LIST_COLUMNS, announcement_list_context, announcement_list_etag, dashboard_context, filter_errors_json,
+    is_staff_member, member_list_context, member_list_json, member_list_queryset, scoped_dashboard_payload,
+)
+
+# Template rendering, sessions and the cached dashboard are synchronous code
+arender = sync_to_async(render)
+amember_scope = sync_to_async(member_scope)
+
+
+# ------------------ Access control ------------------
+
+def async_user_passes_test(test_func):
+    """
+    user_passes_test for async views (Django 4.2's decorator only wraps sync views).
+    request.user is loaded once in a thread, so later code never touches the lazy
+    user from the event loop.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            request.user = await sync_to_async(get_user)(request)
+            if test_func(request.user):
+                return await view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL, REDIRECT_FIELD_NAME)
+        return _wrapped_view
+    return decorator
+
+
+async_login_required = async_user_passes_test(lambda user: user.is_authenticated)
+async_staff_required = async_user_passes_test(is_staff_member)
+
+
+# ------------------ Views ------------------
+
+@async_login_required
+async def announcement_list(request):
+    state = await sync_to_async(FeedState.current)()
+    page_number = request.GET.get('page', 1)
+    etag = announcement_list_etag(request, state, page_number)
+    # Reading pending messages may load the session
+    response = await sync_to_async(not_modified)(request, state, etag)
+    if response is None:
+        context = await sync_to_async(announcement_list_context)(state, page_number)
+        response = await arender(request, 'members/announcement_list.html', context)
+    return add_validators(response, state, etag)
+
+
+@async_staff_required
+async def dashboard(request):
+    scope = await amember_scope(request)
+    payload = await sync_to_async(scoped_dashboard_payload)(scope)
+    return await arender(request, 'members/dashboard.html', dashboard_context(payload))
+
+
+@async_staff_required
+async def member_list(request):
+    scope = await amember_scope(request)
+    filters = MemberFilters.from_params(request.GET)
+    base_queryset = member_list_queryset(scope, filters)
+    total_count = await sync_to_async(get_member_count)(scope.region, filters.cache_key(scope), base_queryset.count)
+
+    cursor = request.GET.get('cursor')
+    page_size = parse_page_size(request.GET.get('page_size'))
+
+    if request.GET.get('format') == 'json':
+        if filters.errors:
+            return filter_errors_json(filters)
+        rows, next_cursor = await akeyset_page(base_queryset.values(*MEMBER_LIST_COLUMNS), cursor, page_size)
+        return member_list_json(rows, total_count, next_cursor)
+
+    members, next_cursor = await akeyset_page(base_queryset.only(*MEMBER_LIST_COLUMNS), cursor, page_size)
+    context = member_list_context(request, filters, members, total_count, next_cursor)
+    return await arender(request, 'members/member_list.html', context)
+
+
+@async_login_required
+async def member_detail(request, pk):
+    try:
+        member = await Member.objects.aget(pk=pk)
+    except Member.DoesNotExist:
+        raise Http404("No Member matches the given query.")
+    return await arender(request, 'members/member_detail.html', {'member': member})
+
+
+@async_staff_required
+async def export_members_csv(request):
+    filters = MemberFilters.from_params(request.GET)
+    if filters.errors:
+        return filter_errors_json(filters)
+    queryset = member_list_queryset(await amember_scope(request), filters)
+    export_format = request.GET.get('export', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true')
+    return streaming_export_response(queryset, export_format=export_format, compress=compress, asynchronous=True)
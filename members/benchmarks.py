@@ -0,0 +1,292 @@
+# ===================================================================
+#               members/benchmarks.py
+#       Synthetic large-membership data and timed runs of the hot paths
+# ===================================================================
+
+import contextlib
+import random
+import statistics
+import time
+import tracemalloc
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics
+from .cache import invalidate_dashboard
+from .models import EDUCATION_CHOICES, REGION_CHOICES, Attendance, Meeting, Member, MembershipSequence
+from .pagination import encode_cursor
+from .search import index_members
+from .stats import STAT_FIELDS, record_members_created
+
+# ------------------ Synthetic data ------------------
+
+MALE_NAMES = [
+    'አበበ', 'ከበደ', 'ተስፋዬ', 'ታደሰ', 'ገብረመድህን', 'ዳዊት', 'ሙሉጌታ', 'ብርሃኑ', 'ሰለሞን', 'ዮሐንስ',
+    'መስፍን', 'ኃይሌ', 'ጌታቸው', 'አለማየሁ', 'ወልደ', 'ፍቃዱ', 'ደረጀ', 'ሀብታሙ', 'ኤርሚያስ', 'ቢኒያም',
+    'አህመድ', 'ሙሐመድ', 'ለማ', 'ጫላ', 'ቶሎሳ',
+]
+FEMALE_NAMES = [
+    'አልማዝ', 'ትዕግስት', 'መሰረት', 'ሄለን', 'ብርቱካን', 'ፋጡማ', 'ሰላማዊት', 'ትርሃስ', 'ሜሮን', 'ቤተልሔም',
+    'ሕይወት', 'ማርታ', 'ራሄል', 'ዘውዲቱ', 'አስቴር', 'የውብዳር', 'ፀሐይ', 'ሐና', 'ሊያ', 'ኪዳን',
+    'ሰናይት', 'ጸጋ', 'አይናለም', 'ፍሬሕይወት', 'ሶፊያ',
+]
+ZONES = ['ሰሜን', 'ደቡብ', 'ምሥራቅ', 'ምዕራብ', 'ማዕከላዊ', 'ልዩ']
+WOREDAS = [f'ወረዳ {n:02d}' for n in range(1, 25)]
+
+MEMBER_BATCH_SIZE = 5000
+
+
+@contextlib.contextmanager
+def _keep_join_dates():
+    # join_date is auto_now_add; synthetic members need years of history instead of "today"
+    field = Member._meta.get_field('join_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class SyntheticData:
+    """
+    Adds realistic members (Amharic names, every region, `years` of join dates), weekly
+    meetings and their attendance, through the same bulk paths as import_members:
+    membership IDs from MembershipSequence, MemberStat deltas and the search index.
+    Everything is written in the caller's transaction.
+    """
+
+    def __init__(self, seed=1, years=8, attendance_per_member=2):
+        self.random = random.Random(seed)
+        self.years = years
+        self.attendance_per_member = attendance_per_member
+        self.today = timezone.localdate()
+        self.member_count = 0
+        self.saved_count = 0  # members created one by one by the Member.save case
+        self.meeting_ids = []
+        self.meeting_dates = []
+
+    def grow_to(self, size):
+        """Adds members (and their attendance) until there are `size` synthetic members."""
+        while self.member_count < size:
+            count = min(MEMBER_BATCH_SIZE, size - self.member_count)
+            members = self.add_members(count)
+            self.add_attendance(members)
+        # The attendance rows were inserted raw, so the summary tables are rebuilt once at the end
+        analytics.rebuild()
+
+    def _person(self, index):
+        rnd = self.random
+        female = rnd.random() < 0.45
+        first = rnd.choice(FEMALE_NAMES if female else MALE_NAMES)
+        region = rnd.choice(REGION_CHOICES)[0]
+        join_date = self.today - timedelta(days=rnd.randrange(self.years * 365))
+        return Member(
+            full_name=f'{first} {rnd.choice(MALE_NAMES)} {rnd.choice(MALE_NAMES)}',
+            gender='Female' if female else 'Male',
+            date_of_birth=self.today - timedelta(days=rnd.randrange(18 * 365, 75 * 365)),
+            phone_number=f'07{index:08d}',
+            address_region=region,
+            address_zone=f'{rnd.choice(ZONES)} ዞን',
+            address_woreda=rnd.choice(WOREDAS),
+            address_kebele=f'{rnd.randrange(1, 30):02d}',
+            membership_level='Full' if rnd.random() < 0.7 else 'Supporter',
+            education_level=rnd.choice(EDUCATION_CHOICES)[0],
+            join_date=join_date,
+            is_active=rnd.random() < 0.95,
+        )
+
+    def add_members(self, count):
+        members = [self._person(self.member_count + i) for i in range(count)]
+        by_sequence = {}
+        for member in members:
+            by_sequence.setdefault((member.address_region, member.join_date.year), []).append(member)
+        for (region, year), group in by_sequence.items():
+            for member, membership_id in zip(group, MembershipSequence.allocate_membership_ids(region, year, len(group))):
+                member.membership_id = membership_id
+        with _keep_join_dates():
+            Member.objects.bulk_create(members, batch_size=1000)
+        record_members_created({field: getattr(m, field) for field in STAT_FIELDS} for m in members)
+        saved = list(Member.objects.filter(membership_id__in=[m.membership_id for m in members]).only(
+            'id', 'full_name', 'phone_number', 'membership_id', 'join_date',
+        ))
+        index_members(saved)
+        self.member_count += count
+        return saved
+
+    def _ensure_meetings(self):
+        if self.meeting_ids:
+            return
+        first = datetime.combine(self.today - timedelta(days=self.years * 365), datetime.min.time(), dt_timezone.utc)
+        meetings = [
+            Meeting(title=f'ሳምንታዊ ስብሰባ {week + 1}', meeting_date=first + timedelta(weeks=week, hours=9), location='አዳራሽ')
+            for week in range(self.years * 52)
+        ]
+        Meeting.objects.bulk_create(meetings)
+        rows = Meeting.objects.filter(title__startswith='ሳምንታዊ ስብሰባ ', meeting_date__gte=first).order_by('meeting_date')
+        for pk, meeting_date in rows.values_list('pk', 'meeting_date'):
+            self.meeting_ids.append(pk)
+            self.meeting_dates.append(meeting_date)
+
+    def add_attendance(self, members):
+        """Each member attends a few meetings held after they joined (raw executemany, like a bulk load)."""
+        self._ensure_meetings()
+        rows = []
+        for member in members:
+            start = bisect_left(self.meeting_dates, datetime.combine(member.join_date, datetime.min.time(), dt_timezone.utc))
+            available = len(self.meeting_ids) - start
+            for offset in self.random.sample(range(available), min(self.attendance_per_member, available)):
+                rows.append((member.pk, self.meeting_ids[start + offset], self.meeting_dates[start + offset]))
+        table = Attendance._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {table} (member_id, meeting_id, attended_at) VALUES (%s, %s, %s)', rows)
+        return len(rows)
+
+
+# ------------------ Measurement ------------------
+
+class QueryCounter:
+    """connection.execute_wrapper that only counts (lighter than CaptureQueriesContext)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(func, repeat=3, before=None):
+    """
+    Runs func() `repeat` times and returns median/min milliseconds, the query count of
+    the last run and the peak traced Python memory (KiB) of one extra traced run.
+    `before` runs untimed ahead of every call (e.g. to invalidate a cache).
+    """
+    timings = []
+    queries = result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = counter.count
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    report = {
+        'median_ms': round(statistics.median(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+    if isinstance(result, int):
+        report['bytes'] = result
+    return report
+
+
+def _fetch(client, url, params=None):
+    response = client.get(url, params or {})
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}")
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class _SaveCase:
+    """Member.save() on new members (membership ID, rollups, search index) and on updates."""
+
+    def __init__(self, data):
+        self.data = data
+        self.created = []
+
+    def create(self):
+        # Phone numbers after the bulk-created ones, across every size
+        member = self.data._person(10_000_000 + self.data.saved_count)
+        self.data.saved_count += 1
+        member.membership_id = ''
+        member.save()
+        self.created.append(member)
+
+    def update(self):
+        member = self.created[len(self.created) // 2]
+        member.address_woreda = self.data.random.choice(WOREDAS)
+        member.save()
+
+
+def run_cases(data, repeat=3, saves=20):
+    """Times every hot path against the current data. Returns {case name: measurements}."""
+    admin = User.objects.filter(username='bench-admin').first() or User.objects.create_superuser(
+        'bench-admin', 'bench@example.com', None,
+    )
+    client = Client()
+    client.force_login(admin)
+    middle = Member.objects.filter(is_active=True).order_by('full_name', 'id').values_list('full_name', 'id')[
+        max(data.member_count // 2 - 1, 0)
+    ]
+    region = REGION_CHOICES[1][0]
+    save_case = _SaveCase(data)
+
+    def per_save(func):
+        def run():
+            for _ in range(saves):
+                func()
+        return run
+
+    cases = [
+        # Timed per run of `saves` calls (recorded in the report options)
+        ('Member.save (create)', per_save(save_case.create), None),
+        ('Member.save (update)', per_save(save_case.update), None),
+        ('dashboard (cold cache)', lambda: _fetch(client, reverse('dashboard')), invalidate_dashboard),
+        ('dashboard (warm cache)', lambda: _fetch(client, reverse('dashboard')), None),
+        ('member_list', lambda: _fetch(client, reverse('member_list')), invalidate_dashboard),
+        ('member_list (json, region + gender)', lambda: _fetch(
+            client, reverse('member_list'), {'format': 'json', 'region': region, 'gender': 'Female'},
+        ), invalidate_dashboard),
+        ('member_list (json, middle page)', lambda: _fetch(
+            client, reverse('member_list'), {'format': 'json', 'cursor': encode_cursor(*middle)},
+        ), None),
+        ('member_search', lambda: _fetch(client, reverse('member_search'), {'q': 'ታደሰ'}), None),
+        ('export_members_csv (region)', lambda: _fetch(client, reverse('export_members_csv'), {'region': region}), None),
+        ('export_members_csv (all)', lambda: _fetch(client, reverse('export_members_csv')), None),
+        ('attendance_report', lambda: _fetch(client, reverse('attendance_report'), {'format': 'json'}), None),
+    ]
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, func, before in cases:
+            results[name] = measure(func, repeat=repeat, before=before)
+    return results
+
+
+def compare(previous, current, threshold=1.2):
+    """
+    Yields (size, case, previous ms, current ms, ratio, flag) for every case present in both
+    reports. flag is 'slower' past `threshold`, 'more queries' when the query count grew.
+    """
+    for size, sized in current.get('sizes', {}).items():
+        before_cases = previous.get('sizes', {}).get(size, {}).get('cases', {})
+        for case, result in sized['cases'].items():
+            before = before_cases.get(case)
+            if not before:
+                continue
+            ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else None
+            flag = ''
+            if result['queries'] > before['queries']:
+                flag = 'more queries'
+            elif ratio and ratio > threshold:
+                flag = 'slower'
+            yield size, case, before['median_ms'], result['median_ms'], ratio, flag
@@ -0,0 +1,272 @@
+# ===================================================================
+#               members/bundles.py
+#       Signed offline snapshots of active membership IDs for door devices
+# ===================================================================
+#
+# A bundle holds, per region code (the "AMH" in AMH-2024-0012), the sorted active
+# membership IDs packed as 32-bit keys. A device parses a scanned ID into (code, key)
+# and binary-searches that region's array, with no false positives and no server call.
+#
+# Layout (all integers big-endian):
+#   header   HEADER: magic, format, kind (full/delta), version, base version, created (unix), sections
+#   sections SECTION: region code, added count, removed count, payload length; then the payload:
+#            zlib of the added keys and then the removed keys, each stored as gaps from the
+#            previous key (consecutive IDs become runs of 1s, which compress to almost nothing)
+#   trailer  HMAC-SHA256 of everything before it, keyed by device_key() (derived from SECRET_KEY)
+#
+# A full bundle only has added keys. A delta from version B holds the keys added and
+# removed since B; applying it to B's arrays gives exactly the newer version.
+
+import hashlib
+import hmac
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+
+from .models import MEMBERSHIP_ID_RE, Member, VerificationBundle
+
+MAGIC = b'EUVB'
+FORMAT_VERSION = 1
+FULL, DELTA = 0, 1
+HEADER = struct.Struct('>4sBBIIIH')
+SECTION = struct.Struct('>8sIII')
+SIGNATURE_SIZE = 32
+SIGNING_SALT = 'members.bundles'
+BUILD_CHUNK_SIZE = 5000
+
+# key = (year - YEAR_BASE) << SEQ_BITS | sequence number
+YEAR_BASE = 1900
+SEQ_BITS = 22
+
+
+class BundleError(ValueError):
+    """A bundle that is truncated, of an unknown format or not signed with this server's key."""
+
+
+def encode_id(membership_id):
+    """(region code, key) for a membership ID, or None if it can't be packed into 32 bits."""
+    match = MEMBERSHIP_ID_RE.match(membership_id or '')
+    if match is None:
+        return None
+    code, year, seq = match.group(1), int(match.group(2)) - YEAR_BASE, int(match.group(3))
+    if not 0 <= year < 1 << (32 - SEQ_BITS) or seq >> SEQ_BITS:
+        return None
+    return code, year << SEQ_BITS | seq
+
+
+def decode_key(code, key):
+    return f"{code}-{(key >> SEQ_BITS) + YEAR_BASE}-{key & ((1 << SEQ_BITS) - 1):04d}"
+
+
+# ------------------ Packing ------------------
+
+def _to_big_endian(values):
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _gaps(keys):
+    gaps = array('I', keys)
+    for index in range(len(gaps) - 1, 0, -1):
+        gaps[index] -= gaps[index - 1]
+    return gaps
+
+
+def encode_section(code, added, removed=()):
+    """One SECTION plus payload for sorted key arrays."""
+    payload = zlib.compress(_to_big_endian(_gaps(added)) + _to_big_endian(_gaps(removed)), 9)
+    return SECTION.pack(code.encode('ascii'), len(added), len(removed), len(payload)) + payload
+
+
+def _unpack_gaps(raw):
+    gaps = array('I')
+    gaps.frombytes(raw)
+    if sys.byteorder == 'little':
+        gaps.byteswap()
+    return gaps
+
+
+def signature(data):
+    return salted_hmac(SIGNING_SALT, data, algorithm='sha256').digest()
+
+
+def device_key():
+    """The HMAC key devices use to check bundles (hex). It is derived from, but does not reveal, SECRET_KEY."""
+    return hashlib.sha256((SIGNING_SALT + settings.SECRET_KEY).encode('utf-8')).hexdigest()
+
+
+def write_bundle(sections, kind, version, base, created):
+    """A signed bundle from encoded sections (encode_section), sorted by region code."""
+    sections = sorted(sections)
+    body = HEADER.pack(MAGIC, FORMAT_VERSION, kind, version, base, created, len(sections)) + b''.join(sections)
+    return body + signature(body)
+
+
+def _raw_sections(data):
+    """(header fields, [encoded section, ...]) of a signed bundle, without decompressing anything."""
+    if len(data) < HEADER.size + SIGNATURE_SIZE:
+        raise BundleError("Truncated bundle")
+    body, sig = data[:-SIGNATURE_SIZE], data[-SIGNATURE_SIZE:]
+    if not hmac.compare_digest(sig, signature(body)):
+        raise BundleError("Bad bundle signature")
+    magic, fmt, kind, version, base, created, count = HEADER.unpack_from(body)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise BundleError("Unknown bundle format")
+    sections, offset = [], HEADER.size
+    for _ in range(count):
+        length = SECTION.unpack_from(body, offset)[3]
+        end = offset + SECTION.size + length
+        sections.append(body[offset:end])
+        offset = end
+    return {'kind': kind, 'version': version, 'base': base, 'created': created}, sections
+
+
+def _section_code(section):
+    return SECTION.unpack_from(section)[0].rstrip(b'\0').decode('ascii')
+
+
+def read_bundle(data):
+    """Header fields plus 'sections': {region code: (added keys, removed keys)}. Raises BundleError."""
+    header, raw = _raw_sections(data)
+    sections = {}
+    for section in raw:
+        code, added, removed, _ = SECTION.unpack_from(section)
+        gaps = _unpack_gaps(zlib.decompress(section[SECTION.size:]))
+        if len(gaps) != added + removed:
+            raise BundleError("Corrupt bundle section")
+        sections[code.rstrip(b'\0').decode('ascii')] = (
+            array('I', accumulate(gaps[:added])), array('I', accumulate(gaps[added:])),
+        )
+    return {**header, 'sections': sections}
+
+
+def restrict(data, codes):
+    """The same bundle with only the given region codes' sections, signed again."""
+    header, sections = _raw_sections(data)
+    kept = [section for section in sections if _section_code(section) in codes]
+    return write_bundle(kept, header['kind'], header['version'], header['base'], header['created'])
+
+
+# ------------------ Building ------------------
+
+def active_sections(chunk_size=BUILD_CHUNK_SIZE, skipped=None):
+    """
+    Yields (region code, sorted key array) from one streaming query ordered by
+    membership_id. The IDs of one code are contiguous in that order, so only the
+    current region's keys (4 bytes each) are held at a time. IDs that don't fit the
+    32-bit encoding are counted in skipped['count'].
+    """
+    rows = (
+        Member.objects.filter(is_active=True).exclude(membership_id='')
+        .order_by('membership_id').values_list('membership_id', flat=True).iterator(chunk_size=chunk_size)
+    )
+    code, keys = None, array('I')
+    for membership_id in rows:
+        encoded = encode_id(membership_id)
+        if encoded is None:
+            if skipped is not None:
+                skipped['count'] = skipped.get('count', 0) + 1
+            continue
+        if encoded[0] != code:
+            if keys:
+                yield code, array('I', sorted(keys))
+            code, keys = encoded[0], array('I')
+        keys.append(encoded[1])
+    if keys:
+        yield code, array('I', sorted(keys))
+
+
+def build(chunk_size=BUILD_CHUNK_SIZE, force=False):
+    """
+    Snapshots the active membership IDs as a new VerificationBundle version.
+    Returns (bundle, created); when nothing changed since the latest version that
+    one is returned instead, unless force.
+    """
+    skipped = {}
+    sections, digest, members = [], hashlib.sha256(), 0
+    for code, keys in active_sections(chunk_size, skipped):
+        section = encode_section(code, keys)
+        sections.append(section)
+        digest.update(section)
+        members += len(keys)
+    latest = VerificationBundle.objects.first()
+    if latest is not None and latest.digest == digest.hexdigest() and not force:
+        return latest, False
+    with transaction.atomic():
+        bundle = VerificationBundle.objects.create(
+            members=members, skipped=skipped.get('count', 0), digest=digest.hexdigest(),
+        )
+        data = write_bundle(sections, FULL, bundle.pk, 0, int(bundle.created_at.timestamp()))
+        bundle.size = len(data)
+        bundle.output.save(f'bundle-{bundle.pk}.bin', ContentFile(data))
+    return bundle, True
+
+
+def _diff(old, new):
+    """(added, removed) between two sorted key arrays, in one pass."""
+    added, removed = array('I'), array('I')
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            i += 1
+            j += 1
+        elif old[i] < new[j]:
+            removed.append(old[i])
+            i += 1
+        else:
+            added.append(new[j])
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return added, removed
+
+
+def _read_file(bundle):
+    with bundle.output.open('rb') as handle:
+        return handle.read()
+
+
+def delta(base, target):
+    """The signed delta bundle taking a device from `base` to `target`, built once and kept next to target."""
+    storage = target.output.storage
+    name = f'verification_bundles/delta-{base.pk}-{target.pk}.bin'
+    if storage.exists(name):
+        with storage.open(name, 'rb') as handle:
+            return handle.read()
+    old, new = read_bundle(_read_file(base))['sections'], read_bundle(_read_file(target))['sections']
+    empty = array('I')
+    sections = []
+    for code in sorted(old.keys() | new.keys()):
+        added, removed = _diff(old.get(code, (empty,))[0], new.get(code, (empty,))[0])
+        if added or removed:
+            sections.append(encode_section(code, added, removed))
+    data = write_bundle(sections, DELTA, target.pk, base.pk, int(target.created_at.timestamp()))
+    storage.save(name, ContentFile(data))
+    return data
+
+
+def download(since=None, codes=None):
+    """
+    (bundle bytes, latest VerificationBundle) for a device: a delta when it already
+    has version `since` (and that version is still stored), else the full bundle.
+    None when no bundle has been built yet.
+    """
+    latest = VerificationBundle.objects.first()
+    if latest is None:
+        return None
+    base = VerificationBundle.objects.filter(pk=since).first() if since else None
+    if base is not None and base.pk <= latest.pk:
+        data = delta(base, latest)
+    else:
+        data = _read_file(latest)
+    if codes:
+        data = restrict(data, codes)
+    return data, latest
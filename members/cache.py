@@ -0,0 +1,163 @@
+# ===================================================================
+#               members/cache.py
+#       Scoped caching of computed pages (dashboard) with invalidation
+# ===================================================================
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .filters import FILTERED_FIELDS
+from .models import Member
+
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+# How long one request may hold the rebuild lock, and how long others wait for it
+STAMPEDE_LOCK_TIMEOUT = 30
+STAMPEDE_WAIT = 5.0
+
+NATIONAL_SCOPE = None
+
+
+def _scope_token(region):
+    # Region names contain spaces and Ge'ez characters; hash them into a portable cache key
+    if region is NATIONAL_SCOPE:
+        return 'all'
+    return 'region-' + hashlib.md5(region.encode('utf-8')).hexdigest()[:16]
+
+
+def _generation_key(prefix, region):
+    return f'{prefix}:gen:{_scope_token(region)}'
+
+
+def current_generation(prefix, region):
+    """The generation number cache keys of this scope are built with; invalidate() moves it on."""
+    key = _generation_key(prefix, region)
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time_ns()
+        # add() so two requests starting at once agree on the same generation
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def invalidate(prefix, region):
+    """
+    Drops the cached payload for one scope by bumping its generation number.
+    A rebuild that was already in flight will store its result under the old
+    generation, where nobody reads it any more, so stale data can't come back.
+    """
+    cache.set(_generation_key(prefix, region), time.time_ns(), None)
+
+
+def get_or_build(prefix, region, build, timeout):
+    """
+    Returns the cached payload for (prefix, region), calling build() on a miss.
+    Only one process rebuilds a cold entry; the others wait for its result
+    instead of all running the same aggregate queries at once.
+    """
+    key = f'{prefix}:{_scope_token(region)}:{current_generation(prefix, region)}'
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    lock_key = key + ':lock'
+    if cache.add(lock_key, 1, STAMPEDE_LOCK_TIMEOUT):
+        try:
+            payload = build()
+            cache.set(key, payload, timeout)
+        finally:
+            cache.delete(lock_key)
+        return payload
+
+    deadline = time.monotonic() + STAMPEDE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+    # The lock holder is taking too long (or died); compute it ourselves
+    return build()
+
+
+# ------------------ Dashboard ------------------
+
+DASHBOARD_PREFIX = 'dashboard'
+
+
+def get_dashboard_payload(region, build):
+    return get_or_build(DASHBOARD_PREFIX, region, build, DASHBOARD_CACHE_TIMEOUT)
+
+
+def invalidate_dashboard(*regions):
+    """
+    Invalidates the given regions' dashboards plus the national one, once the current
+    transaction commits: a rebuild between an earlier bump and the commit would read the
+    old rows and cache them under the new generation.
+    """
+    scopes = {NATIONAL_SCOPE} | {region for region in regions if region}
+
+    def bump():
+        for scope in scopes:
+            invalidate(DASHBOARD_PREFIX, scope)
+    transaction.on_commit(bump)
+
+
+def get_member_count(region, filter_key, build):
+    """
+    Memoized count of a filtered member list, per scope and canonical filter key
+    (MemberFilters.cache_key). It lives under the scope's dashboard generation, so it is
+    dropped whenever the dashboard is, i.e. when a member of that scope changes.
+    """
+    key = f'member-count:{_scope_token(region)}:{filter_key}:{current_generation(DASHBOARD_PREFIX, region)}'
+    count = cache.get(key)
+    if count is None:
+        count = build()
+        cache.set(key, count, DASHBOARD_CACHE_TIMEOUT)
+    return count
+
+
+# ------------------ Announcements ------------------
+
+ANNOUNCEMENTS_PREFIX = 'announcements'
+ANNOUNCEMENT_CACHE_TIMEOUT = getattr(settings, 'ANNOUNCEMENT_CACHE_TIMEOUT', 3600)
+
+
+def announcements_generation():
+    """Part of the announcement list's fragment cache key (see announcement_list.html)."""
+    return current_generation(ANNOUNCEMENTS_PREFIX, NATIONAL_SCOPE)
+
+
+def invalidate_announcements():
+    # Announcements are only written through AnnouncementAdmin, which calls this
+    invalidate(ANNOUNCEMENTS_PREFIX, NATIONAL_SCOPE)
+
+
+# ------------------ Signal receivers (connected in MembersConfig.ready) ------------------
+
+# Member fields that appear on the dashboard (directly or through the rollups), plus those the
+# member list filters read: the filtered counts (get_member_count) share the dashboard generation
+DASHBOARD_FIELDS = frozenset(
+    ('full_name', 'is_active', 'address_region', 'gender', 'join_date', 'membership_level', 'education_level')
+) | FILTERED_FIELDS
+
+
+@receiver(post_save, sender=Member)
+def invalidate_dashboard_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not any(field in DASHBOARD_FIELDS for field in update_fields):
+        return
+    # A member moved to another region is handled by stats.apply_deltas, which
+    # invalidates every region whose counts changed
+    invalidate_dashboard(instance.address_region)
+
+
+@receiver(post_delete, sender=Member)
+def invalidate_dashboard_on_delete(sender, instance, **kwargs):
+    invalidate_dashboard(instance.address_region)
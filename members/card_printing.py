@@ -0,0 +1,144 @@
+# ===================================================================
+#               members/card_printing.py
+#       Batch ID card printing: many cards per sheet, PDF or PNG pages
+# ===================================================================
+
+import io
+import logging
+import os
+import tempfile
+import zipfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+
+from . import id_cards
+from .models import CardPrintJob, Member
+from .filters import MemberFilters
+from .jobs import JobLost, heartbeat
+
+logger = logging.getLogger(__name__)
+
+# A4 portrait at 300 dpi, with CR80-size cards (85.6 x 54 mm) in a 2 x 5 grid
+SHEET_DPI = 300
+SHEET_SIZE = (2480, 3508)
+CARD_SIZE = (1011, 638)
+SHEET_COLUMNS = 2
+SHEET_ROWS = 5
+SHEET_GAP = 40  # px between cards, leaves room for the cutter
+
+
+def members_for_filters(filters):
+    """The member_list filters (MemberFilters.as_params() + the coordinator's scope_region) as a queryset."""
+    queryset = Member.objects.filter(is_active=True).matching(MemberFilters.from_params(filters))
+    if filters.get('scope_region'):
+        queryset = queryset.filter(address_region=filters['scope_region'])
+    return queryset.order_by('full_name', 'id')
+
+
+def _card_image(member, base_url):
+    # Re-uses the stored card image; it is only re-rendered if the member's data changed
+    name, _ = id_cards.ensure_id_card_image(member, base_url)
+    with default_storage.open(name, 'rb') as handle:
+        card = Image.open(handle)
+        card.load()
+    return card.convert('RGB').resize(CARD_SIZE, Image.LANCZOS)
+
+
+def iter_sheets(members, base_url, columns=SHEET_COLUMNS, rows=SHEET_ROWS):
+    """
+    Yields (sheet image, number of cards on it), one page at a time.
+    Only the current page is held in memory, however many members there are.
+    """
+    per_sheet = columns * rows
+    grid_width = columns * CARD_SIZE[0] + (columns - 1) * SHEET_GAP
+    grid_height = rows * CARD_SIZE[1] + (rows - 1) * SHEET_GAP
+    left = (SHEET_SIZE[0] - grid_width) // 2
+    top = (SHEET_SIZE[1] - grid_height) // 2
+
+    sheet, placed = None, 0
+    for member in members:
+        if sheet is None:
+            sheet, placed = Image.new('RGB', SHEET_SIZE, 'white'), 0
+        column, row = placed % columns, placed // columns
+        position = (left + column * (CARD_SIZE[0] + SHEET_GAP), top + row * (CARD_SIZE[1] + SHEET_GAP))
+        sheet.paste(_card_image(member, base_url), position)
+        placed += 1
+        if placed == per_sheet:
+            yield sheet, placed
+            sheet = None
+    if sheet is not None:
+        yield sheet, placed
+
+
+def write_pdf(sheets, path, on_page=None):
+    """Appends each sheet to the PDF at `path` as soon as it is drawn."""
+    for page_number, (sheet, count) in enumerate(sheets):
+        sheet.save(path, 'PDF', resolution=SHEET_DPI, append=page_number > 0)
+        if on_page:
+            on_page(count)
+
+
+def write_png_zip(sheets, path, on_page=None):
+    """One PNG per sheet inside a ZIP (PNG is already compressed, so the ZIP just stores them)."""
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for page_number, (sheet, count) in enumerate(sheets, start=1):
+            buffer = io.BytesIO()
+            sheet.save(buffer, format='PNG', dpi=(SHEET_DPI, SHEET_DPI))
+            archive.writestr(f'sheet-{page_number:04d}.png', buffer.getvalue())
+            if on_page:
+                on_page(count)
+
+
+def run_print_job(job_id):
+    """
+    Renders a CardPrintJob, recording progress on the job row after every page (and,
+    run as a job, renewing the job's lease so a long print isn't handed out again).
+    """
+    job = CardPrintJob.objects.get(pk=job_id)
+    try:
+        members = members_for_filters(job.filters)
+        total = members.count()
+        if not total:
+            raise ValueError("ምንም አይነት አባል አልተገኘም።")
+        CardPrintJob.objects.filter(pk=job.pk).update(status='running', total=total, processed=0)
+
+        progress = {'processed': 0}
+
+        def on_page(count):
+            progress['processed'] += count
+            CardPrintJob.objects.filter(pk=job.pk).update(processed=progress['processed'])
+            heartbeat()
+
+        base_url = job.filters.get('base_url') or id_cards.default_base_url()
+        sheets = iter_sheets(members.iterator(chunk_size=200), base_url)
+        extension = 'pdf' if job.output_format == 'pdf' else 'zip'
+        handle, path = tempfile.mkstemp(suffix=f'.{extension}')
+        os.close(handle)
+        try:
+            if job.output_format == 'pdf':
+                write_pdf(sheets, path, on_page)
+            else:
+                write_png_zip(sheets, path, on_page)
+            with open(path, 'rb') as output:
+                job.output.save(f'id-cards-{job.pk}.{extension}', File(output), save=False)
+        finally:
+            os.remove(path)
+
+        CardPrintJob.objects.filter(pk=job.pk).update(
+            status='done', output=job.output.name, finished_at=timezone.now(),
+        )
+    except JobLost:
+        raise  # the worker that has the job now records the outcome
+    except Exception as exc:
+        logger.exception("Card print job %s failed", job.pk)
+        CardPrintJob.objects.filter(pk=job.pk).update(status='failed', error=str(exc), finished_at=timezone.now())
+
+
+def abandon_print_job(job_id):
+    """Fails a print whose job the queue gave up on (e.g. the worker died mid-render), so polling stops."""
+    CardPrintJob.objects.filter(pk=job_id, status__in=['queued', 'running']).update(
+        status='failed', error="ህትመቱ ሳይጠናቀቅ ተቋርጧል። እባክዎ እንደገና ይሞክሩ።", finished_at=timezone.now(),
+    )
@@ -0,0 +1,116 @@
+# ===================================================================
+#               members/checkin.py
+#       Meeting check-in from scanned ID card QR codes, written in bulk
+# ===================================================================
+
+from urllib.parse import urlparse
+
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .analytics import record_attendance
+from .models import MEMBERSHIP_ID_RE, Attendance, Meeting, Member
+
+MAX_SCANS_PER_REQUEST = 1000
+ATTENDANCE_BATCH_SIZE = 500
+
+
+def parse_scan(payload):
+    """
+    Reads what a scanner returns for an ID card: the member_detail URL encoded in the
+    QR code (see id_cards.member_detail_url), or the printed membership ID typed in by hand.
+    Returns ('pk', 123), ('membership_id', 'AMH-2025-0012') or None (also for a non-string payload).
+    """
+    if not isinstance(payload, str):
+        return None
+    payload = payload.strip()
+    if not payload:
+        return None
+    if MEMBERSHIP_ID_RE.match(payload.upper()):
+        return 'membership_id', payload.upper()
+    try:
+        match = resolve(urlparse(payload).path)
+    except Resolver404:
+        return None
+    if match.url_name != 'member_detail':
+        return None
+    return 'pk', match.kwargs['pk']
+
+
+def _scan_time(value, now):
+    # Offline devices send the time of the scan; anything unreadable or in the future means "now"
+    try:
+        # Well-formed but impossible times (2025-02-30T10:00Z) raise ValueError
+        scanned_at = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        scanned_at = None
+    if scanned_at is None:
+        return now
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return min(scanned_at, now)
+
+
+def record_checkins(meeting, scans):
+    """
+    `scans` is a list of {'payload': ..., 'scanned_at': ISO time or None}.
+    Resolves every payload with at most two queries, then writes the new Attendance rows
+    with bulk_create(ignore_conflicts=True): a scan that was already recorded (twice
+    at the door, or re-sent by a device after a dropped response) is simply skipped.
+    The attendance summary tables are updated in the same transaction, counting only
+    the rows this call inserted: the meeting row is locked first, so concurrent syncs
+    of the same meeting see each other's check-ins instead of both counting them.
+    """
+    now = timezone.now()
+    parsed = []
+    unknown = []
+    for scan in scans:
+        key = parse_scan(scan.get('payload'))
+        if key is None:
+            unknown.append(scan.get('payload'))
+        else:
+            parsed.append((key, _scan_time(scan.get('scanned_at'), now), scan.get('payload')))
+
+    active = Member.objects.filter(is_active=True)
+    pks = {value for (kind, value), _, _ in parsed if kind == 'pk'}
+    membership_ids = {value for (kind, value), _, _ in parsed if kind == 'membership_id'}
+    found = {}
+    regions = {}
+    if pks:
+        for pk, region in active.filter(pk__in=pks).values_list('pk', 'address_region'):
+            found[('pk', pk)], regions[pk] = pk, region
+    if membership_ids:
+        for membership_id, pk, region in active.filter(membership_id__in=membership_ids).values_list(
+            'membership_id', 'pk', 'address_region',
+        ):
+            found[('membership_id', membership_id)], regions[pk] = pk, region
+
+    # The earliest scan of each member counts
+    first_scan = {}
+    for key, scanned_at, payload in parsed:
+        member_id = found.get(key)
+        if member_id is None:
+            unknown.append(payload)
+        elif member_id not in first_scan or scanned_at < first_scan[member_id]:
+            first_scan[member_id] = scanned_at
+
+    with transaction.atomic():
+        Meeting.objects.select_for_update().get(pk=meeting.pk)  # one sync of this meeting at a time
+        already = set(
+            Attendance.objects.filter(meeting=meeting, member_id__in=first_scan).values_list('member_id', flat=True)
+        )
+        new_rows = [
+            Attendance(meeting=meeting, member_id=member_id, attended_at=scanned_at)
+            for member_id, scanned_at in first_scan.items() if member_id not in already
+        ]
+        Attendance.objects.bulk_create(new_rows, batch_size=ATTENDANCE_BATCH_SIZE, ignore_conflicts=True)
+        # bulk_create sends no post_save, so the summary tables are updated here
+        record_attendance(meeting, [row.member_id for row in new_rows], regions=regions)
+    return {
+        'received': len(scans),
+        'recorded': len(new_rows),
+        'already_checked_in': len(already),
+        'unknown': unknown,
+    }
@@ -0,0 +1,145 @@
+# ===================================================================
+#               members/filters.py
+#       Validated member filters shared by the list, export and card printing
+# ===================================================================
+
+import hashlib
+import json
+from datetime import date
+
+from django import forms
+from django.utils import timezone
+
+from .models import EDUCATION_CHOICES, REGION_CHOICES, Member
+from .search import SEARCH_FIELDS, search_members
+
+# Age band -> (minimum age, maximum age); None is open-ended
+AGE_BANDS = {
+    '18-25': (18, 25),
+    '26-35': (26, 35),
+    '36-50': (36, 50),
+    '51-65': (51, 65),
+    '65+': (66, None),
+}
+
+# Form field -> exact (indexed) lookup. `query` and `age_band` are handled separately.
+LOOKUPS = {
+    'region': 'address_region',
+    'zone': 'address_zone',
+    'woreda': 'address_woreda',
+    'gender': 'gender',
+    'membership_level': 'membership_level',
+    'education_level': 'education_level',
+    'start_date': 'join_date__gte',
+    'end_date': 'join_date__lte',
+}
+# Member columns a filtered list depends on; writing any of them drops the cached counts (members/cache.py)
+FILTERED_FIELDS = frozenset([lookup.split('__')[0] for lookup in LOOKUPS.values()] + ['date_of_birth', *SEARCH_FIELDS])
+
+
+def _choices(label, choices):
+    return [('', label)] + list(choices)
+
+
+def _select():
+    return forms.Select(attrs={'class': 'form-select'})
+
+
+def _text(placeholder):
+    return forms.TextInput(attrs={'class': 'form-control', 'placeholder': placeholder})
+
+
+def _date(title):
+    return forms.DateInput(attrs={'type': 'date', 'class': 'form-control', 'title': title})
+
+
+class MemberFilterForm(forms.Form):
+    query = forms.CharField(required=False, max_length=100, widget=_text("በስም ወይም በመለያ ቁጥር ፈልግ"))
+    region = forms.ChoiceField(required=False, choices=_choices("ሁሉም ክልሎች", REGION_CHOICES), widget=_select())
+    zone = forms.CharField(required=False, max_length=100, widget=_text("ዞን"))
+    woreda = forms.CharField(required=False, max_length=100, widget=_text("ወረዳ"))
+    gender = forms.ChoiceField(
+        required=False, choices=_choices("ጾታ", Member._meta.get_field('gender').choices), widget=_select(),
+    )
+    membership_level = forms.ChoiceField(
+        required=False, choices=_choices("የአባልነት ደረጃ", Member._meta.get_field('membership_level').choices),
+        widget=_select(),
+    )
+    education_level = forms.ChoiceField(
+        required=False, choices=_choices("የትምህርት ደረጃ", EDUCATION_CHOICES), widget=_select(),
+    )
+    age_band = forms.ChoiceField(
+        required=False, choices=_choices("ዕድሜ", [(band, band) for band in AGE_BANDS]), widget=_select(),
+    )
+    start_date = forms.DateField(required=False, widget=_date("የተቀላቀለበት መጀመሪያ ቀን"))
+    end_date = forms.DateField(required=False, widget=_date("የተቀላቀለበት መጨረሻ ቀን"))
+
+    def clean(self):
+        cleaned = super().clean()
+        for name in ('query', 'zone', 'woreda'):
+            # Stored values are matched exactly, so only whitespace is normalized
+            cleaned[name] = ' '.join((cleaned.get(name) or '').split())
+        start_date, end_date = cleaned.get('start_date'), cleaned.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            self.add_error('end_date', "የመጨረሻው ቀን ከመጀመሪያው ቀን በፊት ሊሆን አይችልም።")
+        return cleaned
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+class MemberFilters:
+    """
+    The normalized, validated filters of one request. Invalid parameters are dropped
+    and reported in `errors`; `values` only holds the filters that are actually set,
+    so equal filters always give the same params and cache key, in any order.
+    Applied with Member.objects.matching(filters).
+    """
+
+    def __init__(self, values=None, errors=None, form=None):
+        self.values = values or {}
+        self.errors = errors or {}
+        self.form = form
+
+    @classmethod
+    def from_params(cls, params):
+        form = MemberFilterForm(params or {})
+        form.is_valid()
+        values = {
+            name: value.isoformat() if isinstance(value, date) else value
+            for name, value in form.cleaned_data.items()
+            if value not in (None, '') and name not in form.errors
+        }
+        errors = {name: [str(error) for error in errors] for name, errors in form.errors.items()}
+        return cls(values, errors, form)
+
+    def as_params(self):
+        """The filters as query-string parameters (also stored on card print jobs)."""
+        return dict(sorted(self.values.items()))
+
+    def cache_key(self, scope=None):
+        """A short key for these filters (and a MemberScope) for memoizing counts and results."""
+        canonical = self.as_params()
+        if scope is not None:
+            canonical['_scope'] = [scope.region, scope.empty]
+        raw = json.dumps(canonical, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        return hashlib.md5(raw).hexdigest()[:20]
+
+    def filter(self, queryset):
+        lookups = {LOOKUPS[name]: value for name, value in self.values.items() if name in LOOKUPS}
+        queryset = queryset.filter(**lookups)
+        band = AGE_BANDS.get(self.values.get('age_band'))
+        if band:
+            today = timezone.localdate()
+            youngest, oldest = band
+            # Age >= youngest: born on or before today minus `youngest` years
+            queryset = queryset.filter(date_of_birth__lte=_years_before(today, youngest))
+            if oldest is not None:
+                queryset = queryset.filter(date_of_birth__gt=_years_before(today, oldest + 1))
+        if self.values.get('query'):
+            queryset = search_members(queryset, self.values['query'])
+        return queryset
@@ -0,0 +1,220 @@
+# ===================================================================
+#               members/id_cards.py
+#       QR codes and ID card images: generated once, stored, reused
+# ===================================================================
+
+import hashlib
+import io
+import os
+from datetime import timedelta
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from .images import ensure_variant
+from .models import Member
+
+QR_DIR = 'member_qr/'
+CARD_DIR = 'member_cards/'
+
+# Card geometry (same proportions as id_card_template.html: 600 x 370 px)
+CARD_WIDTH = 600
+CARD_HEIGHT = 370
+CARD_DARK = (44, 62, 80)  # #2c3e50
+CARD_TEXT = (51, 51, 51)
+CARD_MUTED = (85, 85, 85)
+PARTY_NAME = 'የኢትዮጵያ አንድነት እና ልማት ፓርቲ'
+CARD_DISCLAIMER = 'ይህ ካርድ የፓርቲው ንብረት ነው።ቢጠፋ ወይንም ተጥሎ ቢገኝ በአቅራቢያዎ ላለ ፓርቲ ቢሮ ያስረክቡ።'
+
+# Member fields printed on the card; changing any of them produces a new card version
+CARD_FIELDS = (
+    'pk', 'full_name', 'party_role', 'gender', 'date_of_birth', 'phone_number',
+    'address_region', 'membership_id', 'join_date', 'photo',
+)
+
+
+# ------------------ Versions ------------------
+
+def _short_hash(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:12]
+
+
+def member_detail_url(pk, base_url):
+    """The URL encoded in a member's QR code. `base_url` is e.g. 'https://example.org'."""
+    return base_url.rstrip('/') + reverse('member_detail', args=[pk])
+
+
+def qr_version(url):
+    return _short_hash(url)
+
+
+def card_version(card_data, url):
+    return _short_hash(qr_version(url), *(card_data.get(field) for field in CARD_FIELDS))
+
+
+def card_data_for(member):
+    data = {field: getattr(member, field) for field in CARD_FIELDS if field not in ('gender', 'photo')}
+    data['gender'] = member.get_gender_display()
+    data['photo'] = member.photo.name if member.photo else ''
+    return data
+
+
+def is_current_file(name, pk, version):
+    return bool(name) and os.path.basename(name).startswith(f'{pk}-{version}')
+
+
+# ------------------ Rendering (pure CPU, safe to run in worker processes) ------------------
+
+def render_qr_png(url):
+    image = qrcode.make(url, box_size=4, border=1)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _font(size):
+    # Pillow's built-in font has no Ge'ez glyphs; point ID_CARD_FONT_PATH at e.g. AbyssinicaSIL-Regular.ttf
+    font_path = getattr(settings, 'ID_CARD_FONT_PATH', None)
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size)
+
+
+def render_id_card(card_data, qr_png, photo_bytes=None, scale=2):
+    """
+    Draws one ID card (same layout as id_card_template.html) and returns a PIL image.
+    `scale` multiplies the 600x370 base size; 2 gives ~300 dpi on a CR80 card.
+    """
+    s = scale
+    card = Image.new('RGB', (CARD_WIDTH * s, CARD_HEIGHT * s), 'white')
+    draw = ImageDraw.Draw(card)
+
+    # Header and footer bars
+    draw.rectangle([0, 0, CARD_WIDTH * s, 40 * s], fill=CARD_DARK)
+    draw.text((CARD_WIDTH * s // 2, 20 * s), PARTY_NAME, font=_font(18 * s), fill='white', anchor='mm')
+    draw.rectangle([0, (CARD_HEIGHT - 36) * s, CARD_WIDTH * s, CARD_HEIGHT * s], fill=CARD_DARK)
+    draw.text((CARD_WIDTH * s // 2, (CARD_HEIGHT - 18) * s), CARD_DISCLAIMER, font=_font(10 * s), fill='white', anchor='mm')
+
+    # Photo (circle) or placeholder
+    photo_box = (35 * s, 65 * s, 175 * s, 205 * s)
+    size = (photo_box[2] - photo_box[0], photo_box[3] - photo_box[1])
+    mask = Image.new('L', size, 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, size[0], size[1]], fill=255)
+    if photo_bytes:
+        photo = ImageOps.exif_transpose(Image.open(io.BytesIO(photo_bytes))).convert('RGB')
+        card.paste(ImageOps.fit(photo, size), photo_box[:2], mask)
+    else:
+        card.paste(Image.new('RGB', size, (206, 212, 218)), photo_box[:2], mask)
+
+    # Name and role under the photo
+    draw.text((105 * s, 225 * s), card_data['full_name'], font=_font(20 * s), fill=CARD_DARK, anchor='mm')
+    draw.text((105 * s, 252 * s), card_data.get('party_role') or 'አባል', font=_font(13 * s), fill=CARD_MUTED, anchor='mm')
+    draw.line([(210 * s, 60 * s), (210 * s, 310 * s)], fill=(238, 238, 238), width=s)
+
+    # Details
+    dob = card_data.get('date_of_birth')
+    lines = [
+        ('ጾታ:', card_data.get('gender', '')),
+        ('የትውልድ ቀን:', dob.strftime('%d-%m-%Y') if dob else ''),
+        ('ስልክ:', card_data.get('phone_number', '')),
+        ('ክልል:', card_data.get('address_region', '')),
+    ]
+    y = 110 * s
+    for label, value in lines:
+        draw.text((230 * s, y), f'{label}  {value}', font=_font(12 * s), fill=CARD_TEXT)
+        y += 26 * s
+
+    # QR code and dates
+    qr = Image.open(io.BytesIO(qr_png)).convert('RGB').resize((100 * s, 100 * s), Image.NEAREST)
+    card.paste(qr, (470 * s, 60 * s))
+    join_date = card_data.get('join_date')
+    draw.text((520 * s, 172 * s), card_data.get('membership_id', ''), font=_font(11 * s), fill=CARD_TEXT, anchor='mm')
+    if join_date:
+        draw.text((440 * s, 195 * s), f"የወጣበት ቀን: {join_date.strftime('%d %b %Y')}", font=_font(10 * s), fill=CARD_TEXT)
+        expiry = join_date + timedelta(days=365)
+        draw.text((440 * s, 215 * s), f"የሚያበቃበት ቀን: {expiry.strftime('%d %b %Y')}", font=_font(10 * s), fill=CARD_TEXT)
+    return card
+
+
+def render_id_card_png(card_data, qr_png, photo_bytes=None, scale=2):
+    buffer = io.BytesIO()
+    render_id_card(card_data, qr_png, photo_bytes, scale).save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+# ------------------ Stored files ------------------
+
+def _replace_file(member, field_name, name, content):
+    """Saves `content` through the storage backend and points the member at it (no full save())."""
+    old_name = getattr(member, field_name).name
+    saved_name = default_storage.save(name, ContentFile(content))
+    Member.objects.filter(pk=member.pk).update(**{field_name: saved_name})
+    setattr(member, field_name, saved_name)
+    if old_name and old_name != saved_name:
+        default_storage.delete(old_name)
+    return saved_name
+
+
+def ensure_qr_code(member, base_url, qr_png=None, force=False):
+    """
+    Returns (storage name, version) of the member's QR code, generating it only if
+    the member has none yet or the encoded URL changed.
+    """
+    url = member_detail_url(member.pk, base_url)
+    version = qr_version(url)
+    if force or not is_current_file(member.qr_code.name, member.pk, version):
+        _replace_file(member, 'qr_code', f'{QR_DIR}{member.pk}-{version}.png', qr_png or render_qr_png(url))
+    return member.qr_code.name, version
+
+
+def read_photo(member):
+    """The member's photo at ID card size (the small cached variant, not the original)."""
+    if not member.photo:
+        return None
+    try:
+        name = ensure_variant(member.photo.name, 'id_card', storage=member.photo.storage)
+        with member.photo.storage.open(name, 'rb') as handle:
+            return handle.read()
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_id_card_image(member, base_url, card_png=None, force=False):
+    """Same as ensure_qr_code, for the full card image."""
+    url = member_detail_url(member.pk, base_url)
+    data = card_data_for(member)
+    version = card_version(data, url)
+    if force or not is_current_file(member.id_card_image.name, member.pk, version):
+        if card_png is None:
+            ensure_qr_code(member, base_url)
+            with default_storage.open(member.qr_code.name, 'rb') as handle:
+                qr_png = handle.read()
+            card_png = render_id_card_png(data, qr_png, read_photo(member))
+        _replace_file(member, 'id_card_image', f'{CARD_DIR}{member.pk}-{version}.png', card_png)
+    return member.id_card_image.name, version
+
+
+def render_member_files(job):
+    """
+    Process-pool entry point: renders the QR and card PNGs for one member.
+    `job` is plain data (no model instances or DB access), so it pickles cheaply.
+    """
+    qr_png = render_qr_png(job['url'])
+    card_png = None
+    if job['with_card']:
+        card_png = render_id_card_png(job['card_data'], qr_png, job['photo_bytes'])
+    return job['pk'], qr_png, card_png
+
+
+def default_base_url():
+    """Base URL for QR codes rendered outside a request (from the Sites framework)."""
+    from django.contrib.sites.models import Site
+
+    return f"https://{Site.objects.get_current().domain}"
@@ -0,0 +1,97 @@
+# ===================================================================
+#               members/images.py
+#       Member photo processing: normalized uploads + lazy size variants
+# ===================================================================
+
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Longest side of a stored original; camera photos are much bigger than we ever display
+PHOTO_MAX_SIZE = getattr(settings, 'MEMBER_PHOTO_MAX_SIZE', 1600)
+# 'WEBP' (smaller) or 'JPEG' (works everywhere)
+PHOTO_FORMAT = getattr(settings, 'MEMBER_PHOTO_FORMAT', 'WEBP').upper()
+PHOTO_QUALITY = 85
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+VARIANT_DIR = 'member_photos/variants/'
+# name -> (width, height, crop). crop=True fills the box exactly (avatars), False keeps the aspect ratio.
+PHOTO_VARIANTS = {
+    'list': (96, 96, True),
+    'id_card': (280, 280, True),
+    'detail': (600, 600, False),
+}
+
+
+def _encode(image):
+    image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=PHOTO_FORMAT, quality=PHOTO_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def process_uploaded_photo(upload):
+    """
+    Rotates the image according to its EXIF orientation (phones store it sideways),
+    caps it at PHOTO_MAX_SIZE and re-encodes it. Returns a ContentFile ready to assign
+    to Member.photo, or None if the file can't be read as an image.
+    """
+    try:
+        upload.seek(0)
+        with Image.open(upload) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((PHOTO_MAX_SIZE, PHOTO_MAX_SIZE), Image.LANCZOS)
+            data = _encode(image)
+    except (UnidentifiedImageError, OSError):
+        return None
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    processed = ContentFile(data, name=f'{stem}.{EXTENSIONS[PHOTO_FORMAT]}')
+    processed.normalized = True  # Member.save won't process it a second time
+    return processed
+
+
+def content_digest(handle, chunk_size=64 * 1024):
+    handle.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: handle.read(chunk_size), b''):
+        digest.update(chunk)
+    handle.seek(0)
+    return digest.hexdigest()
+
+
+def photo_version(photo_name):
+    """Short hash of the stored file name; changes whenever a new photo is uploaded."""
+    return hashlib.sha1(photo_name.encode('utf-8')).hexdigest()[:10]
+
+
+def variant_name(photo_name, variant):
+    stem = os.path.splitext(os.path.basename(photo_name))[0]
+    return f'{VARIANT_DIR}{stem}-{variant}-{photo_version(photo_name)}.{EXTENSIONS[PHOTO_FORMAT]}'
+
+
+def ensure_variant(photo_name, variant, storage=None):
+    """
+    Returns the storage name of a resized variant, creating it the first time it's asked for.
+    Variants are keyed by the original's name, so a new upload never serves an old variant.
+    """
+    storage = storage or default_storage
+    width, height, crop = PHOTO_VARIANTS[variant]
+    name = variant_name(photo_name, variant)
+    if storage.exists(name):
+        return name
+    with storage.open(photo_name, 'rb') as handle:
+        with Image.open(handle) as image:
+            image = ImageOps.exif_transpose(image)
+            if crop:
+                image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            else:
+                image.thumbnail((width, height), Image.LANCZOS)
+            data = _encode(image)
+    return storage.save(name, ContentFile(data))
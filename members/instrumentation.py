@@ -0,0 +1,304 @@
+# ===================================================================
+#               members/instrumentation.py
+#       Per-view query count, DB / template time and response size metrics
+# ===================================================================
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+# Histogram bucket upper bounds (Prometheus "le" labels)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+METRICS = {
+    # name: (help text, buckets)
+    'members_view_duration_seconds': ("Time spent in the view and middleware", SECONDS_BUCKETS),
+    'members_view_db_queries': ("SQL queries per request", QUERY_BUCKETS),
+    'members_view_db_duration_seconds': ("Time spent executing SQL per request", SECONDS_BUCKETS),
+    'members_view_template_duration_seconds': ("Time spent rendering templates per request", SECONDS_BUCKETS),
+    'members_view_response_bytes': ("Response body size", BYTES_BUCKETS),
+}
+
+COUNTERS = {
+    # name: help text; labelled by kind (profile, photo), see members/writes.py
+    'members_writes_total': "Profile and photo writes made",
+    'members_writes_avoided_total': "Profile and photo writes skipped because nothing changed",
+}
+
+_current = ContextVar('members_request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+# ------------------ Rolling histograms ------------------
+
+class RollingHistogram:
+    """
+    Bucket counts over the last `window` seconds, kept as `slices` sub-windows so old
+    observations drop out a slice at a time instead of accumulating forever.
+    """
+
+    def __init__(self, buckets, window, slices=6):
+        self.buckets = buckets
+        self.slice_length = window / slices
+        self.slices = {}  # slice number -> [bucket counts..., +Inf count, sum]
+        self.max_slices = slices
+
+    def observe(self, value, now):
+        current = int(now // self.slice_length)
+        data = self.slices.get(current)
+        if data is None:
+            data = self.slices[current] = [0] * (len(self.buckets) + 2)
+            for old in [number for number in self.slices if number <= current - self.max_slices]:
+                del self.slices[old]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def snapshot(self, now):
+        """Returns (cumulative bucket counts including +Inf, sum) over the live window."""
+        oldest = int(now // self.slice_length) - self.max_slices
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0
+        for number, data in self.slices.items():
+            if number > oldest:
+                for index in range(len(counts)):
+                    counts[index] += data[index]
+                total += data[-1]
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class MetricsRegistry:
+    """In-process (per worker) metrics: histograms labelled by view name, counters by kind."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}  # (name, kind) -> count since the worker started
+
+    def window(self):
+        return getattr(settings, 'REQUEST_METRICS_WINDOW', 3600)
+
+    def observe(self, view, values, now=None):
+        now = now if now is not None else time.time()
+        with self.lock:
+            for name, value in values.items():
+                key = (name, view)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = RollingHistogram(METRICS[name][1], self.window())
+                histogram.observe(value, now)
+
+    def count(self, name, kind, amount=1):
+        with self.lock:
+            self.counters[(name, kind)] = self.counters.get((name, kind), 0) + amount
+
+    def render_prometheus(self, now=None):
+        """Prometheus text exposition format (0.0.4)."""
+        now = now if now is not None else time.time()
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text} (last {self.window()}s)")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, view), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    counts, total = histogram.snapshot(now)
+                    label = view.replace('\\', '\\\\').replace('"', '\\"')
+                    for bound, count in zip([*buckets, '+Inf'], counts):
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {round(total, 6)}')
+                    lines.append(f'{name}_count{{view="{label}"}} {counts[-1]}')
+            for name, help_text in COUNTERS.items():
+                lines.append(f"# HELP {name} {help_text} (since the worker started)")
+                lines.append(f"# TYPE {name} counter")
+                for (metric, kind), count in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{{kind="{kind}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# ------------------ Collection ------------------
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: counts and times the SQL of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection):
+    # Installed on every connection for good rather than per request: async views run their
+    # queries on other threads' connections, and the request is found through _current
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+class TimedTemplate:
+    """Wraps a backend template and adds its render time to the current request's metrics."""
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self._template.render(context, request)
+        # Templates rendered from inside another one (crispy forms, render_to_string in a tag)
+        # are already part of the outer render time
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The standard Django template backend, with render times reported to RequestMetricsMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def server_timing(metrics, total):
+    return (
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+        f'tpl;dur={metrics.template_time * 1000:.1f}, '
+        f'total;dur={total * 1000:.1f}'
+    )
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures every resolved view: SQL queries and their time (record_query), template
+    render time, total time and response size. Adds a Server-Timing header and feeds the
+    histograms served by the `metrics` view. Streaming responses (exports) are measured
+    until their last chunk has been sent. Works under WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        view = match.view_name
+        response['Server-Timing'] = server_timing(metrics, time.perf_counter() - started)
+        if not response.streaming:
+            self.record(view, metrics, started, len(response.content))
+        elif response.is_async:
+            response.streaming_content = self.ameasure_stream(response.streaming_content, metrics, view, started)
+        else:
+            response.streaming_content = self.measure_stream(response.streaming_content, metrics, view, started)
+        return response
+
+    def measure_stream(self, content, metrics, view, started):
+        # The body is produced after __call__ has returned, so collection is switched back on here.
+        # set() rather than a reset token: the server may finish the iteration in another context.
+        size = 0
+        previous = _current.get()
+        _current.set(metrics)
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            _current.set(previous)
+            self.record(view, metrics, started, size)
+
+    async def ameasure_stream(self, content, metrics, view, started):
+        size = 0
+        previous = _current.get()
+        _current.set(metrics)
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            _current.set(previous)
+            self.record(view, metrics, started, size)
+
+    def record(self, view, metrics, started, size):
+        registry.observe(view, {
+            'members_view_duration_seconds': time.perf_counter() - started,
+            'members_view_db_queries': metrics.queries,
+            'members_view_db_duration_seconds': metrics.db_time,
+            'members_view_template_duration_seconds': metrics.template_time,
+            'members_view_response_bytes': size,
+        })
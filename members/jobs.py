@@ -0,0 +1,202 @@
+# ===================================================================
+#               members/jobs.py
+#       Database-backed background jobs (no broker), run by `manage.py run_worker`
+# ===================================================================
+
+import logging
+import random
+import traceback
+from collections import Counter, namedtuple
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Retry n waits BACKOFF_BASE * 2**(n-1) seconds (plus up to 10% jitter), never more than BACKOFF_MAX
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+# A 'running' job whose worker hasn't finished it or sent a heartbeat() by then is assumed dead and handed out again
+STALE_AFTER = timedelta(minutes=30)
+
+Task = namedtuple('Task', ['name', 'func', 'max_attempts', 'concurrency', 'on_give_up'])
+TASKS = {}
+
+# The job being run by this thread (set by run_job), for heartbeat() and current_lease()
+_running = ContextVar('running_job', default=None)
+
+
+class JobLost(Exception):
+    """The job's lease went stale and it was handed to another worker; the handler must stop."""
+
+
+def task(name, max_attempts=5, concurrency=None, on_give_up=None):
+    """
+    Registers a function as a job handler. `concurrency` caps how many jobs of this
+    task run at once across all workers (None = no limit). Payloads are passed as kwargs.
+    `on_give_up` is called with the same kwargs once the job has failed for good
+    (including a worker dying on its last attempt), e.g. to mark the work it tracks as failed.
+    """
+    def decorator(func):
+        TASKS[name] = Task(name, func, max_attempts, concurrency, on_give_up)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0):
+    """
+    Queues a job. Call it inside the transaction that creates the data it works on:
+    if that transaction rolls back, the job disappears with it.
+    With settings.JOB_QUEUE_EAGER the job instead runs right after the commit (dev without a worker).
+    """
+    handler = TASKS[name]
+    job = Job.objects.create(
+        task=name, payload=payload or {}, max_attempts=handler.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if getattr(settings, 'JOB_QUEUE_EAGER', False):
+        transaction.on_commit(lambda: run_pending(worker_id='eager', task_names=[name]))
+    return job
+
+
+def retry_delay(attempts):
+    delay = min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+    return timedelta(seconds=delay * (1 + random.random() / 10))
+
+
+# ------------------ Claiming ------------------
+
+def give_up(job):
+    """Runs the task's on_give_up hook for a job that has failed for good."""
+    handler = TASKS.get(job.task)
+    if handler is None or handler.on_give_up is None:
+        return
+    try:
+        handler.on_give_up(**job.payload)
+    except Exception:
+        logger.exception("on_give_up of job %s (%s) failed", job.pk, job.task)
+
+
+def requeue_stale(now=None):
+    """Releases jobs left 'running' by a worker that died. Returns how many were released."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - STALE_AFTER)
+    failed = 0
+    for job in stale.filter(attempts__gte=F('max_attempts')):
+        if stale.filter(pk=job.pk).update(
+            status='failed', last_error='Worker stopped while running the job', finished_at=now,
+        ):
+            failed += 1
+            give_up(job)
+    return failed + stale.update(status='queued', locked_by='', locked_at=None)
+
+
+def claim(worker_id, limit, task_names=None):
+    """
+    Marks up to `limit` due jobs as running for this worker and returns them.
+    Each claim is a conditional UPDATE (status='queued' -> 'running'), so two workers
+    polling the same rows never both get a job, on any database backend.
+    """
+    now = timezone.now()
+    running = Counter(dict(
+        Job.objects.filter(status='running').values_list('task').annotate(n=Count('id')).order_by()
+    ))
+    due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    if task_names:
+        due = due.filter(task__in=task_names)
+
+    claimed = []
+    for job in due[:limit * 5]:
+        handler = TASKS.get(job.task)
+        if handler and handler.concurrency is not None and running[job.task] >= handler.concurrency:
+            continue
+        updated = Job.objects.filter(pk=job.pk, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if not updated:
+            continue  # another worker got it first
+        job.status, job.locked_by, job.locked_at, job.attempts = 'running', worker_id, now, job.attempts + 1
+        running[job.task] += 1
+        claimed.append(job)
+        if len(claimed) >= limit:
+            break
+    return claimed
+
+
+def _leased(job):
+    """The job's row, as long as it is still this claim's (same worker, same attempt)."""
+    return Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by, attempts=job.attempts)
+
+
+def heartbeat():
+    """
+    Renews the lease of the job this thread is running, so requeue_stale leaves it
+    alone. Long handlers call it between batches. Raises JobLost when the job has
+    already been handed to another worker. Does nothing outside a job.
+    """
+    job = _running.get()
+    if job is None:
+        return
+    now = timezone.now()
+    if not _leased(job).update(locked_at=now):
+        raise JobLost(f"Job {job.pk} was handed to another worker")
+    job.locked_at = now
+
+
+def current_lease():
+    """A token naming this claim of the running job ('' outside a job); a requeued job gets a new one."""
+    job = _running.get()
+    return f"{job.locked_by}#{job.attempts}" if job is not None else ''
+
+
+# ------------------ Running ------------------
+
+def run_job(job):
+    """
+    Runs one claimed job and records the outcome. Failed attempts are retried with
+    backoff. A job that lost its lease meanwhile is left to the worker that has it
+    now (status 'lost' on the returned job, nothing written).
+    """
+    handler = TASKS.get(job.task)
+    running = _running.set(job)
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown task '{job.task}'")
+        handler.func(**job.payload)
+    except JobLost:
+        logger.warning("Job %s (%s) was handed to another worker during attempt %s", job.pk, job.task, job.attempts)
+        updated = 0
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.task, job.attempts)
+        if handler is None or job.attempts >= job.max_attempts:
+            updated = _leased(job).update(status='failed', last_error=error, finished_at=timezone.now())
+            job.status = 'failed'
+            if updated:
+                give_up(job)
+        else:
+            updated = _leased(job).update(
+                status='queued', last_error=error, locked_by='', locked_at=None,
+                run_after=timezone.now() + retry_delay(job.attempts),
+            )
+            job.status = 'queued'
+    else:
+        updated = _leased(job).update(status='done', finished_at=timezone.now())
+        job.status = 'done'
+    finally:
+        _running.reset(running)
+    if not updated:
+        job.status = 'lost'
+    return job
+
+
+def run_pending(worker_id='inline', limit=100, task_names=None):
+    """Runs due jobs one after another in this thread (tests, eager mode). Returns the jobs run."""
+    jobs = claim(worker_id, limit, task_names)
+    return [run_job(job) for job in jobs]
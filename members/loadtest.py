@@ -0,0 +1,104 @@
+# ===================================================================
+#               members/loadtest.py
+#       Concurrent-client load against a running server (WSGI vs ASGI)
+# ===================================================================
+
+import asyncio
+import socket
+import statistics
+import time
+from importlib import import_module
+
+import aiohttp
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+READ_CHUNK_SIZE = 16 * 1024
+# Receive buffer of a simulated slow client. With the default (megabytes on loopback) the
+# kernel would take the whole response off the server at once, hiding what a slow client costs.
+SLOW_CLIENT_RCVBUF = 64 * 1024
+
+
+def session_cookie(user):
+    """A logged-in session for `user`, stored like a real login (the servers must share the database)."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return {settings.SESSION_COOKIE_NAME: session.session_key}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _read_body(response, read_rate):
+    """Reads the whole body; with read_rate (bytes/s) like a slow mobile client."""
+    size = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if read_rate:
+            await asyncio.sleep(len(chunk) / read_rate)
+    return size
+
+
+async def _client(session, urls, deadline, read_rate, latencies, errors, offset):
+    index = offset
+    while time.perf_counter() < deadline:
+        url = urls[index % len(urls)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            async with session.get(url, allow_redirects=False) as response:
+                await _read_body(response, read_rate)
+                if response.status != 200:
+                    errors[f'HTTP {response.status}'] = errors.get(f'HTTP {response.status}', 0) + 1
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def _slow_client_socket(addr_info):
+    family, type_, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_CLIENT_RCVBUF)
+    return sock
+
+
+async def _run(urls, concurrency, duration, cookies, read_rate, timeout):
+    latencies, errors = [], {}
+    connector = aiohttp.TCPConnector(limit=concurrency, socket_factory=_slow_client_socket if read_rate else None)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, cookies=cookies, timeout=client_timeout) as session:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _client(session, urls, deadline, read_rate, latencies, errors, offset) for offset in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def run_load(urls, concurrency=10, duration=10.0, cookies=None, read_rate=None, timeout=60):
+    """
+    Keeps `concurrency` clients requesting `urls` in turn for `duration` seconds.
+    Returns completed requests, req/s, latency percentiles (ms) and errors by kind.
+    """
+    latencies, errors, elapsed = asyncio.run(_run(urls, concurrency, duration, cookies, read_rate, timeout))
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+        'errors': errors,
+    }
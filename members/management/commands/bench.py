@@ -0,0 +1,116 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from members.benchmarks import SyntheticData, compare, run_cases
+
+
+class Rollback(Exception):
+    pass
+
+
+def parse_size(value):
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks Member.save(), dashboard, member_list, member_search, export_members_csv and the "
+        "attendance report on synthetic members (10k, 100k, 1M by default), with query counts and peak "
+        "memory, and writes a JSON report. The data is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10k,100k,1m', help="Comma-separated member counts, e.g. 10k,100k,1m")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (the median is reported)")
+        parser.add_argument('--saves', type=int, default=20, help="Member.save() calls per timed run")
+        parser.add_argument('--attendance', type=int, default=2, help="Meetings attended per synthetic member")
+        parser.add_argument('--years', type=int, default=8, help="Years of join dates and weekly meetings")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', default='bench_report.json', help="Where to write the JSON report")
+        parser.add_argument('--compare', metavar='REPORT', help="An earlier report to compare against")
+        parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio flagged by --compare")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({parse_size(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError("--sizes must look like 10k,100k,1m")
+        if not sizes or sizes[0] < 10:
+            raise CommandError("Every size must be at least 10 members.")
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                previous = json.load(handle)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {key: options[key] for key in ('repeat', 'saves', 'attendance', 'years', 'seed')},
+            'sizes': {},
+        }
+        data = SyntheticData(seed=options['seed'], years=options['years'], attendance_per_member=options['attendance'])
+        try:
+            with transaction.atomic():
+                for size in sizes:
+                    self.stdout.write(f"Growing to {size} synthetic members...")
+                    started = time.perf_counter()
+                    data.grow_to(size)
+                    setup_seconds = round(time.perf_counter() - started, 1)
+                    self.stdout.write(f"  data ready in {setup_seconds}s, timing...")
+                    cases = run_cases(data, repeat=options['repeat'], saves=options['saves'])
+                    report['sizes'][str(size)] = {'setup_seconds': setup_seconds, 'cases': cases}
+                    self.print_cases(cases)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if previous is not None:
+            self.print_comparison(previous, report, options['threshold'])
+
+    def print_cases(self, cases):
+        self.stdout.write(f"  {'case':<40}{'median':>11}{'queries':>9}{'peak':>12}")
+        for name, result in cases.items():
+            self.stdout.write(
+                f"  {name:<40}{result['median_ms']:>8.1f} ms{result['queries']:>9}{result['peak_kib']:>8.0f} KiB"
+            )
+
+    def print_comparison(self, previous, report, threshold):
+        self.stdout.write(f"\nCompared with {previous.get('commit') or previous.get('created_at')}:")
+        if previous.get('options') != report['options']:
+            self.stdout.write(self.style.WARNING(f"  Options differ: {previous.get('options')} vs {report['options']}"))
+        flagged = 0
+        for size, case, before, after, ratio, flag in compare(previous, report, threshold):
+            ratio_text = f"{ratio:.2f}x" if ratio else '-'
+            line = f"  {size:>8} {case:<40}{before:>9.1f} -> {after:>9.1f} ms {ratio_text:>7} {flag}"
+            if flag:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"{flagged} case(s) got slower or run more queries."))
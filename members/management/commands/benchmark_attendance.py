@@ -0,0 +1,119 @@
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+from members import analytics
+from members.models import REGION_CHOICES, Attendance, Meeting, Member
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times attendance turnout queries on synthetic data: ad-hoc joins over Attendance vs. the "
+        "summary tables. Everything is created inside a transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help="Attendance rows to generate")
+        parser.add_argument('--members', type=int, default=200_000)
+        parser.add_argument('--meetings', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query (the median is reported)")
+
+    def handle(self, *args, **options):
+        rows, member_count, meeting_count = options['rows'], options['members'], options['meetings']
+        per_meeting = -(-rows // meeting_count)
+        if per_meeting > member_count:
+            raise CommandError("--rows can't exceed --members x --meetings (one attendance per member and meeting).")
+        try:
+            with transaction.atomic():
+                self.generate(rows, member_count, meeting_count, per_meeting)
+                self.measure(options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+    def timed(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        self.stdout.write(f"  {label}: {time.perf_counter() - started:.1f}s")
+        return result
+
+    def generate(self, rows, member_count, meeting_count, per_meeting):
+        regions = [code for code, _ in REGION_CHOICES]
+        self.stdout.write(f"Generating {member_count} members, {meeting_count} meetings, {rows} attendance rows...")
+        self.timed('members', lambda: Member.objects.bulk_create([
+            Member(
+                full_name=f'Bench {i}', gender='Male' if i % 2 else 'Female', date_of_birth=date(1990, 1, 1),
+                phone_number=f'bench-{i}', address_region=regions[i % len(regions)], address_zone='-',
+                address_woreda='-', address_kebele='-', membership_level='Full', membership_id=f'BENCH-{i}',
+            ) for i in range(member_count)
+        ], batch_size=5000))
+        member_ids = list(Member.objects.filter(membership_id__startswith='BENCH-').order_by('pk').values_list('pk', flat=True))
+
+        start = datetime(2023, 1, 1, 9, tzinfo=timezone.utc)
+        meetings = Meeting.objects.bulk_create([
+            Meeting(title=f'Bench {i}', meeting_date=start + timedelta(days=2 * i), location='-')
+            for i in range(meeting_count)
+        ])
+        meeting_ids = [m.pk for m in meetings] if meetings[0].pk else list(
+            Meeting.objects.filter(title__startswith='Bench ').order_by('pk').values_list('pk', flat=True)
+        )
+
+        table = Attendance._meta.db_table
+        sql = f'INSERT INTO {table} (member_id, meeting_id, attended_at) VALUES (%s, %s, %s)'
+
+        def insert_attendance():
+            remaining = rows
+            with connection.cursor() as cursor:
+                for index, meeting_id in enumerate(meeting_ids):
+                    count = min(per_meeting, remaining)
+                    offset = (index * 7919) % member_count  # a different slice of members per meeting
+                    attended_at = start + timedelta(days=2 * index)
+                    batch = [(member_ids[(offset + j) % member_count], meeting_id, attended_at) for j in range(count)]
+                    cursor.executemany(sql, batch)
+                    remaining -= count
+                    if not remaining:
+                        break
+        self.timed('attendance', insert_attendance)
+        self.timed('summary tables (full rebuild)', analytics.rebuild)
+
+    def median(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    def measure(self, repeat):
+        meeting = Meeting.objects.filter(title__startswith='Bench ').order_by('-meeting_date').first()
+        region = REGION_CHOICES[0][0]
+        queries = [
+            ("Turnout by region, one meeting",
+             lambda: list(Attendance.objects.filter(meeting=meeting).values('member__address_region')
+                          .annotate(n=Count('id')).order_by()),
+             lambda: list(meeting.turnout.values_list('region', 'attendees'))),
+            ("Monthly trend, national",
+             lambda: list(Attendance.objects.annotate(month=TruncMonth('meeting__meeting_date'))
+                          .values('month').annotate(n=Count('id')).order_by('month')),
+             lambda: analytics.attendance_summary(meetings=0, top=0)['trend']),
+            ("Top 20 participants, one region",
+             lambda: list(Attendance.objects.filter(member__address_region=region).values('member_id')
+                          .annotate(n=Count('id')).order_by('-n')[:20]),
+             lambda: analytics.attendance_summary(region=region, meetings=0, months=0)['top_participants']),
+            ("Full report (summary tables only)",
+             None,
+             lambda: analytics.attendance_summary()),
+        ]
+        self.stdout.write(f"\n{'Query':<36}{'ad-hoc join':>14}{'summary':>12}")
+        for label, adhoc, summary in queries:
+            adhoc_ms = f"{self.median(adhoc, repeat):.1f} ms" if adhoc else '-'
+            self.stdout.write(f"{label:<36}{adhoc_ms:>14}{self.median(summary, repeat):>9.1f} ms")
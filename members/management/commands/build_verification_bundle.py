@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from members import bundles
+from members.models import VerificationBundle
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshots the active membership IDs into a new signed offline verification bundle "
+        "(served at /app/verify/bundle/). Nothing is stored when the IDs haven't changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=bundles.BUILD_CHUNK_SIZE,
+                            help="Rows fetched per database round trip")
+        parser.add_argument('--force', action='store_true', help="Store a new version even if nothing changed")
+        parser.add_argument('--output', help="Also write the bundle to this file (e.g. to side-load devices)")
+        parser.add_argument('--since', type=int, help="With --output: write the delta from this version instead")
+        parser.add_argument('--region', action='append', dest='regions', metavar='CODE',
+                            help="With --output: only these region codes, e.g. AMH (repeatable)")
+        parser.add_argument('--print-key', action='store_true',
+                            help="Print the key devices use to check bundle signatures and exit")
+
+    def handle(self, *args, **options):
+        if options['print_key']:
+            self.stdout.write(bundles.device_key())
+            return
+        if options['since'] and not VerificationBundle.objects.filter(pk=options['since']).exists():
+            raise CommandError(f"No verification bundle version {options['since']}")
+
+        started = time.monotonic()
+        bundle, created = bundles.build(options['chunk_size'], force=options['force'])
+        elapsed = time.monotonic() - started
+        if created:
+            self.stdout.write(self.style.SUCCESS(
+                f"Built version {bundle.pk}: {bundle.members} IDs in {bundle.size} bytes ({elapsed:.2f}s)."
+            ))
+        else:
+            self.stdout.write(f"No changes since version {bundle.pk} ({elapsed:.2f}s).")
+        if bundle.skipped:
+            self.stdout.write(self.style.WARNING(
+                f"{bundle.skipped} active IDs don't fit the bundle encoding; devices must check them online."
+            ))
+
+        if options['output']:
+            data, latest = bundles.download(options['since'], options['regions'])
+            with open(options['output'], 'wb') as handle:
+                handle.write(data)
+            self.stdout.write(f"Wrote {len(data)} bytes to {options['output']}.")
@@ -0,0 +1,222 @@
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from members.forms import MemberCreationForm
+from members.models import Member, MembershipSequence
+from members.provisioning import DEFAULT_PASSWORD  # Same initial password as online registration
+from members.search import index_members
+from members.stats import STAT_FIELDS, record_members_created
+
+
+class MemberImportForm(MemberCreationForm):
+    """
+    MemberCreationForm rules, minus the per-row uniqueness queries.
+    Phone numbers and emails are checked against the database in bulk by the command instead.
+    """
+
+    def validate_unique(self):
+        pass
+
+
+def _init_worker():
+    # Worker processes started with "spawn" need Django configured before hashing
+    django.setup()
+
+
+def _hash_password(raw_password):
+    return make_password(raw_password)
+
+
+def _field_lookup():
+    """Maps both field names and their Amharic labels (as used in our CSV exports) to field names."""
+    lookup = {}
+    for name in MemberImportForm._meta.fields:
+        lookup[name] = name
+        lookup[str(Member._meta.get_field(name).verbose_name)] = name
+    return lookup
+
+
+def _clean_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    # Excel stores phone numbers typed as numbers as floats (e.g. 911234567.0)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(path):
+    """Yields (line_number, {field: value}) from a CSV or XLSX file, one row at a time."""
+    lookup = _field_lookup()
+    suffix = Path(path).suffix.lower()
+
+    if suffix == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            reader = csv.reader(handle)
+            header = [lookup.get(h.strip()) for h in next(reader, [])]
+            for line_number, values in enumerate(reader, start=2):
+                yield line_number, {f: _clean_cell(v) for f, v in zip(header, values) if f}
+
+    elif suffix in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise CommandError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [lookup.get(str(h).strip()) if h is not None else None for h in next(rows, ())]
+            for line_number, values in enumerate(rows, start=2):
+                if not any(v not in (None, '') for v in values):
+                    continue
+                yield line_number, {f: _clean_cell(v) for f, v in zip(header, values) if f}
+        finally:
+            workbook.close()
+
+    else:
+        raise CommandError(f"Unsupported file type '{suffix}'. Use .csv or .xlsx.")
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Imports members in bulk from a CSV or XLSX file, creating their user accounts in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .xlsx file")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows written per transaction (default 1000)")
+        parser.add_argument('--workers', type=int, default=None, help="Processes used for password hashing")
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help="Initial password for the new accounts")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without writing anything")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not Path(path).exists():
+            raise CommandError(f"File not found: {path}")
+
+        chunk_size = max(1, options['chunk_size'])
+        self.seen_phones = set()
+        self.seen_emails = set()
+        self.errors = []
+        created = 0
+        processed = 0
+        started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            for chunk in _chunks(read_rows(path), chunk_size):
+                valid = self.validate_chunk(chunk)
+                if valid and not options['dry_run']:
+                    created += self.write_chunk(valid, options['password'], pool)
+                processed += len(chunk)
+                elapsed = time.monotonic() - started
+                rate = processed / elapsed if elapsed else 0
+                self.stdout.write(f"  {processed} rows processed, {created} created ({rate:.0f} rows/s)")
+
+        for line_number, message in self.errors[:50]:
+            self.stderr.write(f"  line {line_number}: {message}")
+        if len(self.errors) > 50:
+            self.stderr.write(f"  ... and {len(self.errors) - 50} more errors")
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        summary = f"Done: {created} members created, {len(self.errors)} rows rejected, {processed} rows in {elapsed:.1f}s ({rate:.0f} rows/s)."
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    # ------------------ Validation ------------------
+
+    def validate_chunk(self, chunk):
+        """Runs the form rules on each row and removes duplicates (within the file and against the DB)."""
+        cleaned_rows = []
+        for line_number, data in chunk:
+            form = MemberImportForm(data=data)
+            if not form.is_valid():
+                errors = "; ".join(f"{field}: {' '.join(msgs)}" for field, msgs in form.errors.items())
+                self.errors.append((line_number, errors))
+                continue
+            cleaned_rows.append((line_number, form.cleaned_data))
+
+        # One query per column for the whole chunk instead of one per row
+        phones = {row['phone_number'] for _, row in cleaned_rows}
+        emails = {row['email'] for _, row in cleaned_rows if row.get('email')}
+        taken_phones = set(Member.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+        taken_phones |= set(User.objects.filter(username__in=phones).values_list('username', flat=True))
+        taken_emails = set()
+        if emails:
+            # Accounts are created with the same email, so an existing login's email clashes too
+            taken_emails = set(Member.objects.filter(email__in=emails).values_list('email', flat=True))
+            taken_emails |= set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        valid = []
+        for line_number, row in cleaned_rows:
+            phone, email = row['phone_number'], row.get('email') or None
+            if phone in taken_phones or phone in self.seen_phones:
+                self.errors.append((line_number, f"phone_number {phone} is already registered"))
+                continue
+            if email and (email in taken_emails or email in self.seen_emails):
+                self.errors.append((line_number, f"email {email} is already registered"))
+                continue
+            self.seen_phones.add(phone)
+            if email:
+                self.seen_emails.add(email)
+            row['email'] = email
+            valid.append(row)
+        return valid
+
+    # ------------------ Writing ------------------
+
+    def write_chunk(self, rows, raw_password, pool):
+        # PBKDF2 is deliberately slow, so spread it across CPU cores
+        hashes = list(pool.map(_hash_password, [raw_password] * len(rows), chunksize=64))
+        year = datetime.now().year
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=row['phone_number'], email=row['email'] or "", password=password_hash)
+                for row, password_hash in zip(rows, hashes)
+            ])
+            # Re-read ids by username so this works on every database backend
+            user_ids = dict(User.objects.filter(
+                username__in=[row['phone_number'] for row in rows]
+            ).values_list('username', 'id'))
+
+            # Reserve membership IDs per region in one counter update each
+            by_region = {}
+            for row in rows:
+                by_region.setdefault(row['address_region'], []).append(row)
+            members = []
+            for region, region_rows in by_region.items():
+                ids = MembershipSequence.allocate_membership_ids(region, year, len(region_rows))
+                for row, membership_id in zip(region_rows, ids):
+                    fields = {k: v for k, v in row.items() if k != 'photo'}
+                    members.append(Member(
+                        membership_id=membership_id,
+                        user_id=user_ids[row['phone_number']],
+                        **fields,
+                    ))
+            Member.objects.bulk_create(members)
+            # bulk_create skips the post_save signal, so update the rollups here
+            record_members_created({field: getattr(m, field) for field in STAT_FIELDS} for m in members)
+            index_members(Member.objects.filter(membership_id__in=[m.membership_id for m in members]))
+        return len(members)
@@ -0,0 +1,71 @@
+import json
+from urllib.parse import urljoin
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from members.loadtest import run_load, session_cookie
+
+# Relative to each target's base URL; the sync (/app/) and async (/app/async/) layouts are the same
+DEFAULT_PATHS = ['', '?format=json', 'dashboard/', 'announcements/', 'export/csv/']
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs concurrent clients against one or more running servers and compares their throughput, e.g. "
+        "--target wsgi=http://127.0.0.1:8000/app/ --target asgi=http://127.0.0.1:8001/app/async/. "
+        "The servers must use this project's database (the session of --user is created here)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='LABEL=BASE_URL')
+        parser.add_argument('--path', action='append', dest='paths', help="Path under each base URL (repeatable)")
+        parser.add_argument('--user', help="Staff username to log in as (default: the first superuser)")
+        parser.add_argument('--concurrency', default='10,50', help="Comma-separated client counts")
+        parser.add_argument('--duration', type=float, default=15, help="Seconds per target and concurrency")
+        parser.add_argument('--read-rate', type=int, default=0,
+                            help="Bytes/s each client reads, to simulate slow mobile clients (0: full speed)")
+        parser.add_argument('--output', help="Also write the results as JSON")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            label, sep, base_url = target.partition('=')
+            if not sep or not base_url.startswith(('http://', 'https://')):
+                raise CommandError(f"--target must look like label=http://host:port/app/, got {target!r}")
+            targets.append((label, base_url if base_url.endswith('/') else base_url + '/'))
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must look like 10,50")
+
+        users = User.objects.filter(username=options['user']) if options['user'] else User.objects.filter(is_superuser=True)
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError("No such user; pass --user with a staff username.")
+        cookies = session_cookie(user)
+        paths = options['paths'] or DEFAULT_PATHS
+
+        results = {}
+        for level in levels:
+            for label, base_url in targets:
+                urls = [urljoin(base_url, path) for path in paths]
+                self.stdout.write(f"{label}: {level} clients for {options['duration']:g}s...")
+                result = run_load(urls, level, options['duration'], cookies, options['read_rate'] or None)
+                results.setdefault(label, []).append(result)
+                self.print_result(label, result)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'options': {key: options[key] for key in ('duration', 'read_rate')},
+                           'paths': paths, 'results': results}, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def print_result(self, label, result):
+        line = (
+            f"  {label:<8}{result['concurrency']:>5} clients {result['requests_per_second']:>8.1f} req/s"
+            f"  p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms"
+        )
+        self.stdout.write(line)
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"  errors: {result['errors']}"))
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from members import id_cards
+from members.models import Member
+
+
+def _init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Pre-renders QR codes (and ID card images) for a region in a process pool, skipping members that are up to date."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', help="Only members of this region (default: all regions)")
+        parser.add_argument('--base-url', help="Site URL encoded in the QR codes (default: current Site domain over https)")
+        parser.add_argument('--qr-only', action='store_true', help="Render QR codes but not the full card images")
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=200, help="Members handed to the pool at a time")
+        parser.add_argument('--force', action='store_true', help="Re-render even if the stored files are current")
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'] or id_cards.default_base_url()
+        with_card = not options['qr_only']
+        members = Member.objects.filter(is_active=True).order_by('id')
+        if options['region']:
+            members = members.filter(address_region=options['region'])
+
+        started = time.monotonic()
+        rendered = skipped = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            chunk = []
+            for member in members.iterator(chunk_size=options['chunk_size']):
+                chunk.append(member)
+                if len(chunk) >= options['chunk_size']:
+                    done, up_to_date = self.render_chunk(chunk, base_url, with_card, pool, options['force'])
+                    rendered, skipped = rendered + done, skipped + up_to_date
+                    chunk = []
+                    self.stdout.write(f"  {rendered} rendered, {skipped} already current")
+            done, up_to_date = self.render_chunk(chunk, base_url, with_card, pool, options['force'])
+            rendered, skipped = rendered + done, skipped + up_to_date
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} members ({skipped} already current) in {elapsed:.1f}s."
+        ))
+
+    def render_chunk(self, members, base_url, with_card, pool, force):
+        jobs = {}
+        for member in members:
+            url = id_cards.member_detail_url(member.pk, base_url)
+            card_data = id_cards.card_data_for(member)
+            qr_current = id_cards.is_current_file(member.qr_code.name, member.pk, id_cards.qr_version(url))
+            card_current = id_cards.is_current_file(
+                member.id_card_image.name, member.pk, id_cards.card_version(card_data, url)
+            )
+            if not force and qr_current and (card_current or not with_card):
+                continue
+            jobs[member.pk] = (member, {
+                'pk': member.pk,
+                'url': url,
+                'card_data': card_data,
+                'with_card': with_card,
+                # Photos are read here (storage I/O) so the workers only do CPU work
+                'photo_bytes': id_cards.read_photo(member) if with_card else None,
+            })
+
+        for pk, qr_png, card_png in pool.map(id_cards.render_member_files, [job for _, job in jobs.values()]):
+            member = jobs[pk][0]
+            id_cards.ensure_qr_code(member, base_url, qr_png=qr_png, force=force)
+            if card_png is not None:
+                id_cards.ensure_id_card_image(member, base_url, card_png=card_png, force=force)
+        return len(jobs), len(members) - len(jobs)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from members.card_printing import run_print_job
+from members.models import CardPrintJob
+
+
+class Command(BaseCommand):
+    help = "Renders ID cards for the given member_list filters into one printable PDF (or ZIP of PNG sheets)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', default='')
+        parser.add_argument('--region', default='')
+        parser.add_argument('--start-date', default='')
+        parser.add_argument('--end-date', default='')
+        parser.add_argument('--format', choices=['pdf', 'png'], default='pdf')
+        parser.add_argument('--base-url', default='', help="Site URL encoded in the QR codes")
+
+    def handle(self, *args, **options):
+        filters = {
+            'query': options['query'],
+            'region': options['region'],
+            'start_date': options['start_date'],
+            'end_date': options['end_date'],
+            'base_url': options['base_url'],
+        }
+        job = CardPrintJob.objects.create(filters=filters, output_format=options['format'])
+        self.stdout.write(f"Print job #{job.pk} started.")
+        run_print_job(job.pk)
+
+        job.refresh_from_db()
+        if job.status != 'done':
+            raise CommandError(f"Print job #{job.pk} failed: {job.error}")
+        self.stdout.write(self.style.SUCCESS(f"{job.processed} cards written to {job.output.name}"))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from members import analytics
+
+
+class Command(BaseCommand):
+    help = "Recomputes the attendance summary tables (MeetingTurnout, MemberParticipation) from Attendance."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = analytics.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} attendance summary rows in {elapsed:.2f}s."))
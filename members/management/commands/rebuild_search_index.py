@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from members.models import Member
+from members.search import index_members
+
+
+class Command(BaseCommand):
+    help = "Builds the member search index (normalized documents + FTS5/pg_trgm) from the Member table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing-only', action='store_true', help="Only index members that have no search document yet")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        members = Member.objects.only('id', 'full_name', 'phone_number', 'membership_id').order_by('id')
+        if options['missing_only']:
+            members = members.filter(search_document__isnull=True)
+
+        started = time.monotonic()
+        indexed = 0
+        chunk = []
+        for member in members.iterator(chunk_size=options['chunk_size']):
+            chunk.append(member)
+            if len(chunk) >= options['chunk_size']:
+                indexed += index_members(chunk)
+                chunk = []
+                self.stdout.write(f"  {indexed} members indexed")
+        indexed += index_members(chunk)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} members in {elapsed:.1f}s."))
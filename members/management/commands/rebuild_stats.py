@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from members import stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the MemberStat rollup tables from scratch (use after raw SQL edits or bulk .update() calls)."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = stats.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} statistics rows in {elapsed:.2f}s."))
@@ -0,0 +1,79 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from members import jobs
+
+# How often a worker looks for jobs left behind by a crashed worker
+STALE_CHECK_INTERVAL = 60
+
+
+def _run(job):
+    try:
+        return jobs.run_job(job)
+    finally:
+        # Each pool thread has its own connection; close it when it's broken or past CONN_MAX_AGE
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (welcome SMS, ID card rendering, stats updates, batch prints)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Jobs run at the same time by this worker")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between polls when idle")
+        parser.add_argument('--task', action='append', dest='tasks', help="Only run this task (can be repeated)")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty instead of waiting")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = max(1, options['concurrency'])
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write(f"Worker {worker_id} started ({concurrency} at a time).")
+
+        counts = {'done': 0, 'queued': 0, 'failed': 0, 'lost': 0}
+        in_flight = set()
+        last_stale_check = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+                    released = jobs.requeue_stale()
+                    if released:
+                        self.stdout.write(f"  released {released} stale jobs")
+                    last_stale_check = time.monotonic()
+
+                claimed = []
+                if not self.stopping and len(in_flight) < concurrency:
+                    claimed = jobs.claim(worker_id, concurrency - len(in_flight), options['tasks'])
+                    for job in claimed:
+                        in_flight.add(pool.submit(_run, job))
+
+                if not in_flight:
+                    if self.stopping or (options['burst'] and not claimed):
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                finished, in_flight = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = future.result()
+                    counts[job.status] += 1
+                    self.stdout.write(f"  {job.task} #{job.pk}: {job.status} (attempt {job.attempts})")
+
+        connection.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker stopped: {counts['done']} done, {counts['queued']} to retry, {counts['failed']} failed, "
+            f"{counts['lost']} handed to another worker."
+        ))
+
+    def stop(self, signum, frame):
+        # Finish what's running, but don't start anything new
+        self.stopping = True
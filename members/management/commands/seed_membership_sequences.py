@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from members.models import Member, MembershipSequence
+
+
+class Command(BaseCommand):
+    help = "Seeds the per-(region, year) membership ID counters from the IDs already in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help="Overwrite existing counters instead of only moving them forward.",
+        )
+
+    def handle(self, *args, **options):
+        # Highest sequence number seen for every (region, year), read in one streaming pass
+        highest = defaultdict(int)
+        rows = Member.objects.exclude(membership_id='').values_list('address_region', 'membership_id')
+        skipped = 0
+        for region, membership_id in rows.iterator(chunk_size=5000):
+            # Format: <REGION_CODE>-<YEAR>-<SEQ>
+            try:
+                _, year, seq = membership_id.rsplit('-', 2)
+                year, seq = int(year), int(seq)
+            except (ValueError, AttributeError):
+                skipped += 1
+                continue
+            if seq > highest[(region, year)]:
+                highest[(region, year)] = seq
+
+        updated = 0
+        with transaction.atomic():
+            for (region, year), seq in highest.items():
+                sequence, _ = MembershipSequence.objects.select_for_update().get_or_create(region=region, year=year)
+                # Never move a counter backwards unless asked to, or new IDs could collide
+                if options['reset'] or seq > sequence.last_value:
+                    sequence.last_value = seq
+                    sequence.save(update_fields=['last_value'])
+                    updated += 1
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {skipped} membership IDs that could not be parsed."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {updated} of {len(highest)} (region, year) counters."
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from members import notifications
+from members.models import Announcement, AnnouncementDispatch
+
+
+class Command(BaseCommand):
+    help = "Sends an announcement to active members by SMS (or resumes an interrupted dispatch)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('announcement_id', nargs='?', type=int)
+        parser.add_argument('--region', default='', help="Only members of this region (default: all regions)")
+        parser.add_argument('--resume', type=int, metavar='DISPATCH_ID', help="Continue an existing dispatch")
+        parser.add_argument('--queue', action='store_true', help="Hand the dispatch to run_worker instead of sending here")
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            dispatch = AnnouncementDispatch.objects.filter(pk=options['resume']).first()
+            if dispatch is None:
+                raise CommandError(f"Dispatch {options['resume']} does not exist.")
+        else:
+            announcement = Announcement.objects.filter(pk=options['announcement_id']).first()
+            if announcement is None:
+                raise CommandError("Give an existing announcement id (or --resume DISPATCH_ID).")
+            if options['queue']:
+                dispatch = notifications.start_dispatch(announcement, options['region'])
+                self.stdout.write(self.style.SUCCESS(f"Dispatch {dispatch.pk} queued."))
+                return
+            dispatch = AnnouncementDispatch.objects.create(announcement=announcement, region=options['region'])
+
+        self.stdout.write(f"Sending dispatch {dispatch.pk}...")
+        notifications.run_dispatch(dispatch.pk)
+        dispatch.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f"Dispatch {dispatch.pk}: {dispatch.sent} sent, {dispatch.failed} failed, of {dispatch.total}."
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_announcement'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='member',
+            name='address_region',
+            field=models.CharField(choices=[('አዲስ አበባ', 'አዲስ አበባ'), ('አማራ', 'አማራ'), ('ኦሮሚያ', 'ኦሮሚያ'), ('ትግራይ', 'ትግራይ'), ('ደቡብ ኢትዮጵያ', 'ደቡብ ኢትዮጵያ'), ('ደቡብ ምዕራብ ኢትዮጵያ', 'ደቡብ ምዕራብ ኢትዮጵያ'), ('ሶማሌ', 'ሶማሌ'), ('ጋምቤላ', 'ጋምቤላ'), ('ሐረር', 'ሐረር'), ('ድሬዳዋ', 'ድሬዳዋ'), ('ቤኒሻንጉል ጉሙዝ', 'ቤኒሻንጉል ጉሙዝ'), ('ሲዳማ', 'ሲዳማ'), ('አፋር', 'አፋር')], max_length=100, verbose_name='ክልል'),
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='education_level',
+            field=models.CharField(blank=True, choices=[('መሰረታዊ ትምህርት', 'መሰረታዊ ትምህርት'), ('ሁለተኛ ደረጃ', 'ሁለተኛ ደረጃ'), ('ዲፕሎማ', 'ዲፕሎማ'), ('ዲግሪ', 'ዲግሪ'), ('ማስተርስ', 'ማስተርስ'), ('ዶክትሬት (PhD)', 'ዶክትሬት (PhD)'), ('ሌላ', 'ሌላ')], max_length=100, null=True, verbose_name='የትምህርት ደረጃ'),
+        ),
+        migrations.CreateModel(
+            name='MembershipSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('አዲስ አበባ', 'አዲስ አበባ'), ('አማራ', 'አማራ'), ('ኦሮሚያ', 'ኦሮሚያ'), ('ትግራይ', 'ትግራይ'), ('ደቡብ ኢትዮጵያ', 'ደቡብ ኢትዮጵያ'), ('ደቡብ ምዕራብ ኢትዮጵያ', 'ደቡብ ምዕራብ ኢትዮጵያ'), ('ሶማሌ', 'ሶማሌ'), ('ጋምቤላ', 'ጋምቤላ'), ('ሐረር', 'ሐረር'), ('ድሬዳዋ', 'ድሬዳዋ'), ('ቤኒሻንጉል ጉሙዝ', 'ቤኒሻንጉል ጉሙዝ'), ('ሲዳማ', 'ሲዳማ'), ('አፋር', 'አፋር')], max_length=100, verbose_name='ክልል')),
+                ('year', models.PositiveIntegerField(verbose_name='ዓመት')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='የመጨረሻ ቁጥር')),
+            ],
+            options={
+                'verbose_name_plural': 'Membership Sequences',
+                'unique_together': {('region', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:13
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import ExtractYear
+
+
+def populate_member_stats(apps, schema_editor):
+    # Initial fill of the rollups; afterwards they are maintained by members/stats.py
+    Member = apps.get_model('members', 'Member')
+    MemberStat = apps.get_model('members', 'MemberStat')
+    active = Member.objects.filter(is_active=True)
+    groupings = [
+        ('total', active.values('address_region', value=F('address_region'))),
+        ('gender', active.values('address_region', value=F('gender'))),
+        ('year', active.values('address_region', value=ExtractYear('join_date'))),
+        ('level', active.values('address_region', value=F('membership_level'))),
+        ('education', active.values('address_region', value=F('education_level'))),
+    ]
+    stats = []
+    for dimension, grouped in groupings:
+        for row in grouped.annotate(count=Count('id')).order_by():
+            value = '' if dimension == 'total' or row['value'] is None else str(row['value'])
+            stats.append(MemberStat(region=row['address_region'], dimension=dimension, value=value, count=row['count']))
+    MemberStat.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_membershipsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=100, verbose_name='ክልል')),
+                ('dimension', models.CharField(choices=[('total', 'ጠቅላላ'), ('gender', 'ጾታ'), ('year', 'የተቀላቀለበት ዓመት'), ('level', 'የአባልነት ደረጃ'), ('education', 'የትምህርት ደረጃ')], max_length=20, verbose_name='መለኪያ')),
+                ('value', models.CharField(blank=True, max_length=100, verbose_name='ዋጋ')),
+                ('count', models.IntegerField(default=0, verbose_name='ብዛት')),
+            ],
+            options={
+                'verbose_name_plural': 'Member Stats',
+                'unique_together': {('region', 'dimension', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_member_stats, migrations.RunPython.noop),
+    ]
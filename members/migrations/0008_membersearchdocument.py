@@ -0,0 +1,45 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_search_index(apps, schema_editor):
+    # The index behind members/search.py depends on the database engine
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS members_search_fts USING fts5(document, tokenize='trigram')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS member_search_document_trgm_idx "
+            "ON members_membersearchdocument USING gin (document gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS members_search_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS member_search_document_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0007_member_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSearchDocument',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='members.member')),
+                ('document', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0008_membersearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='id_card_image',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='member_cards/'),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='qr_code',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='member_qr/'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('members', '0009_member_qr_code_id_card_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardPrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filters', models.JSONField(blank=True, default=dict)),
+                ('output_format', models.CharField(choices=[('pdf', 'PDF'), ('png', 'PNG (ZIP)')], default='pdf', max_length=10)),
+                ('status', models.CharField(choices=[('queued', 'በመጠባበቅ ላይ'), ('running', 'በሂደት ላይ'), ('done', 'ተጠናቋል'), ('failed', 'አልተሳካም')], default='queued', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('output', models.FileField(blank=True, null=True, upload_to='card_prints/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='ያዘዘው')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('members', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnouncementDispatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(blank=True, choices=[('አዲስ አበባ', 'አዲስ አበባ'), ('አማራ', 'አማራ'), ('ኦሮሚያ', 'ኦሮሚያ'), ('ትግራይ', 'ትግራይ'), ('ደቡብ ኢትዮጵያ', 'ደቡብ ኢትዮጵያ'), ('ደቡብ ምዕራብ ኢትዮጵያ', 'ደቡብ ምዕራብ ኢትዮጵያ'), ('ሶማሌ', 'ሶማሌ'), ('ጋምቤላ', 'ጋምቤላ'), ('ሐረር', 'ሐረር'), ('ድሬዳዋ', 'ድሬዳዋ'), ('ቤኒሻንጉል ጉሙዝ', 'ቤኒሻንጉል ጉሙዝ'), ('ሲዳማ', 'ሲዳማ'), ('አፋር', 'አፋር')], max_length=100, verbose_name='ክልል')),
+                ('status', models.CharField(choices=[('queued', 'በመጠባበቅ ላይ'), ('running', 'በሂደት ላይ'), ('done', 'ተጠናቋል'), ('failed', 'አልተሳካም')], default='queued', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dispatches', to='members.announcement', verbose_name='ማስታወቂያ')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='ያዘዘው')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnnouncementDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('provider_id', models.CharField(blank=True, max_length=64)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('dispatch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='members.announcementdispatch')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='members.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dispatch', 'status', 'id'], name='delivery_dispatch_status_idx')],
+                'unique_together': {('dispatch', 'member')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:27
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_announcement_dispatch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='attended_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='የተገኘበት ሰዓት'),
+        ),
+    ]
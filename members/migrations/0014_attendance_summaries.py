@@ -0,0 +1,59 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:29
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def populate_attendance_summaries(apps, schema_editor):
+    # Initial fill; afterwards the tables are maintained by members/analytics.py
+    Attendance = apps.get_model('members', 'Attendance')
+    MeetingTurnout = apps.get_model('members', 'MeetingTurnout')
+    MemberParticipation = apps.get_model('members', 'MemberParticipation')
+    turnout = (
+        Attendance.objects.values('meeting_id', 'member__address_region')
+        .annotate(attendees=Count('id')).order_by()
+    )
+    MeetingTurnout.objects.bulk_create([
+        MeetingTurnout(meeting_id=row['meeting_id'], region=row['member__address_region'], attendees=row['attendees'])
+        for row in turnout
+    ], batch_size=1000)
+    participation = (
+        Attendance.objects.values('member_id')
+        .annotate(attended=Count('id'), last_meeting_date=Max('meeting__meeting_date')).order_by()
+    )
+    MemberParticipation.objects.bulk_create([MemberParticipation(**row) for row in participation], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0013_attendance_scan_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberParticipation',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='participation', serialize=False, to='members.member')),
+                ('attended', models.IntegerField(default=0, verbose_name='የተገኘባቸው ስብሰባዎች')),
+                ('last_meeting_date', models.DateTimeField(blank=True, null=True, verbose_name='የመጨረሻ ስብሰባ')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-attended'], name='participation_attended_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MeetingTurnout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=100, verbose_name='ክልል')),
+                ('attendees', models.IntegerField(default=0, verbose_name='የተገኙ')),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='turnout', to='members.meeting', verbose_name='ስብሰባ')),
+            ],
+            options={
+                'unique_together': {('meeting', 'region')},
+            },
+        ),
+        migrations.RunPython(populate_attendance_summaries, migrations.RunPython.noop),
+    ]
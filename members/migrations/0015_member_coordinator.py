@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0014_attendance_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='coordinator_region',
+            field=models.CharField(blank=True, choices=[('አዲስ አበባ', 'አዲስ አበባ'), ('አማራ', 'አማራ'), ('ኦሮሚያ', 'ኦሮሚያ'), ('ትግራይ', 'ትግራይ'), ('ደቡብ ኢትዮጵያ', 'ደቡብ ኢትዮጵያ'), ('ደቡብ ምዕራብ ኢትዮጵያ', 'ደቡብ ምዕራብ ኢትዮጵያ'), ('ሶማሌ', 'ሶማሌ'), ('ጋምቤላ', 'ጋምቤላ'), ('ሐረር', 'ሐረር'), ('ድሬዳዋ', 'ድሬዳዋ'), ('ቤኒሻንጉል ጉሙዝ', 'ቤኒሻንጉል ጉሙዝ'), ('ሲዳማ', 'ሲዳማ'), ('አፋር', 'አፋር')], max_length=100, null=True, verbose_name='የሚያስተባብሩት ክልል'),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='is_coordinator',
+            field=models.BooleanField(default=False, verbose_name='የክልል አስተባባሪ'),
+        ),
+    ]
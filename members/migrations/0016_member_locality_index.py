@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 01:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0015_member_coordinator'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['address_region', 'address_zone', 'address_woreda'], name='member_active_locality_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0016_member_locality_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['updated_at', 'id'], name='announcement_updated_idx'),
+        ),
+    ]
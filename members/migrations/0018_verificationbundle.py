@@ -0,0 +1,28 @@
+# Generated by Django 4.2.24 on 2026-10-18 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0017_announcement_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('digest', models.CharField(max_length=64)),
+                ('output', models.FileField(blank=True, null=True, upload_to='verification_bundles/')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0019_delivery_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='photo_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
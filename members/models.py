@@ -1,7 +1,12 @@
-from django.db import models
+import re
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 from datetime import datetime
 
+from .images import content_digest, process_uploaded_photo
+
 # =========================================================================
 # 1. MEMBER MODEL
 # =========================================================================
@@ -34,6 +39,41 @@ EDUCATION_CHOICES = [
     ('ሌላ', 'ሌላ'),
 ]
 
+# Region -> short code used as the prefix of every membership ID
+REGION_CODE_MAP = {
+    'አማራ': 'AMH',
+    'ኦሮሚያ': 'ORO',
+    'ትግራይ': 'TIG',
+    'አዲስ አበባ': 'AA',
+    'ድሬዳዋ': 'DD',
+    'ደቡብ ኢትዮጵያ': 'SOET',
+    'ደቡብ ምዕራብ ኢትዮጵያ': 'SWET',
+    'ሐረር': 'HAR',
+    'አፋር': 'AFR',
+    'ሶማሌ': 'SOM',
+    'ጋምቤላ': 'GAM',
+    'ቤኒሻንጉል ጉሙዝ': 'BEN',
+    'ሲዳማ': 'SID',
+}
+
+
+# A membership ID as format_membership_id writes it: (region code, year, sequence number)
+MEMBERSHIP_ID_RE = re.compile(r'^([A-Z]{2,5})-(\d{4})-(\d+)$')
+
+
+def format_membership_id(region_code, year, seq_num):
+    return f"{region_code}-{year}-{seq_num:04d}"
+
+
+class MemberQuerySet(models.QuerySet):
+    def for_scope(self, scope):
+        """Limits the queryset to what a staff user may see (a MemberScope, see members/scoping.py)."""
+        return scope.filter(self)
+
+    def matching(self, filters):
+        """Applies validated list filters (a MemberFilters, see members/filters.py)."""
+        return filters.filter(self)
+
 
 class Member(models.Model):
     # --- Basic Information ---
@@ -41,6 +81,8 @@ class Member(models.Model):
     gender = models.CharField(max_length=10, choices=[('Male', 'ወንድ'), ('Female', 'ሴት')], verbose_name="ጾታ")
     date_of_birth = models.DateField(verbose_name="የትውልድ ቀን")
     photo = models.ImageField(upload_to='member_photos/', null=True, blank=True, verbose_name="ፎቶግራፍ")
+    # SHA-256 of the stored photo's bytes, so a re-upload is compared without reading the file back
+    photo_digest = models.CharField(max_length=64, blank=True, editable=False)
 
     # --- Contact Information ---
     phone_number = models.CharField(max_length=20, unique=True, verbose_name="ስልክ ቁጥር")
@@ -59,6 +101,11 @@ class Member(models.Model):
     membership_level = models.CharField(max_length=50, choices=[('Full', 'ሙሉ አባል'), ('Supporter', 'ደጋፊ')], verbose_name="የአባልነት ደረጃ")
     party_role = models.CharField(max_length=100, blank=True, null=True, verbose_name="በፓርቲ ውስጥ ያለ ኃላፊነት")
     join_date = models.DateField(auto_now_add=True, verbose_name="የተቀላቀለበት ቀን")
+    # Staff users in the regional coordinator group only see the members of coordinator_region
+    is_coordinator = models.BooleanField(default=False, verbose_name="የክልል አስተባባሪ")
+    coordinator_region = models.CharField(
+        max_length=100, blank=True, null=True, choices=REGION_CHOICES, verbose_name="የሚያስተባብሩት ክልል",
+    )
 
     # --- Other Information ---
     education_level = models.CharField(
@@ -70,94 +117,74 @@ class Member(models.Model):
     )
     profession = models.CharField(max_length=100, blank=True, null=True, verbose_name="የስራ መስክ")
 
+    # --- Generated Files (see members/id_cards.py) ---
+    # File names carry a version hash, so a stale file is detected without opening it
+    qr_code = models.ImageField(upload_to='member_qr/', null=True, blank=True, editable=False)
+    id_card_image = models.ImageField(upload_to='member_cards/', null=True, blank=True, editable=False)
+
     # --- System Fields ---
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True, verbose_name="የአባልነት ሁኔታ (Active)")
 
+    objects = MemberQuerySet.as_manager()
+
+    class Meta:
+        # Matched to the hot queries. Lists and the dashboard only ever show active members,
+        # so most indexes are partial (WHERE is_active) and skip deactivated rows entirely.
+        indexes = [
+            # member_list / export, national scope: ORDER BY full_name, id (keyset pagination)
+            models.Index(fields=['full_name', 'id'], condition=models.Q(is_active=True), name='member_active_name_idx'),
+            # member_list / export for one region (coordinators, ?region=)
+            models.Index(fields=['address_region', 'full_name', 'id'], condition=models.Q(is_active=True), name='member_active_region_name_idx'),
+            # dashboard "recent members": ORDER BY join_date DESC LIMIT 5
+            models.Index(fields=['-join_date'], condition=models.Q(is_active=True), name='member_active_joined_idx'),
+            # zone / woreda filters, always given with their region
+            models.Index(fields=['address_region', 'address_zone', 'address_woreda'], condition=models.Q(is_active=True), name='member_active_locality_idx'),
+            # join-date range filters within a region
+            models.Index(fields=['address_region', 'join_date'], name='member_region_joined_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
 
     def save(self, *args, **kwargs):
-        # Check if this is a new object being created (has no pk yet)
-        if not self.pk:
+        # --- 0. Normalize a newly uploaded photo (EXIF rotation, size cap, WebP/JPEG) ---
+        # (skipped when members.writes.save_profile already did it to compare with the stored photo)
+        if self.photo and not self.photo._committed:
+            if not getattr(self.photo.file, 'normalized', False):
+                processed = process_uploaded_photo(self.photo)
+                if processed is not None:
+                    self.photo = processed
+            self.photo_digest = content_digest(self.photo.file)
+        elif not self.photo:
+            self.photo_digest = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'photo' in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'photo_digest']
+
+        # Check if this is a new object being created (has no pk yet).
+        # Bulk imports pre-allocate IDs, so only generate one if it is still empty.
+        if not self.pk and not self.membership_id:
             # --- 1. Generate Membership ID FIRST ---
             current_year = datetime.now().year
             
-            # --- FIX: Removed .upper() to match Amharic keys and ensured all keys are correct ---
-            region = self.address_region
-            region_code_map = {
-                'አማራ': 'AMH',
-                'ኦሮሚያ': 'ORO',
-                'ትግራይ': 'TIG',
-                'አዲስ አበባ': 'AA',
-                'ድሬዳዋ': 'DD',
-                'ደቡብ ኢትዮጵያ': 'SOET',
-                'ደቡብ ምዕራብ ኢትዮጵያ': 'SWET',
-                'ሐረር': 'HAR',
-                'አፋር': 'AFR',
-                'ሶማሌ': 'SOM',
-                'ጋምቤላ': 'GAM',
-                # --- FIX: Corrected spelling to match REGION_CHOICES ---
-                'ቤኒሻንጉል ጉሙዝ': 'BEN', 
-                'ሲዳማ': 'SID',
-            }
             # Use .get() for safe retrieval, defaulting to 'OTH'
-            region_code = region_code_map.get(region, 'OTH')
-            
-            # Find the highest existing number for this region and year
-            last_member = Member.objects.filter(
-                address_region=self.address_region, 
-                join_date__year=current_year
-            ).order_by('pk').last()
-            
-            new_seq_num = 1
-            if last_member and last_member.membership_id:
-                try:
-                    # Extract the sequence number part (the last component after the last hyphen)
-                    last_seq_num = int(last_member.membership_id.split('-')[-1])
-                    new_seq_num = last_seq_num + 1
-                except (ValueError, IndexError):
-                    # If parsing fails, fall back to starting sequence number 1
-                    pass
-            
-            self.membership_id = f"{region_code}-{current_year}-{new_seq_num:04d}"
+            region_code = REGION_CODE_MAP.get(self.address_region, 'OTH')
+
+            # Reserve the next number from the per-(region, year) counter.
+            # This is a single locked row, so it costs the same no matter how many members exist
+            # and two registrations at the same moment can never get the same number.
+            new_seq_num = MembershipSequence.reserve(self.address_region, current_year)
+
+            self.membership_id = format_membership_id(region_code, current_year, new_seq_num)
 
         # --- 2. Call the original save method NOW ---
         # Now that the membership_id is set (for new members) or unchanged (for updates), we save.
         super().save(*args, **kwargs)
+        # The login account is created by members.provisioning.provision_member, not here
 
-        # --- 3. Create and Link User AFTER the member is saved ---
-        # This part only runs if it's a new member (not self.pk means it was new before the super().save()) 
-        # OR if the user was somehow unlinked (not self.user).
-        # We need to ensure we don't try to link a user on every update, but only when a user is missing.
-        if not self.user:
-            username = self.phone_number
-            if not User.objects.filter(username=username).exists():
-                # print(f"Attempting to create user '{username}' for new member.") # Removed print for clean code
-                password = "password123" # WARNING: Change this in production code!
-                try:
-                    user = User.objects.create_user(
-                        username=username,
-                        password=password,
-                        email=self.email if self.email else ""
-                    )
-                    self.user = user
-                    # Save again just to update the user link
-                    super().save(update_fields=['user'])
-                    # print(f"Successfully created and linked user '{username}'.") # Removed print for clean code
-                except Exception as e:
-                    # print(f"CRITICAL ERROR during user creation in model: {e}") # Removed print for clean code
-                    pass # Silently fail or log in a real application
-            else:
-                # print(f"User '{username}' already exists. Linking.") # Removed print for clean code
-                try:
-                    self.user = User.objects.get(username=username)
-                    super().save(update_fields=['user'])
-                except User.DoesNotExist:
-                    print(f"User '{username}' was supposed to exist but not found. Something is wrong.") # Removed print for clean code
-                    
 # =========================================================================
 # 2. MEETING MODEL
 # =========================================================================
@@ -181,11 +208,16 @@ class Meeting(models.Model):
 class Attendance(models.Model):
     member = models.ForeignKey(Member, on_delete=models.CASCADE, verbose_name="አባል")
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, verbose_name="ስብሰባ")
-    attended_at = models.DateTimeField(auto_now_add=True, verbose_name="የተገኘበት ሰዓት")
+    # A default rather than auto_now_add, so check-ins synced later by a door device keep their scan time
+    attended_at = models.DateTimeField(default=timezone.now, verbose_name="የተገኘበት ሰዓት")
 
     class Meta:
         unique_together = ('member', 'meeting') # Ensure a member can't be marked as attendee twice for the same meeting
         verbose_name_plural = "Attendances" # Better plural name in the admin
+        # The unique index above starts with member; attendance is usually looked up by meeting
+        indexes = [
+            models.Index(fields=['meeting', 'member'], name='attendance_meeting_member_idx'),
+        ]
 
     def __str__(self):
         return f"{self.member.full_name} attended {self.meeting.title}"
@@ -205,3 +237,270 @@ class Announcement(models.Model):
     
     class Meta: # <-- FIX: Added Meta class for ordering
         ordering = ['-created_at'] # Show the newest announcements first
+        indexes = [
+            # Feed freshness: MAX(updated_at) for ETags and the ?since= cursor of the JSON feed
+            models.Index(fields=['updated_at', 'id'], name='announcement_updated_idx'),
+        ]
+
+# =========================================================================
+# 5. MEMBERSHIP ID SEQUENCE MODEL
+# =========================================================================
+
+class MembershipSequence(models.Model):
+    """One counter row per (region, year). Holds the last sequence number handed out."""
+    region = models.CharField(max_length=100, choices=REGION_CHOICES, verbose_name="ክልል")
+    year = models.PositiveIntegerField(verbose_name="ዓመት")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="የመጨረሻ ቁጥር")
+
+    class Meta:
+        unique_together = ('region', 'year')
+        verbose_name_plural = "Membership Sequences"
+
+    def __str__(self):
+        return f"{self.region} {self.year}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, region, year, count=1):
+        """
+        Atomically reserves `count` consecutive sequence numbers for (region, year).
+        Returns the first reserved number; the block is first .. first + count - 1.
+        The counter row is locked (SELECT ... FOR UPDATE) until the surrounding transaction ends.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(region=region, year=year)
+            first = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return first
+
+    @classmethod
+    def allocate_membership_ids(cls, region, year, count):
+        """Bulk version for imports: returns `count` ready-made membership IDs in one reservation."""
+        region_code = REGION_CODE_MAP.get(region, 'OTH')
+        first = cls.reserve(region, year, count)
+        return [format_membership_id(region_code, year, seq) for seq in range(first, first + count)]
+
+# =========================================================================
+# 6. MEMBER STATISTICS ROLLUP MODEL
+# =========================================================================
+
+STAT_DIMENSION_CHOICES = [
+    ('total', 'ጠቅላላ'),
+    ('gender', 'ጾታ'),
+    ('year', 'የተቀላቀለበት ዓመት'),
+    ('level', 'የአባልነት ደረጃ'),
+    ('education', 'የትምህርት ደረጃ'),
+]
+
+
+class MemberStat(models.Model):
+    """
+    Pre-aggregated count of ACTIVE members for one (region, dimension, value).
+    e.g. ('አማራ', 'gender', 'Female') -> 1520. National figures are the sum over regions.
+    Kept current by members/stats.py; rebuild with `manage.py rebuild_stats`.
+    """
+    region = models.CharField(max_length=100, verbose_name="ክልል")
+    dimension = models.CharField(max_length=20, choices=STAT_DIMENSION_CHOICES, verbose_name="መለኪያ")
+    value = models.CharField(max_length=100, blank=True, verbose_name="ዋጋ")
+    count = models.IntegerField(default=0, verbose_name="ብዛት")
+
+    class Meta:
+        unique_together = ('region', 'dimension', 'value')
+        verbose_name_plural = "Member Stats"
+
+    def __str__(self):
+        return f"{self.region} / {self.dimension}={self.value}: {self.count}"
+
+# =========================================================================
+# 7. MEMBER SEARCH DOCUMENT MODEL
+# =========================================================================
+
+class MemberSearchDocument(models.Model):
+    """
+    Normalized, search-ready text for one member (name, phone digits, compact membership ID).
+    Written by members/search.py; the active search backend indexes it (FTS5 / pg_trgm).
+    """
+    member = models.OneToOneField(Member, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    document = models.TextField()
+
+    def __str__(self):
+        return self.document
+
+# =========================================================================
+# 8. ID CARD PRINT JOB MODEL
+# =========================================================================
+
+class CardPrintJob(models.Model):
+    """A batch of ID cards rendered into one printable file (see members/card_printing.py)."""
+    STATUS_CHOICES = [
+        ('queued', 'በመጠባበቅ ላይ'),
+        ('running', 'በሂደት ላይ'),
+        ('done', 'ተጠናቋል'),
+        ('failed', 'አልተሳካም'),
+    ]
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('png', 'PNG (ZIP)'),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="ያዘዘው")
+    # Same parameters as member_list: query, region, start_date, end_date (+ the coordinator's scope)
+    filters = models.JSONField(default=dict, blank=True)
+    output_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='pdf')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    output = models.FileField(upload_to='card_prints/', null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Card print #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def progress_percent(self):
+        return int(self.processed * 100 / self.total) if self.total else 0
+
+# =========================================================================
+# 9. BACKGROUND JOB MODEL
+# =========================================================================
+
+class Job(models.Model):
+    """A unit of deferred work, run by `manage.py run_worker` (see members/jobs.py)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's polling query: WHERE status='queued' AND run_after <= now ORDER BY run_after
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+# =========================================================================
+# 10. ANNOUNCEMENT SMS DISPATCH MODELS
+# =========================================================================
+
+class AnnouncementDispatch(models.Model):
+    """One SMS send-out of an announcement to all active members (or one region)."""
+    STATUS_CHOICES = [
+        ('queued', 'በመጠባበቅ ላይ'),
+        ('running', 'በሂደት ላይ'),
+        ('done', 'ተጠናቋል'),
+        ('failed', 'አልተሳካም'),
+    ]
+
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='dispatches', verbose_name="ማስታወቂያ")
+    region = models.CharField(max_length=100, blank=True, choices=REGION_CHOICES, verbose_name="ክልል")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="ያዘዘው")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.announcement} → {self.region or 'ሁሉም'} ({self.get_status_display()})"
+
+
+class AnnouncementDelivery(models.Model):
+    """Delivery status of one dispatch to one member; the rows left 'pending' are what a resumed dispatch still sends."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),  # claimed by one run of the dispatch (claimed_by), not yet recorded
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    dispatch = models.ForeignKey(AnnouncementDispatch, on_delete=models.CASCADE, related_name='deliveries')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    phone_number = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    provider_id = models.CharField(max_length=64, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('dispatch', 'member')
+        indexes = [
+            # The sender's batch query: WHERE dispatch_id = ? AND status = 'pending' ORDER BY id
+            models.Index(fields=['dispatch', 'status', 'id'], name='delivery_dispatch_status_idx'),
+        ]
+
+# =========================================================================
+# 11. ATTENDANCE SUMMARY MODELS
+# =========================================================================
+
+class MeetingTurnout(models.Model):
+    """Attendees of one meeting from one region, kept up to date by members/analytics.py."""
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='turnout', verbose_name="ስብሰባ")
+    region = models.CharField(max_length=100, verbose_name="ክልል")
+    attendees = models.IntegerField(default=0, verbose_name="የተገኙ")
+
+    class Meta:
+        unique_together = ('meeting', 'region')
+
+
+class MemberParticipation(models.Model):
+    """How many meetings a member attended, kept up to date by members/analytics.py."""
+    member = models.OneToOneField(Member, on_delete=models.CASCADE, primary_key=True, related_name='participation')
+    attended = models.IntegerField(default=0, verbose_name="የተገኘባቸው ስብሰባዎች")
+    last_meeting_date = models.DateTimeField(null=True, blank=True, verbose_name="የመጨረሻ ስብሰባ")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-attended'], name='participation_attended_idx'),
+        ]
+
+# =========================================================================
+# 12. OFFLINE VERIFICATION BUNDLE MODEL
+# =========================================================================
+
+class VerificationBundle(models.Model):
+    """One version of the signed active-membership-ID snapshot for door devices (see members/bundles.py)."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    members = models.PositiveIntegerField(default=0)
+    # Active IDs that don't fit the compact encoding (devices must check those online)
+    skipped = models.PositiveIntegerField(default=0)
+    size = models.PositiveIntegerField(default=0)
+    # SHA-256 of the encoded sections, so an unchanged membership doesn't get a new version
+    digest = models.CharField(max_length=64)
+    output = models.FileField(upload_to='verification_bundles/', null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Verification bundle v{self.pk} ({self.members} IDs)"
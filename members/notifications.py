@@ -0,0 +1,219 @@
+# ===================================================================
+#               members/notifications.py
+#       Announcement SMS fan-out: batched, rate limited, resumable
+# ===================================================================
+
+import asyncio
+import logging
+import time
+import uuid
+
+import aiohttp
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .jobs import STALE_AFTER, JobLost, current_lease, enqueue, heartbeat
+from .models import AnnouncementDelivery, AnnouncementDispatch, Member
+from .sms import SMS_REQUEST_TIMEOUT, SMSDeliveryError, get_async_sms_sender
+
+logger = logging.getLogger(__name__)
+
+RECIPIENT_CHUNK_SIZE = 2000  # recipients read and inserted per query
+SEND_BATCH_SIZE = 200  # deliveries sent between two status writes
+MAX_DELIVERY_ATTEMPTS = 3
+# Ge'ez text is sent as UCS-2 (70 characters per segment); keep announcements to a few segments
+SMS_MAX_LENGTH = 300
+
+
+def sms_rate():
+    """Messages per second across the whole dispatch (Twilio queues anything above the account's limit)."""
+    return float(getattr(settings, 'SMS_RATE_PER_SECOND', 10))
+
+
+def sms_concurrency():
+    return int(getattr(settings, 'SMS_MAX_CONCURRENCY', 10))
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second with bursts of up to `capacity`.
+    Each caller reserves its token up front and sleeps until it is due, so there is
+    no lock and the bucket can be shared by the tasks of any event loop.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+def announcement_text(announcement):
+    text = f"{announcement.title}\n{announcement.content}".strip()
+    if len(text) > SMS_MAX_LENGTH:
+        text = text[:SMS_MAX_LENGTH - 1].rstrip() + '…'
+    return text
+
+
+def start_dispatch(announcement, region='', user=None):
+    """Creates a dispatch and hands it to the job worker."""
+    dispatch = AnnouncementDispatch.objects.create(announcement=announcement, region=region, created_by=user)
+    enqueue('dispatch_announcement', {'dispatch_id': dispatch.pk})
+    return dispatch
+
+
+# ------------------ Recipients ------------------
+
+def add_recipients(dispatch):
+    """
+    Writes a pending delivery row for every recipient, streaming (id, phone) pairs in
+    chunks. Continues after the highest member already added, so a resumed dispatch
+    only reads the members it hadn't reached.
+    """
+    members = Member.objects.filter(is_active=True).exclude(phone_number='')
+    if dispatch.region:
+        members = members.filter(address_region=dispatch.region)
+    last_member_id = dispatch.deliveries.aggregate(last=Max('member_id'))['last'] or 0
+    recipients = members.filter(pk__gt=last_member_id).order_by('pk').values_list('pk', 'phone_number')
+
+    chunk = []
+    for member_id, phone_number in recipients.iterator(chunk_size=RECIPIENT_CHUNK_SIZE):
+        chunk.append(AnnouncementDelivery(dispatch=dispatch, member_id=member_id, phone_number=phone_number))
+        if len(chunk) >= RECIPIENT_CHUNK_SIZE:
+            AnnouncementDelivery.objects.bulk_create(chunk, ignore_conflicts=True)
+            chunk = []
+    AnnouncementDelivery.objects.bulk_create(chunk, ignore_conflicts=True)
+    return dispatch.deliveries.count()
+
+
+# ------------------ Claiming ------------------
+
+def claim_deliveries(dispatch, lease, size):
+    """
+    Flips the next `size` pending deliveries to 'sending' for this run (`lease`) and
+    returns them. Rows another transaction has locked are skipped (SKIP LOCKED on
+    PostgreSQL), and the UPDATE only takes rows still pending, so no two runs ever
+    send the same delivery.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = dispatch.deliveries.filter(status='pending').order_by('pk').select_for_update(skip_locked=True)
+        ids = list(pending.values_list('pk', flat=True)[:size])
+        AnnouncementDelivery.objects.filter(pk__in=ids, status='pending').update(
+            status='sending', claimed_by=lease, claimed_at=now,
+        )
+    return list(dispatch.deliveries.filter(status='sending', claimed_by=lease).order_by('pk'))
+
+
+def release_deliveries(dispatch, lease=None):
+    """
+    Puts 'sending' rows back to pending: this run's own (`lease`), or, without one,
+    those of runs that stopped while sending. Such a run lost its job lease at least
+    STALE_AFTER ago, so a row claimed more recently belongs to a run still recording it.
+    """
+    claimed = dispatch.deliveries.filter(status='sending')
+    if lease:
+        claimed = claimed.filter(claimed_by=lease)
+    else:
+        claimed = claimed.filter(claimed_at__lt=timezone.now() - STALE_AFTER)
+    return claimed.update(status='pending', claimed_by='', claimed_at=None)
+
+
+# ------------------ Sending ------------------
+
+async def send_batch(deliveries, body, bucket, concurrency):
+    """
+    Sends one SMS per delivery, at most `concurrency` requests in flight and no faster
+    than the bucket allows. Returns {delivery id: (provider id, error, permanent)}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=SMS_REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        sender = get_async_sms_sender(session)
+
+        async def send_one(delivery):
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    return delivery.pk, (await sender.send(delivery.phone_number, body), '', False)
+                except SMSDeliveryError as exc:
+                    return delivery.pk, (None, str(exc), exc.permanent)
+
+        return dict(await asyncio.gather(*(send_one(delivery) for delivery in deliveries)))
+
+
+def record_results(dispatch, deliveries, results):
+    """Writes the batch's outcome with one bulk UPDATE plus one counter update."""
+    now = timezone.now()
+    sent = failed = retrying = 0
+    for delivery in deliveries:
+        provider_id, error, permanent = results[delivery.pk]
+        delivery.attempts += 1
+        if provider_id is not None:
+            delivery.status, delivery.provider_id, delivery.error, delivery.sent_at = 'sent', provider_id, '', now
+            sent += 1
+        elif permanent or delivery.attempts >= MAX_DELIVERY_ATTEMPTS:
+            delivery.status, delivery.error = 'failed', error[:255]
+            failed += 1
+        else:
+            # Back to pending; picked up again by the next batch
+            delivery.status, delivery.error, delivery.claimed_by = 'pending', error[:255], ''
+            retrying += 1
+    AnnouncementDelivery.objects.bulk_update(
+        deliveries, ['status', 'attempts', 'provider_id', 'error', 'sent_at', 'claimed_by'], batch_size=SEND_BATCH_SIZE,
+    )
+    AnnouncementDispatch.objects.filter(pk=dispatch.pk).update(sent=F('sent') + sent, failed=F('failed') + failed)
+    return retrying
+
+
+def run_dispatch(dispatch_id):
+    """
+    Sends a dispatch until no delivery is pending. Safe to call again after a crash:
+    delivered rows are skipped, so at most the one batch in flight is sent twice.
+    Run as a job, it renews the job's lease before every batch and stops (JobLost)
+    once the job has been handed to another worker.
+    """
+    dispatch = AnnouncementDispatch.objects.select_related('announcement').get(pk=dispatch_id)
+    lease = current_lease() or uuid.uuid4().hex
+    AnnouncementDispatch.objects.filter(pk=dispatch.pk).update(status='running', error='')
+    try:
+        total = add_recipients(dispatch)
+        AnnouncementDispatch.objects.filter(pk=dispatch.pk).update(total=total)
+        release_deliveries(dispatch)
+
+        body = announcement_text(dispatch.announcement)
+        bucket = TokenBucket(sms_rate())
+        retry_round = 0
+        while True:
+            heartbeat()
+            deliveries = claim_deliveries(dispatch, lease, SEND_BATCH_SIZE)
+            if not deliveries:
+                break
+            results = asyncio.run(send_batch(deliveries, body, bucket, sms_concurrency()))
+            if record_results(dispatch, deliveries, results):
+                # Provider trouble (429/5xx/timeouts): back off before the retried rows come round again
+                retry_round += 1
+                time.sleep(min(2 ** retry_round, 30))
+            else:
+                retry_round = 0
+    except JobLost:
+        release_deliveries(dispatch, lease)
+        raise
+    except Exception as exc:
+        release_deliveries(dispatch, lease)
+        logger.exception("Announcement dispatch %s failed", dispatch.pk)
+        AnnouncementDispatch.objects.filter(pk=dispatch.pk).update(
+            status='failed', error=str(exc), finished_at=timezone.now(),
+        )
+        raise
+    AnnouncementDispatch.objects.filter(pk=dispatch.pk).update(status='done', finished_at=timezone.now())
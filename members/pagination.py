@@ -0,0 +1,82 @@
+# ===================================================================
+#               members/pagination.py
+#       Keyset (cursor) pagination helpers for large member lists
+# ===================================================================
+
+import base64
+import json
+
+from django.db.models import Q
+
+# ------------------ Page size limits ------------------
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Return a sane page size from a query-string value, capped at `maximum`."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    if size < 1:
+        return default
+    return min(size, maximum)
+
+
+def encode_cursor(full_name, pk):
+    """Pack the (full_name, id) position of a row into an opaque URL-safe token."""
+    raw = json.dumps([full_name, pk], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a cursor token. Returns (full_name, id) or None if the token is invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        full_name, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return str(full_name), int(pk)
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
+def _seek(queryset, cursor, page_size):
+    queryset = queryset.order_by('full_name', 'id')
+    position = decode_cursor(cursor)
+    if position:
+        last_name, last_pk = position
+        queryset = queryset.filter(
+            Q(full_name__gt=last_name) | Q(full_name=last_name, id__gt=last_pk)
+        )
+    # Fetch one extra row so we know whether another page exists
+    return queryset[:page_size + 1]
+
+
+def _page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last['full_name'], last['id'])
+        else:
+            next_cursor = encode_cursor(last.full_name, last.id)
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns one page of `queryset` ordered by (full_name, id), starting after `cursor`.
+
+    Instead of OFFSET (which gets slower the deeper you page), we seek straight to
+    the last row of the previous page, so every page costs the same.
+    Returns a tuple: (rows, next_cursor). next_cursor is None on the last page.
+    """
+    return _page(list(_seek(queryset, cursor, page_size)), page_size)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """keyset_page for async views (async ORM)."""
+    return _page([row async for row in _seek(queryset, cursor, page_size)], page_size)
@@ -0,0 +1,59 @@
+# ===================================================================
+#               members/provisioning.py
+#       New member + login account, created together in one transaction
+# ===================================================================
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .jobs import enqueue
+from .models import Member
+
+DEFAULT_PASSWORD = "password123"  # Shown once on the registration success page
+
+
+class MemberAlreadyExists(Exception):
+    """A member or login with this phone number is already registered."""
+
+
+def provision_member(member, password=DEFAULT_PASSWORD, base_url=None):
+    """
+    Saves a new (unsaved) Member together with its User, in one transaction:
+    the user INSERT, the membership ID reservation, the member INSERT (with its stats
+    and search index updates) and the follow-up jobs either all happen or none do.
+
+    There is no "does this user exist?" SELECT up front: the unique usernames/phone
+    numbers are the check. Only once an INSERT fails is the phone number looked up:
+    if it is taken, MemberAlreadyExists is raised with nothing left behind; any other
+    IntegrityError (e.g. a duplicate email) is raised as is.
+    `base_url` (e.g. request.build_absolute_uri('/')) enables ID card pre-rendering.
+    """
+    user = User(username=member.phone_number, email=member.email or '')
+    # Hashing is deliberately slow; do it before the transaction opens
+    user.set_password(password)
+    generated_id = not member.membership_id
+    try:
+        with transaction.atomic():
+            user.save()
+            member.user = user
+            member.save()
+            enqueue('send_welcome_sms', {'member_id': member.pk})
+            if base_url:
+                enqueue('prerender_id_card', {'member_id': member.pk, 'base_url': base_url})
+    except IntegrityError as exc:
+        # The rollback undid the inserts and the ID reservation; make the instance reusable again
+        member.pk = member.user = None
+        if generated_id:
+            member.membership_id = ''
+        if phone_taken(member.phone_number):
+            raise MemberAlreadyExists(member.phone_number) from exc
+        raise
+    return member
+
+
+def phone_taken(phone_number):
+    """Whether a login or a member already uses this phone number."""
+    return (
+        User.objects.filter(username=phone_number).exists()
+        or Member.objects.filter(phone_number=phone_number).exists()
+    )
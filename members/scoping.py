@@ -0,0 +1,136 @@
+# ===================================================================
+#               members/scoping.py
+#       Which members a staff user may see, resolved once per session
+# ===================================================================
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import current_generation, invalidate
+from .models import Member
+
+COORDINATOR_GROUP = 'የክልል አስተባባሪ'
+
+SCOPE_PREFIX = 'member-scope'
+SESSION_KEY = '_member_scope'
+# Seconds a session keeps its resolved scope. The generation check only sees invalidations made
+# through this process's cache when that cache isn't shared (locmem), so the copy also expires.
+SESSION_SCOPE_TTL = getattr(settings, 'MEMBER_SCOPE_SESSION_TTL', 300)
+
+# Member fields that decide a coordinator's scope
+SCOPE_FIELDS = ('user', 'is_coordinator', 'coordinator_region')
+
+
+class MemberScope:
+    """
+    Everyone (region None), one region's members, or nobody (empty: a coordinator
+    without a coordinator profile). Applied with Member.objects.for_scope(scope).
+    """
+
+    __slots__ = ('region', 'empty')
+
+    def __init__(self, region=None, empty=False):
+        self.region = region
+        self.empty = empty
+
+    def __eq__(self, other):
+        return isinstance(other, MemberScope) and (self.region, self.empty) == (other.region, other.empty)
+
+    def __repr__(self):
+        return f'<MemberScope region={self.region!r} empty={self.empty}>'
+
+    def filter(self, queryset):
+        if self.empty:
+            return queryset.none()
+        if self.region:
+            return queryset.filter(address_region=self.region)
+        return queryset
+
+
+def scope_for_user(user):
+    """The uncached lookup: up to two queries (group membership, then the coordinator profile)."""
+    if user.is_superuser or not user.groups.filter(name=COORDINATOR_GROUP).exists():
+        return MemberScope()
+    profile = list(Member.objects.filter(user=user, is_coordinator=True).values_list('coordinator_region', flat=True)[:1])
+    if not profile:
+        return MemberScope(empty=True)
+    return MemberScope(region=profile[0] or None)
+
+
+def member_scope(request):
+    """
+    request.user's scope, resolved at most once per request and kept in the session
+    between requests. The session copy carries the user's scope generation, which
+    invalidate_member_scope() bumps, so a stale copy is recomputed on the next request;
+    either way it is recomputed once it is older than SESSION_SCOPE_TTL.
+    """
+    scope = getattr(request, '_member_scope', None)
+    if scope is not None:
+        return scope
+    user = request.user
+    generation = current_generation(SCOPE_PREFIX, str(user.pk))
+    stored = request.session.get(SESSION_KEY)
+    now = time.time()
+    if (stored and stored['user'] == user.pk and stored['generation'] == generation
+            and now - stored.get('resolved', 0) < SESSION_SCOPE_TTL):
+        scope = MemberScope(region=stored['region'], empty=stored['empty'])
+    else:
+        scope = scope_for_user(user)
+        request.session[SESSION_KEY] = {
+            'user': user.pk, 'generation': generation, 'region': scope.region, 'empty': scope.empty,
+            'resolved': now,
+        }
+    request._member_scope = scope
+    return scope
+
+
+def invalidate_member_scope(*user_ids):
+    for user_id in set(user_ids):
+        if user_id is not None:
+            invalidate(SCOPE_PREFIX, str(user_id))
+
+
+# ------------------ Signal receivers (connected in MembersConfig.ready) ------------------
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_member_scope(instance.pk)
+    elif action == 'pre_clear':
+        # group.user_set.clear(): pk_set is only known before the rows are gone
+        invalidate_member_scope(*instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        invalidate_member_scope(*pk_set)
+
+
+@receiver(post_save, sender=User)
+def invalidate_on_user_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Every login saves last_login; only a superuser flag change matters here
+    if not raw and (update_fields is None or 'is_superuser' in update_fields):
+        invalidate_member_scope(instance.pk)
+
+
+@receiver(pre_save, sender=Member)
+def remember_previous_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    # A profile moved to another login changes that login's scope too
+    instance._scope_user_before = None
+    if not raw and instance.pk and (update_fields is None or 'user' in update_fields):
+        instance._scope_user_before = Member.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Member)
+def invalidate_on_member_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not any(field in SCOPE_FIELDS for field in update_fields)):
+        return
+    invalidate_member_scope(instance.user_id, getattr(instance, '_scope_user_before', None))
+
+
+@receiver(post_delete, sender=Member)
+def invalidate_on_member_delete(sender, instance, **kwargs):
+    invalidate_member_scope(instance.user_id)
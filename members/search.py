@@ -0,0 +1,229 @@
+# ===================================================================
+#               members/search.py
+#       Pluggable member search (SQLite FTS5 locally, pg_trgm in production)
+# ===================================================================
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Member, MemberSearchDocument
+
+FTS_TABLE = 'members_search_fts'
+
+# ------------------ Text normalization ------------------
+
+# Ge'ez letters that sound the same and are used interchangeably when people type names
+# (ሀ/ሐ/ኀ, ሰ/ሠ, አ/ዐ, ጸ/ፀ). Each family is 7 consecutive code points (one per vowel order),
+# so we map every order of the variant family onto the same order of the canonical one.
+_GEEZ_FAMILIES = {
+    0x1210: 0x1200,  # ሐ -> ሀ
+    0x1280: 0x1200,  # ኀ -> ሀ
+    0x1220: 0x1230,  # ሠ -> ሰ
+    0x12D0: 0x12A0,  # ዐ -> አ
+    0x1340: 0x1338,  # ፀ -> ጸ
+}
+_GEEZ_FOLD = {
+    variant + order: canonical + order
+    for variant, canonical in _GEEZ_FAMILIES.items()
+    for order in range(7)
+}
+
+_SEPARATORS = re.compile(r"[\s\-_.,;:/\\'\"()\[\]፡።፣፤፥፦]+")
+_MEMBERSHIP_ID = re.compile(r'^[A-Za-z]+-\d')
+
+
+def normalize_text(text):
+    """Lower-cases, folds Ge'ez homophones and turns punctuation into single spaces."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', str(text)).lower().translate(_GEEZ_FOLD)
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def normalize_phone(phone):
+    """'+251 911-22 33 44' -> '0911223344' (digits only, local format)."""
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('251') and len(digits) == 12:
+        digits = '0' + digits[3:]
+    return digits
+
+
+def compact_membership_id(membership_id):
+    """'AMH-2025-0012' -> 'amh20250012', so prefixes like 'AMH-2025' match as one term."""
+    return re.sub(r'[^0-9a-z]', '', (membership_id or '').lower())
+
+
+def build_document(full_name, phone_number, membership_id):
+    return ' '.join(filter(None, [
+        normalize_text(full_name),
+        normalize_phone(phone_number),
+        compact_membership_id(membership_id),
+    ]))
+
+
+def query_terms(query):
+    """Splits a user query into normalized terms, using the same rules as build_document."""
+    terms = []
+    for raw in (query or '').split():
+        if _MEMBERSHIP_ID.match(raw):
+            terms.append(compact_membership_id(raw))
+        elif raw.lstrip('+').replace('-', '').isdigit():
+            terms.append(normalize_phone(raw))
+        else:
+            terms.extend(normalize_text(raw).split())
+    return [term for term in terms if term]
+
+
+# ------------------ Backends ------------------
+
+class LikeSearchBackend:
+    """Portable fallback: substring match on the normalized document (no special index)."""
+
+    def index(self, documents):
+        pass
+
+    def remove(self, member_ids):
+        pass
+
+    def filter(self, queryset, query):
+        for term in query_terms(query):
+            queryset = queryset.filter(search_document__document__contains=term)
+        return queryset
+
+    def ranked(self, queryset, query):
+        return self.filter(queryset, query).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by('full_name', 'id')
+
+
+class SQLiteFTSBackend(LikeSearchBackend):
+    """
+    SQLite FTS5 with the trigram tokenizer: substring matching that works for Ge'ez text
+    (no word stemming needed) and for partial phone numbers, ranked with bm25().
+    """
+
+    def index(self, documents):
+        rows = [(member_id, document) for member_id, document in documents]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(member_id,) for member_id, _ in rows])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, document) VALUES (%s, %s)', rows)
+
+    def remove(self, member_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in member_ids])
+
+    def _match_expression(self, query):
+        terms = query_terms(query)
+        # Trigram FTS needs at least 3 characters per term
+        if not terms or any(len(term) < 3 for term in terms):
+            return None
+        return ' AND '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+    def filter(self, queryset, query):
+        match = self._match_expression(query)
+        if match is None:
+            return super().filter(queryset, query)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+
+    def ranked(self, queryset, query):
+        match = self._match_expression(query)
+        if match is None:
+            return super().ranked(queryset, query)
+        rank = RawSQL(
+            f'(SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = members_member.id)',
+            [match], output_field=FloatField(),
+        )
+        # bm25() is negative; the smaller the value, the better the match
+        return self.filter(queryset, query).annotate(search_rank=rank).order_by('search_rank', 'id')
+
+
+class PostgresTrigramBackend(LikeSearchBackend):
+    """
+    PostgreSQL pg_trgm: the GIN (gin_trgm_ops) index on the document serves the
+    LIKE '%term%' filters, and word_similarity() orders the results.
+    """
+
+    def ranked(self, queryset, query):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        normalized = ' '.join(query_terms(query))
+        return self.filter(queryset, query).annotate(
+            search_rank=TrigramWordSimilarity(normalized, 'search_document__document')
+        ).order_by('-search_rank', 'id')
+
+
+BACKENDS = {
+    'fts5': SQLiteFTSBackend,
+    'trigram': PostgresTrigramBackend,
+    'like': LikeSearchBackend,
+}
+
+
+def get_backend():
+    name = getattr(settings, 'MEMBER_SEARCH_BACKEND', None)
+    if name is None:
+        name = {'sqlite': 'fts5', 'postgresql': 'trigram'}.get(connection.vendor, 'like')
+    return BACKENDS[name]()
+
+
+# ------------------ Public API ------------------
+
+def search_members(queryset, query):
+    """Restricts a Member queryset to the members matching `query` (keeps its ordering)."""
+    if not query or not query.strip():
+        return queryset
+    return get_backend().filter(queryset, query)
+
+
+def ranked_search(queryset, query, limit=20):
+    """Best matches first, for search-as-you-type."""
+    if not query or not query.strip():
+        return queryset.none()
+    return get_backend().ranked(queryset, query)[:limit]
+
+
+def index_members(members):
+    """(Re)builds the search documents for an iterable of Member instances."""
+    documents = [
+        MemberSearchDocument(member_id=m.pk, document=build_document(m.full_name, m.phone_number, m.membership_id))
+        for m in members
+    ]
+    if not documents:
+        return 0
+    MemberSearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['member'], update_fields=['document'],
+    )
+    get_backend().index((d.member_id, d.document) for d in documents)
+    return len(documents)
+
+
+# ------------------ Signal receivers (connected in MembersConfig.ready) ------------------
+
+SEARCH_FIELDS = ('full_name', 'phone_number', 'membership_id')
+
+
+@receiver(post_save, sender=Member)
+def index_member_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not any(field in SEARCH_FIELDS for field in update_fields):
+        return
+    index_members([instance])
+
+
+@receiver(post_delete, sender=Member)
+def remove_member_from_index(sender, instance, **kwargs):
+    # The MemberSearchDocument row goes with the CASCADE; only the FTS table needs cleaning
+    get_backend().remove([instance.pk])
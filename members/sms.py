@@ -0,0 +1,126 @@
+# ===================================================================
+#               members/sms.py
+#       SMS senders: Twilio in production, console/fake for dev and tests
+# ===================================================================
+
+import asyncio
+import logging
+from collections import namedtuple
+
+import aiohttp
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .search import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+SMSMessage = namedtuple('SMSMessage', ['to', 'body'])
+
+# settings.TWILIO_API_BASE overrides it, so tests (and staging) can use a local stub server
+TWILIO_API_BASE = 'https://api.twilio.com'
+SMS_REQUEST_TIMEOUT = 15  # seconds
+
+
+class SMSDeliveryError(Exception):
+    """`permanent` errors (bad number, unsubscribed) are not worth retrying."""
+
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def international_number(phone):
+    """'0911 22 33 44' -> '+251911223344' (Twilio wants E.164)."""
+    digits = normalize_phone(phone)
+    if digits.startswith('0'):
+        return '+251' + digits[1:]
+    return '+' + digits
+
+
+class ConsoleSMSSender:
+    """Development default: logs the message instead of sending it."""
+
+    def send(self, to, body):
+        logger.info("SMS to %s: %s", to, body)
+        return 'console'  # a provider id, so the fan-out records the message as sent
+
+
+class FakeSMSSender:
+    """For tests: keeps every message in FakeSMSSender.outbox (like Django's locmem email backend)."""
+    outbox = []
+
+    def send(self, to, body):
+        self.outbox.append(SMSMessage(to, body))
+        return f'fake-{len(self.outbox)}'
+
+
+class TwilioSMSSender:
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(self, to, body):
+        message = self.client.messages.create(
+            to=international_number(to), from_=settings.TWILIO_PHONE_NUMBER, body=body,
+        )
+        return message.sid
+
+
+def get_sms_sender():
+    """
+    settings.SMS_BACKEND (a dotted path) wins; otherwise Twilio when its credentials
+    are configured, and the console sender when they aren't.
+    """
+    path = getattr(settings, 'SMS_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if getattr(settings, 'TWILIO_ACCOUNT_SID', None) and getattr(settings, 'TWILIO_AUTH_TOKEN', None):
+        return TwilioSMSSender()
+    return ConsoleSMSSender()
+
+
+# ------------------ Async senders (announcement fan-out, see members/notifications.py) ------------------
+
+class AsyncTwilioSender:
+    """Calls Twilio's REST API directly over a shared aiohttp session (the twilio client blocks)."""
+
+    def __init__(self, session):
+        self.session = session
+        api_base = getattr(settings, 'TWILIO_API_BASE', None) or TWILIO_API_BASE
+        self.url = f"{api_base.rstrip('/')}/2010-04-01/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json"
+        self.auth = aiohttp.BasicAuth(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    async def send(self, to, body):
+        data = {'To': international_number(to), 'From': settings.TWILIO_PHONE_NUMBER, 'Body': body}
+        try:
+            async with self.session.post(self.url, data=data, auth=self.auth) as response:
+                payload = await response.json(content_type=None)
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            raise SMSDeliveryError(f"{type(exc).__name__}: {exc}") from exc
+        if status in (200, 201):
+            return payload.get('sid', '')
+        message = (payload or {}).get('message') or f"HTTP {status}"
+        # 4xx means the request itself is wrong (e.g. invalid number); 429 and 5xx are worth another try
+        raise SMSDeliveryError(message, permanent=400 <= status < 500 and status != 429)
+
+
+class AsyncSenderAdapter:
+    """Runs a blocking sender (console, fake, custom SMS_BACKEND) in a thread."""
+
+    def __init__(self, sender):
+        self.sender = sender
+
+    async def send(self, to, body):
+        return await asyncio.to_thread(self.sender.send, to, body)
+
+
+def get_async_sms_sender(session):
+    """Async counterpart of get_sms_sender(), chosen by the same rules."""
+    if getattr(settings, 'SMS_BACKEND', None):
+        return AsyncSenderAdapter(get_sms_sender())
+    if getattr(settings, 'TWILIO_ACCOUNT_SID', None) and getattr(settings, 'TWILIO_AUTH_TOKEN', None):
+        return AsyncTwilioSender(session)
+    return AsyncSenderAdapter(ConsoleSMSSender())
@@ -0,0 +1,159 @@
+# ===================================================================
+#               members/stats.py
+#       Incrementally maintained member statistics (rollup tables)
+# ===================================================================
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_dashboard
+from .jobs import enqueue
+from .models import Member, MemberStat
+
+# Member fields that affect the rollups. Saves that touch none of them are ignored.
+STAT_FIELDS = ('is_active', 'address_region', 'gender', 'join_date', 'membership_level', 'education_level')
+
+
+def stat_keys(values):
+    """
+    Returns the (region, dimension, value) rollup rows a member counts towards.
+    `values` is a dict of STAT_FIELDS. Inactive members count towards nothing.
+    """
+    if not values or not values['is_active']:
+        return []
+    region = values['address_region']
+    join_date = values['join_date']
+    return [
+        (region, 'total', ''),
+        (region, 'gender', values['gender'] or ''),
+        (region, 'year', str(join_date.year) if join_date else ''),
+        (region, 'level', values['membership_level'] or ''),
+        (region, 'education', values['education_level'] or ''),
+    ]
+
+
+def _snapshot(member):
+    return {field: getattr(member, field) for field in STAT_FIELDS}
+
+
+def apply_deltas(deltas):
+    """Adds each delta to its rollup row with an atomic UPDATE ... SET count = count + n."""
+    touched_regions = set()
+    for (region, dimension, value), delta in deltas.items():
+        if not delta:
+            continue
+        touched_regions.add(region)
+        rows = MemberStat.objects.filter(region=region, dimension=dimension, value=value)
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            # First member for this key; a concurrent insert falls back to the UPDATE
+            with transaction.atomic():
+                MemberStat.objects.create(region=region, dimension=dimension, value=value, count=delta)
+        except IntegrityError:
+            rows.update(count=F('count') + delta)
+    if touched_regions:
+        invalidate_dashboard(*touched_regions)
+
+
+def record_members_created(rows):
+    """For bulk inserts that bypass signals: `rows` is an iterable of dicts of STAT_FIELDS."""
+    deltas = Counter()
+    for values in rows:
+        deltas.update(stat_keys(values))
+    apply_deltas(deltas)
+
+
+# ------------------ Signal receivers (connected in MembersConfig.ready) ------------------
+
+def _apply_or_defer(deltas):
+    # With MEMBER_STATS_DEFERRED the hot rollup rows are updated by the job worker instead of the request
+    if getattr(settings, 'MEMBER_STATS_DEFERRED', False):
+        changed = [[*key, delta] for key, delta in deltas.items() if delta]
+        if changed:
+            enqueue('apply_stat_deltas', {'deltas': changed})
+    else:
+        apply_deltas(deltas)
+
+
+def _touches_stats(update_fields):
+    return update_fields is None or any(field in STAT_FIELDS for field in update_fields)
+
+
+@receiver(pre_save, sender=Member)
+def remember_previous_stats(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches_stats(update_fields):
+        instance._stats_before = None
+        return
+    previous = None
+    if instance.pk:
+        previous = Member.objects.filter(pk=instance.pk).values(*STAT_FIELDS).first()
+    instance._stats_before = previous if previous is not None else {}
+
+
+@receiver(post_save, sender=Member)
+def update_stats_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    before = getattr(instance, '_stats_before', None)
+    if raw or before is None:
+        return
+    deltas = Counter(stat_keys(_snapshot(instance)))
+    deltas.subtract(stat_keys(before))
+    instance._stats_before = None
+    _apply_or_defer(deltas)
+
+
+@receiver(post_delete, sender=Member)
+def update_stats_on_delete(sender, instance, **kwargs):
+    deltas = Counter()
+    deltas.subtract(stat_keys(_snapshot(instance)))
+    _apply_or_defer(deltas)
+
+
+# ------------------ Full recompute ------------------
+
+def rebuild():
+    """Recomputes every rollup row from the Member table. Returns the number of rows written."""
+    active = Member.objects.filter(is_active=True)
+    groupings = [
+        ('total', active.values('address_region', value=F('address_region'))),
+        ('gender', active.values('address_region', value=F('gender'))),
+        ('year', active.values('address_region', value=ExtractYear('join_date'))),
+        ('level', active.values('address_region', value=F('membership_level'))),
+        ('education', active.values('address_region', value=F('education_level'))),
+    ]
+    stats = []
+    for dimension, grouped in groupings:
+        for row in grouped.annotate(count=Count('id')).order_by():
+            value = '' if dimension == 'total' or row['value'] is None else str(row['value'])
+            stats.append(MemberStat(region=row['address_region'], dimension=dimension, value=value, count=row['count']))
+    with transaction.atomic():
+        MemberStat.objects.all().delete()
+        MemberStat.objects.bulk_create(stats, batch_size=1000)
+    invalidate_dashboard(*{stat.region for stat in stats})
+    return len(stats)
+
+
+# ------------------ Reading ------------------
+
+def member_stats(region=None):
+    """
+    Returns {dimension: {value: count}} for the whole country, or for one region.
+    A single indexed query over a small table, independent of the number of members.
+    """
+    rows = MemberStat.objects.filter(count__gt=0)
+    if region:
+        rows = rows.filter(region=region)
+    result = defaultdict(Counter)
+    by_region = Counter()
+    for row_region, dimension, value, count in rows.values_list('region', 'dimension', 'value', 'count'):
+        result[dimension][value] += count
+        if dimension == 'total':
+            by_region[row_region] += count
+    result['region'] = by_region
+    return result
@@ -0,0 +1,60 @@
+# ===================================================================
+#               members/tasks.py
+#       Background job handlers (queued with members.jobs.enqueue)
+# ===================================================================
+
+from collections import Counter
+
+from .card_printing import abandon_print_job, run_print_job
+from .id_cards import PARTY_NAME, ensure_id_card_image, ensure_qr_code
+from .jobs import task
+from .models import Member
+from .notifications import run_dispatch
+from .sms import get_sms_sender
+from .stats import apply_deltas
+
+
+def welcome_message(member):
+    return (
+        f"እንኳን ወደ {PARTY_NAME} በደህና መጡ! "
+        f"የአባልነት መለያ ቁጥርዎ: {member.membership_id}። "
+        f"የተጠቃሚ ስምዎ: {member.phone_number}"
+    )
+
+
+# At most a few SMS requests at once, so a registration burst stays under the provider's rate limit
+@task('send_welcome_sms', max_attempts=5, concurrency=4)
+def send_welcome_sms(member_id):
+    member = Member.objects.filter(pk=member_id).first()
+    if member is None or not member.phone_number:
+        return
+    get_sms_sender().send(member.phone_number, welcome_message(member))
+
+
+# Image rendering is CPU bound; more than a couple at once only slows the web processes down
+@task('prerender_id_card', max_attempts=3, concurrency=2)
+def prerender_id_card(member_id, base_url):
+    member = Member.objects.filter(pk=member_id).first()
+    if member is None:
+        return
+    ensure_qr_code(member, base_url)
+    ensure_id_card_image(member, base_url)
+
+
+@task('apply_stat_deltas', max_attempts=10)
+def apply_stat_deltas(deltas):
+    """`deltas` is a list of [region, dimension, value, delta] (JSON has no tuple keys)."""
+    apply_deltas(Counter({(region, dimension, value): delta for region, dimension, value, delta in deltas}))
+
+
+# run_print_job records its own failure on the CardPrintJob, so a retry would only repeat it;
+# if the worker dies instead, the stale job is failed and abandon_print_job fails the print
+@task('print_id_cards', max_attempts=1, concurrency=1, on_give_up=abandon_print_job)
+def print_id_cards(job_id):
+    run_print_job(job_id)
+
+
+# Resumable: a retry (or a crashed worker's job handed out again) continues where the dispatch stopped
+@task('dispatch_announcement', max_attempts=3, concurrency=1)
+def dispatch_announcement(dispatch_id):
+    run_dispatch(dispatch_id)
@@ -0,0 +1,18 @@
+from django import template
+from django.urls import reverse
+
+from members.images import photo_version
+
+register = template.Library()
+
+
+@register.filter
+def photo_url(member, variant='detail'):
+    """
+    URL of a resized, cacheable variant of the member's photo ('list', 'id_card' or 'detail').
+    Usage: {% load member_photos %} <img src="{{ member|photo_url:'detail' }}">
+    """
+    if not member.photo:
+        return ''
+    url = reverse('member_photo', args=[member.pk, variant])
+    return f'{url}?v={photo_version(member.photo.name)}'
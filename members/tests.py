@@ -1,3 +1,1639 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import (
+    Client, LiveServerTestCase, RequestFactory, TestCase, TransactionTestCase, modify_settings, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+from PIL import Image
+
+from . import analytics, bundles, jobs, notifications, scoping, stats
+from . import cache as member_cache
+from .admin import AnnouncementAdmin
+from .benchmarks import compare
+from .card_printing import run_print_job
+from .checkin import record_checkins
+from .exports import EXPORT_COLUMNS, gzip_stream, stream_csv
+from .filters import MemberFilters
+from .writes import save_profile
+from .search import normalize_phone, normalize_text, query_terms, ranked_search, search_members
+from .forms import MemberUpdateForm
+from .images import ensure_variant
+from .id_cards import ensure_id_card_image, ensure_qr_code, qr_version
+from .instrumentation import RollingHistogram, registry as request_metrics
+from .provisioning import MemberAlreadyExists, provision_member
+from .scoping import COORDINATOR_GROUP, MemberScope, SESSION_KEY
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_page_size
+from .models import (
+    Announcement, AnnouncementDispatch, Attendance, CardPrintJob, Job, Meeting, MeetingTurnout, Member, MemberParticipation,
+    MemberStat, MembershipSequence, VerificationBundle,
+)
+from .sms import FakeSMSSender
+from .verification import MAX_VERIFY_BATCH, check_signature, local_lookups
+from .views import MEMBER_LIST_COLUMNS
+
+
+def make_member(index, region='አማራ', save=True, **extra):
+    fields = {
+        'full_name': f'አባል {index:03d}',
+        'gender': 'Male' if index % 2 else 'Female',
+        'date_of_birth': date(1990, 1, 1),
+        'phone_number': f'09{index:08d}',
+        'address_region': region,
+        'address_zone': 'ዞን',
+        'address_woreda': 'ወረዳ',
+        'address_kebele': '01',
+        'membership_level': 'Full',
+    }
+    fields.update(extra)
+    return Member.objects.create(**fields) if save else Member(**fields)
+
+
+# =========================================================================
+# Member list (keyset pagination)
+# =========================================================================
+
+class MemberListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('lister', 'lister@example.com', 'pw')
+        for i in range(1, 8):
+            make_member(i)
+        # Same name as member 3: the cursor has to break the tie on id
+        make_member(8, full_name='አባል 003')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_cursor_and_page_size_parsing(self):
+        self.assertEqual(decode_cursor(encode_cursor('ሙሉ ስም', 42)), ('ሙሉ ስም', 42))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertIsNone(decode_cursor(''))
+        self.assertEqual(parse_page_size('1000'), MAX_PAGE_SIZE)
+        self.assertEqual(parse_page_size('-3'), DEFAULT_PAGE_SIZE)
+        self.assertEqual(parse_page_size('x'), DEFAULT_PAGE_SIZE)
+
+    def test_json_pages_cover_every_member_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'format': 'json', 'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            body = self.client.get(reverse('member_list'), params).json()
+            self.assertEqual(body['columns'], list(MEMBER_LIST_COLUMNS))
+            self.assertEqual(body['count'], 8)
+            self.assertLessEqual(len(body['results']), 3)
+            seen += [row[0] for row in body['results']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Member.objects.order_by('full_name', 'id').values_list('id', flat=True)))
+
+    def test_html_page_links_the_next_cursor(self):
+        response = self.client.get(reverse('member_list'), {'page_size': 5})
+        self.assertEqual(len(response.context['members']), 5)
+        self.assertIn('cursor=', response.context['next_page_query'])
+        self.assertIn('page_size=5', response.context['next_page_query'])
+
+
+# =========================================================================
+# Streaming exports
+# =========================================================================
+
+class MemberExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('exporter', 'exporter@example.com', 'pw')
+        for i in range(1, 6):
+            make_member(i, region='አማራ' if i % 2 else 'ሲዳማ')
+        make_member(6, is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_csv_is_streamed_with_bom_and_header(self):
+        response = self.client.get(reverse('export_members_csv'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.startswith('\ufeff'))
+        lines = body.lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[0], ','.join(header for _, header in EXPORT_COLUMNS))
+        self.assertEqual(len(lines), 6)  # header + the five active members
+        self.assertIn('ወንድ', body)  # gender labels, not the stored values
+
+    def test_ndjson_gzip_and_filters(self):
+        response = self.client.get(reverse('export_members_csv'), {'export': 'ndjson', 'gzip': '1', 'region': 'ሲዳማ'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('members_report.ndjson.gz', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(b''.join(response.streaming_content)).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['address_region'] for row in rows}, {'ሲዳማ'})
+        self.assertEqual(list(rows[0]), [field for field, _ in EXPORT_COLUMNS])
+
+    def test_batches_are_flushed_as_they_are_produced(self):
+        rows = ([f'name {i}', f'ID-{i}', '', 'ወንድ', 'አማራ', '2025-01-01'] for i in range(5))
+        chunks = list(gzip_stream(stream_csv(rows, batch_size=2)))
+        # header, three batches and the gzip trailer, each decodable on arrival
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(gzip.decompress(b''.join(chunks)).decode('utf-8').count('\n'), 6)
+
+
+# =========================================================================
+# Membership ID allocation
+# =========================================================================
+
+class MembershipSequenceTests(TransactionTestCase):
+
+    def test_ids_follow_the_region_year_counter(self):
+        year = timezone.now().year
+        first, second = make_member(1), make_member(2)
+        other = make_member(3, region='ኦሮሚያ')
+        self.assertEqual((first.membership_id, second.membership_id), (f'AMH-{year}-0001', f'AMH-{year}-0002'))
+        self.assertEqual(other.membership_id, f'ORO-{year}-0001')
+        self.assertEqual(MembershipSequence.allocate_membership_ids('አማራ', year, 2), [f'AMH-{year}-0003', f'AMH-{year}-0004'])
+        with self.assertRaises(ValueError):
+            MembershipSequence.reserve('አማራ', year, 0)
+
+    # SQLite's shared in-memory test database reports "table is locked" instead of waiting
+    @skipUnless(connection.features.has_select_for_update, "Needs row locks (SELECT ... FOR UPDATE)")
+    def test_concurrent_reservations_never_overlap(self):
+        results, errors = [], []
+
+        def reserve():
+            try:
+                for _ in range(10):
+                    results.append(MembershipSequence.reserve('አማራ', 2025, 3))
+            except Exception as exc:  # surfaced below instead of dying with the thread
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reserve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), list(range(1, 120, 3)))
+        self.assertEqual(MembershipSequence.objects.get(region='አማራ', year=2025).last_value, 120)
+
+
+# =========================================================================
+# Bulk import (manage.py import_members)
+# =========================================================================
+
+IMPORT_HEADER = [
+    'full_name', 'gender', 'date_of_birth', 'phone_number', 'email', 'address_region',
+    'address_zone', 'address_woreda', 'address_kebele', 'membership_level',
+]
+
+
+def import_row(index, **changes):
+    row = {
+        'full_name': f'ገቢ {index}', 'gender': 'Female', 'date_of_birth': '1995-05-05',
+        'phone_number': f'0933{index:06d}', 'email': '', 'address_region': 'አማራ',
+        'address_zone': 'ዞን', 'address_woreda': 'ወረዳ', 'address_kebele': '02', 'membership_level': 'Supporter',
+    }
+    row.update(changes)
+    return [row[field] for field in IMPORT_HEADER]
+
+
+class ImportMembersTests(TestCase):
+
+    def run_import(self, rows, suffix='.csv', **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, f'members{suffix}')
+        if suffix == '.csv':
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                handle.write('\n'.join(','.join(row) for row in [IMPORT_HEADER, *rows]) + '\n')
+        else:
+            workbook = Workbook()
+            for row in [IMPORT_HEADER, *rows]:
+                workbook.active.append(row)
+            workbook.save(path)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_members', path, workers=1, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_valid_rows_are_written_in_chunks_and_bad_rows_reported(self):
+        existing = make_member(1, email='taken@example.com')
+        User.objects.create_user('someone', email='login@example.com')
+        rows = [
+            import_row(1),                                   # line 2
+            import_row(2, email='new@example.com'),          # line 3
+            import_row(3, gender='Other'),                   # line 4: invalid choice
+            import_row(4, phone_number='0933000001'),        # line 5: same phone as line 2
+            import_row(5, phone_number=existing.phone_number),  # line 6: already a member
+            import_row(6, email='login@example.com'),        # line 7: email of an existing login
+            import_row(7, email='taken@example.com'),        # line 8: email of an existing member
+            import_row(8),                                   # line 9
+        ]
+        out, err = self.run_import(rows, chunk_size=3)
+        self.assertIn('3 rows processed', out)
+        self.assertIn('6 rows processed', out)
+        self.assertIn('Done: 3 members created, 5 rows rejected', out)
+        for line in (4, 5, 6, 7, 8):
+            self.assertIn(f'line {line}:', err)
+        self.assertIn('gender', err)
+
+        imported = Member.objects.exclude(pk=existing.pk).order_by('membership_id')
+        self.assertEqual([member.full_name for member in imported], ['ገቢ 1', 'ገቢ 2', 'ገቢ 8'])
+        self.assertEqual(len({member.membership_id for member in imported}), 3)
+        for member in imported:
+            self.assertEqual(member.user.username, member.phone_number)
+        self.assertEqual(MemberStat.objects.get(dimension='total', value='').count, 4)
+
+    def test_dry_run_and_xlsx(self):
+        out, err = self.run_import([import_row(1), import_row(2)], suffix='.xlsx', dry_run=True)
+        self.assertIn('Done: 0 members created, 0 rows rejected', out)
+        self.assertFalse(Member.objects.exists())
+        self.run_import([import_row(1), import_row(2)], suffix='.xlsx')
+        self.assertEqual(Member.objects.count(), 2)
+
+
+# =========================================================================
+# Statistics rollups
+# =========================================================================
+
+class MemberStatTests(TestCase):
+
+    def rollups(self):
+        return set(MemberStat.objects.filter(count__gt=0).values_list('region', 'dimension', 'value', 'count'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollups()
+        stats.rebuild()
+        self.assertEqual(maintained, self.rollups())
+
+    def test_rollups_follow_saves_and_deletes(self):
+        members = [make_member(i, region='አማራ' if i % 2 else 'ትግራይ') for i in range(1, 7)]
+        self.assertEqual(stats.member_stats()['total'][''], 6)
+        self.assertEqual(stats.member_stats('ትግራይ')['gender'], {'Female': 3})
+        self.assertMatchesRebuild()
+
+        moved = members[0]
+        moved.address_region = 'ትግራይ'
+        moved.membership_level = 'Supporter'
+        moved.save()
+        self.assertEqual(stats.member_stats()['region'], {'አማራ': 2, 'ትግራይ': 4})
+        self.assertEqual(stats.member_stats('ትግራይ')['level'], {'Full': 3, 'Supporter': 1})
+        self.assertMatchesRebuild()
+
+        members[1].is_active = False
+        members[1].save(update_fields=['is_active'])
+        members[2].delete()
+        self.assertEqual(stats.member_stats()['total'][''], 4)
+        self.assertMatchesRebuild()
+
+    def test_saves_of_other_fields_leave_rollups_alone(self):
+        member = make_member(1)
+        with CaptureQueriesContext(connection) as queries:
+            member.profession = 'ገበሬ'
+            member.save(update_fields=['profession'])
+        self.assertFalse([query for query in queries if 'members_memberstat' in query['sql']])
+
+
+# =========================================================================
+# Dashboard cache (generations and the stampede lock)
+# =========================================================================
+
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self, value='payload'):
+        self.builds.append(value)
+        return value
+
+    def test_generations_scope_invalidation(self):
+        get = member_cache.get_dashboard_payload
+        self.assertEqual(get('አማራ', self.build), 'payload')
+        get('አማራ', self.build)
+        get(member_cache.NATIONAL_SCOPE, self.build)
+        get('ትግራይ', self.build)
+        self.assertEqual(len(self.builds), 3)
+
+        # A change in one region drops that region and the national figures, not the others,
+        # once it is committed (a rebuild before that would cache the old rows as new)
+        with self.captureOnCommitCallbacks() as callbacks:
+            make_member(1)
+            get('አማራ', self.build)
+            self.assertEqual(len(self.builds), 3)
+        for callback in callbacks:
+            callback()
+        get('አማራ', self.build)
+        get(member_cache.NATIONAL_SCOPE, self.build)
+        get('ትግራይ', self.build)
+        self.assertEqual(len(self.builds), 5)
+
+        # Saves that don't touch dashboard fields keep the cache
+        member = Member.objects.get()
+        member.profession = 'ነጋዴ'
+        with self.captureOnCommitCallbacks(execute=True):
+            member.save(update_fields=['profession'])
+        get('አማራ', self.build)
+        self.assertEqual(len(self.builds), 5)
+
+    def test_profile_edits_drop_filtered_counts(self):
+        member = make_member(1)
+        count = lambda: Member.objects.filter(address_zone='ZZZ').count()
+        self.assertEqual(member_cache.get_member_count('አማራ', 'zone=ZZZ', count), 0)
+
+        initial = MemberUpdateForm(instance=member).initial
+        data = {name: value for name, value in initial.items() if name != 'photo' and value is not None}
+        form = MemberUpdateForm({**data, 'date_of_birth': '1990-01-01', 'address_zone': 'ZZZ'}, instance=member)
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(save_profile(form), ['address_zone'])
+        self.assertEqual(member_cache.get_member_count('አማራ', 'zone=ZZZ', count), 1)
+
+    def test_waiters_use_the_lock_holders_result(self):
+        key = f"dashboard:all:{member_cache.current_generation('dashboard', None)}"
+        cache.add(key + ':lock', 1, 30)  # another process is rebuilding
+        timer = threading.Timer(0.2, cache.set, args=(key, 'from the holder', 60))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(member_cache.get_dashboard_payload(None, self.build), 'from the holder')
+        self.assertEqual(self.builds, [])
+
+    def test_waiters_build_themselves_when_the_holder_is_too_slow(self):
+        key = f"dashboard:all:{member_cache.current_generation('dashboard', None)}"
+        cache.add(key + ':lock', 1, 30)
+        with mock.patch.object(member_cache, 'STAMPEDE_WAIT', 0.1):
+            self.assertEqual(member_cache.get_dashboard_payload(None, self.build), 'payload')
+        self.assertEqual(self.builds, ['payload'])
+
+
+# =========================================================================
+# Index usage (EXPLAIN QUERY PLAN on SQLite)
+# =========================================================================
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class IndexUsageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        for i in range(30):
+            make_member(i, region='አማራ' if i % 3 else 'ሲዳማ', is_active=bool(i % 5))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def explain(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def member_queries(self, url):
+        """Returns the SELECTs a view runs against the member table."""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in captured.captured_queries
+                if q['sql'].startswith('SELECT') and 'FROM "members_member"' in q['sql']]
+
+    def assertUsesIndex(self, sql, index_name):
+        plan = self.explain(sql)
+        self.assertIn(index_name, plan, f"{index_name} not used.\nSQL: {sql}\nPlan: {plan}")
+
+    def page_queries(self, url):
+        # The (cached) total count may scan any of the partial indexes on active members
+        return [sql for sql in self.member_queries(url) if not sql.startswith('SELECT COUNT(*)')]
+
+    def test_member_list_uses_active_name_index(self):
+        queries = self.page_queries(reverse('member_list'))
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertUsesIndex(sql, 'member_active_name_idx')
+
+    def test_member_list_json_uses_active_name_index(self):
+        for sql in self.page_queries(reverse('member_list') + '?format=json&page_size=5'):
+            self.assertUsesIndex(sql, 'member_active_name_idx')
+
+    def test_regional_list_uses_region_index(self):
+        queryset = Member.objects.filter(is_active=True, address_region='አማራ').order_by('full_name', 'id')[:50]
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('member_active_region_name_idx', self.explain(sql, params))
+
+    def test_dashboard_recent_members_uses_join_date_index(self):
+        queries = self.member_queries(reverse('dashboard'))
+        recent = [sql for sql in queries if 'ORDER BY' in sql and 'join_date' in sql]
+        self.assertEqual(len(recent), 1)
+        self.assertUsesIndex(recent[0], 'member_active_joined_idx')
+
+    def test_attendance_by_meeting_uses_meeting_index(self):
+        meeting = Meeting.objects.create(title='ስብሰባ', meeting_date='2025-01-01T10:00Z', location='አዳራሽ')
+        Attendance.objects.create(member=Member.objects.first(), meeting=meeting)
+        sql, params = Attendance.objects.filter(meeting=meeting).values('member_id').query.sql_with_params()
+        self.assertIn('attendance_meeting_member_idx', self.explain(sql, params))
+
+
+# =========================================================================
+# Member search
+# =========================================================================
+
+class MemberSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('searcher', 'searcher@example.com', 'pw')
+        cls.long_name = make_member(1, full_name='ሀጎስ ገብረመድህን ወልደሚካኤል ተስፋማርያም')
+        cls.short_name = make_member(2, full_name='ሐጎስ በላይ')
+        cls.other = make_member(3, full_name='ሰላም ታደሰ', phone_number='0911223344')
+
+    def names(self, queryset):
+        return [member.full_name for member in queryset]
+
+    def test_normalization(self):
+        self.assertEqual(normalize_text('ሐጎስ'), normalize_text('ሀጎስ'))
+        self.assertEqual(normalize_text('ሠላም፡ ፀሐይ'), 'ሰላም ጸሀይ')
+        self.assertEqual(normalize_phone('+251 911-22 33 44'), '0911223344')
+        self.assertEqual(query_terms('AMH-2025 ሐጎስ'), ['amh2025', 'ሀጎስ'])
+
+    def test_homophones_phone_and_id_match(self):
+        members = Member.objects.all()
+        self.assertEqual(set(self.names(search_members(members, 'ሀጎስ'))), {self.long_name.full_name, self.short_name.full_name})
+        self.assertEqual(self.names(search_members(members, '+251911223344')), [self.other.full_name])
+        self.assertEqual(self.names(search_members(members, self.other.membership_id)), [self.other.full_name])
+
+    def test_short_terms_fall_back_to_substring_match(self):
+        with CaptureQueriesContext(connection) as queries:
+            found = self.names(search_members(Member.objects.all(), 'ሰላ'))
+        self.assertEqual(found, [self.other.full_name])
+        self.assertFalse([query for query in queries if 'MATCH' in query['sql']])
+
+    def test_ranked_search(self):
+        self.client.force_login(self.admin)
+        body = self.client.get(reverse('member_search'), {'q': 'ሐጎስ'}).json()
+        # The shorter name is the closer match
+        self.assertEqual([row[1] for row in body['results']], [self.short_name.full_name, self.long_name.full_name])
+        self.assertEqual(list(ranked_search(Member.objects.all(), '  ')), [])
+
+
+# =========================================================================
+# Stored QR codes and ID card images
+# =========================================================================
+
+class IdCardFileTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('holder', password='pw')
+        cls.member = make_member(1, user=cls.user)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.media = media.name
+
+    def test_qr_code_is_versioned_by_url(self):
+        member = Member.objects.get(pk=self.member.pk)
+        name, version = ensure_qr_code(member, 'https://a.example')
+        self.assertEqual(version, qr_version(f'https://a.example/app/{member.pk}/'))
+        self.assertIn(f'{member.pk}-{version}', name)
+        self.assertEqual(ensure_qr_code(member, 'https://a.example/', qr_png=b'unused'), (name, version))
+
+        new_name, new_version = ensure_qr_code(member, 'https://b.example')
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(Member.objects.get(pk=member.pk).qr_code.name, new_name)
+        self.assertFalse(os.path.exists(os.path.join(self.media, name)))
+
+    def test_card_version_follows_printed_fields(self):
+        member = Member.objects.get(pk=self.member.pk)
+        name, version = ensure_id_card_image(member, 'https://a.example', card_png=b'card')
+        self.assertEqual(ensure_id_card_image(member, 'https://a.example', card_png=b'other')[0], name)
+        member.profession = 'ሐኪም'  # not printed on the card
+        self.assertEqual(ensure_id_card_image(member, 'https://a.example', card_png=b'other')[1], version)
+        member.full_name = 'አዲስ ስም'
+        self.assertNotEqual(ensure_id_card_image(member, 'https://a.example', card_png=b'new')[1], version)
+
+    def test_qr_view_is_cacheable(self):
+        self.client.force_login(self.user)
+        url = reverse('member_qr_code', args=[self.member.pk])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'\x89PNG'))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+# =========================================================================
+# Batch ID card printing
+# =========================================================================
+
+class CardPrintingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 13):
+            make_member(i)
+        make_member(13, region='ትግራይ')
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def print_job(self, output_format):
+        job = CardPrintJob.objects.create(
+            filters={'region': 'አማራ', 'base_url': 'https://cards.example'}, output_format=output_format,
+        )
+        run_print_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('done', ''))
+        self.assertEqual((job.total, job.processed), (12, 12))
+        with job.output.open('rb') as handle:
+            return handle.read()
+
+    def test_pdf_has_one_page_per_ten_cards(self):
+        pdf = self.print_job('pdf')
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        # Pages are appended as incremental updates; the last page tree holds the final count
+        self.assertEqual(re.findall(rb'/Count (\d+)', pdf)[-1], b'2')
+        # Every card printed was stored for reuse
+        self.assertEqual(Member.objects.filter(address_region='አማራ').exclude(id_card_image='').count(), 12)
+
+    def test_png_sheets_in_a_zip(self):
+        with zipfile.ZipFile(io.BytesIO(self.print_job('png'))) as archive:
+            self.assertEqual(archive.namelist(), ['sheet-0001.png', 'sheet-0002.png'])
+            with Image.open(io.BytesIO(archive.read('sheet-0001.png'))) as sheet:
+                self.assertEqual(sheet.size, (2480, 3508))
+
+    def test_empty_selection_fails_the_job(self):
+        job = CardPrintJob.objects.create(filters={'region': 'ጋምቤላ', 'base_url': 'https://cards.example'})
+        run_print_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_print_fails_when_its_worker_dies(self):
+        job = CardPrintJob.objects.create(filters={'region': 'አማራ'}, status='running')
+        queued = jobs.enqueue('print_id_cards', {'job_id': job.pk})
+        self.assertEqual(len(jobs.claim('w1', 1)), 1)
+        # w1 was killed mid-render; half an hour later another worker cleans up
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error)
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, 'failed')
+
+    def test_coordinators_only_see_their_regions_jobs(self):
+        group = Group.objects.create(name=COORDINATOR_GROUP)
+        coordinators = {}
+        for index, region in ((14, 'አማራ'), (15, 'ትግራይ')):
+            user = User.objects.create_user(f'coordinator{index}', password='pw', is_staff=True)
+            user.groups.add(group)
+            make_member(index, region=region, user=user, is_coordinator=True, coordinator_region=region)
+            coordinators[region] = user
+        job = CardPrintJob.objects.create(
+            created_by=coordinators['አማራ'], status='done',
+            filters={'scope_region': 'አማራ', 'base_url': 'https://cards.example'},
+        )
+        job.output.save('id-cards.pdf', ContentFile(b'%PDF-1.4'))
+        urls = [reverse('id_card_batch_status', args=[job.pk]), reverse('id_card_batch_download', args=[job.pk])]
+
+        self.client.force_login(coordinators['ትግራይ'])
+        self.assertEqual([self.client.get(url).status_code for url in urls], [404, 404])
+        self.client.force_login(coordinators['አማራ'])
+        self.assertEqual([self.client.get(url).status_code for url in urls], [200, 200])
+
+
+# =========================================================================
+# Photo processing and size variants
+# =========================================================================
+
+def sideways_jpeg(size=(3000, 2000)):
+    """A phone photo: stored landscape, with EXIF saying "rotate 90 degrees to display"."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, format='JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile('phone.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class PhotoTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.user = User.objects.create_user('pictured', password='pw')
+
+    def test_upload_is_rotated_capped_and_reencoded(self):
+        member = make_member(1, photo=sideways_jpeg(), user=self.user)
+        self.assertTrue(member.photo.name.endswith('.webp'))
+        with member.photo.open('rb') as handle, Image.open(handle) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (1067, 1600))  # upright, longest side capped
+
+    def test_variants_are_created_once_and_served_cacheably(self):
+        member = make_member(1, photo=sideways_jpeg((400, 300)), user=self.user)
+        storage = member.photo.storage
+        name = ensure_variant(member.photo.name, 'list', storage=storage)
+        with storage.open(name, 'rb') as handle, Image.open(handle) as variant:
+            self.assertEqual(variant.size, (96, 96))
+        modified = storage.get_modified_time(name)
+        self.assertEqual(ensure_variant(member.photo.name, 'list', storage=storage), name)
+        self.assertEqual(storage.get_modified_time(name), modified)
+
+        self.client.force_login(self.user)
+        url = reverse('member_photo', args=[member.pk, 'detail'])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('member_photo', args=[member.pk, 'huge'])).status_code, 404)
+
+    def test_unreadable_original_is_served_as_stored(self):
+        member = make_member(1, user=self.user)
+        Member.objects.filter(pk=member.pk).update(photo='member_photos/legacy.jpg')
+        self.client.force_login(self.user)
+        url = reverse('member_photo', args=[member.pk, 'list'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        default_storage.save('member_photos/legacy.jpg', ContentFile(b'not really a jpeg'))
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/jpeg'))
+        self.assertEqual(b''.join(response.streaming_content), b'not really a jpeg')
+
+
+# =========================================================================
+# Background jobs
+# =========================================================================
+
+@override_settings(SMS_BACKEND='members.sms.FakeSMSSender')
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        FakeSMSSender.outbox.clear()
+
+    def test_welcome_sms_is_sent_by_the_worker(self):
+        member = make_member(1)
+        jobs.enqueue('send_welcome_sms', {'member_id': member.pk})
+        # Nothing is sent until a worker picks the job up
+        self.assertEqual(FakeSMSSender.outbox, [])
+
+        done = jobs.run_pending()
+        self.assertEqual([job.status for job in done], ['done'])
+        self.assertEqual(len(FakeSMSSender.outbox), 1)
+        self.assertEqual(FakeSMSSender.outbox[0].to, member.phone_number)
+        self.assertIn(member.membership_id, FakeSMSSender.outbox[0].body)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        calls = []
+
+        @jobs.task('flaky', max_attempts=2)
+        def flaky():
+            calls.append(1)
+            raise RuntimeError('provider down')
+        self.addCleanup(jobs.TASKS.pop, 'flaky')
+
+        job = jobs.enqueue('flaky')
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('provider down', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, len(calls)), ('failed', 2))
+
+    def test_concurrency_limit(self):
+        jobs.task('limited', concurrency=1)(lambda: None)
+        self.addCleanup(jobs.TASKS.pop, 'limited')
+        first, second = jobs.enqueue('limited'), jobs.enqueue('limited')
+        self.assertEqual([job.pk for job in jobs.claim('w1', 10)], [first.pk])
+        # The second one waits until the first is no longer running
+        self.assertEqual(jobs.claim('w2', 10), [])
+        jobs.run_job(Job.objects.get(pk=first.pk))
+        self.assertEqual([job.pk for job in jobs.claim('w2', 10)], [second.pk])
+
+    def test_heartbeat_keeps_a_long_job(self):
+        released = []
+
+        @jobs.task('long', max_attempts=1)
+        def long():
+            # Half an hour into the job: without the heartbeat it would look abandoned
+            Job.objects.filter(task='long').update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+            jobs.heartbeat()
+            released.append(jobs.requeue_stale())
+        self.addCleanup(jobs.TASKS.pop, 'long')
+
+        jobs.enqueue('long')
+        self.assertEqual([job.status for job in jobs.run_pending()], ['done'])
+        self.assertEqual(released, [0])
+
+    @override_settings(MEMBER_STATS_DEFERRED=True)
+    def test_deferred_stats(self):
+        make_member(1)
+        self.assertFalse(MemberStat.objects.exists())
+        jobs.run_pending()
+        self.assertEqual(MemberStat.objects.get(region='አማራ', dimension='total').count, 1)
+
+
+# =========================================================================
+# Announcement SMS fan-out (against a local stub of the Twilio API)
+# =========================================================================
+
+class StubTwilioHandler(BaseHTTPRequestHandler):
+    received = []
+    rejected_numbers = set()
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        to = form['To'][0]
+        self.received.append(to)
+        if to in self.rejected_numbers:
+            status, payload = 400, {'message': 'Invalid To number'}
+        else:
+            status, payload = 201, {'sid': f'SM{len(self.received)}'}
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AnnouncementDispatchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubTwilioHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.twilio = override_settings(
+            SMS_BACKEND=None, TWILIO_ACCOUNT_SID='AC123', TWILIO_AUTH_TOKEN='token',
+            TWILIO_PHONE_NUMBER='+15550000000', SMS_RATE_PER_SECOND=1000,
+            TWILIO_API_BASE=f'http://127.0.0.1:{cls.server.server_address[1]}',
+        )
+        cls.twilio.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.twilio.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 8):
+            make_member(i, region='አማራ' if i <= 5 else 'ሲዳማ', is_active=i != 5)
+        cls.announcement = Announcement.objects.create(title='ስብሰባ', content='ነገ ጠዋት 3 ሰዓት')
+
+    def setUp(self):
+        StubTwilioHandler.received = []
+        StubTwilioHandler.rejected_numbers = {'+251900000003'}
+
+    def test_sends_to_active_members_of_region(self):
+        dispatch = AnnouncementDispatch.objects.create(announcement=self.announcement, region='አማራ')
+        notifications.run_dispatch(dispatch.pk)
+        dispatch.refresh_from_db()
+        self.assertEqual((dispatch.status, dispatch.total, dispatch.sent, dispatch.failed), ('done', 4, 3, 1))
+        self.assertEqual(sorted(StubTwilioHandler.received), [f'+2519000000{i:02d}' for i in (1, 2, 3, 4)])
+        failed = dispatch.deliveries.get(status='failed')
+        self.assertEqual((failed.phone_number, failed.error), ('0900000003', 'Invalid To number'))
+
+    def test_resume_skips_delivered_recipients(self):
+        dispatch = AnnouncementDispatch.objects.create(announcement=self.announcement, region='አማራ')
+        # A previous run got as far as adding two recipients and sending to one of them
+        notifications.add_recipients(dispatch)
+        dispatch.deliveries.exclude(member__phone_number__in=['0900000001', '0900000002']).delete()
+        dispatch.deliveries.filter(phone_number='0900000001').update(status='sent')
+
+        notifications.run_dispatch(dispatch.pk)
+        self.assertNotIn('+251900000001', StubTwilioHandler.received)
+        self.assertEqual(sorted(StubTwilioHandler.received), ['+251900000002', '+251900000003', '+251900000004'])
+        self.assertEqual(dispatch.deliveries.count(), 4)
+
+    @override_settings(TWILIO_ACCOUNT_SID=None)
+    def test_console_sender_counts_as_sent(self):
+        dispatch = AnnouncementDispatch.objects.create(announcement=self.announcement, region='ሲዳማ')
+        with self.assertLogs('members.sms', 'INFO'):
+            notifications.run_dispatch(dispatch.pk)
+        dispatch.refresh_from_db()
+        self.assertEqual((dispatch.status, dispatch.sent, dispatch.failed), ('done', 2, 0))
+        self.assertEqual(
+            list(dispatch.deliveries.values_list('status', 'attempts', 'provider_id')), [('sent', 1, 'console')] * 2,
+        )
+        self.assertEqual(StubTwilioHandler.received, [])
+
+    def test_stale_requeue_mid_dispatch_sends_each_message_once(self):
+        dispatch = AnnouncementDispatch.objects.create(announcement=self.announcement, region='አማራ')
+        job = jobs.enqueue('dispatch_announcement', {'dispatch_id': dispatch.pk})
+        first, = jobs.claim('w1', 1)
+        record_results, takeover = notifications.record_results, []
+
+        def record_after_takeover(*args):
+            if not takeover:
+                # The first batch has gone out but w1 is too slow to record it: its lease runs
+                # out and w2 gets the job
+                takeover.append('w2')
+                Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+                self.assertEqual(jobs.requeue_stale(), 1)
+                second, = jobs.claim('w2', 1)
+                takeover.append(jobs.run_job(second).status)
+            return record_results(*args)
+
+        with mock.patch.object(notifications, 'SEND_BATCH_SIZE', 2), \
+                mock.patch.object(notifications, 'record_results', record_after_takeover):
+            self.assertEqual(jobs.run_job(first).status, 'lost')
+
+        self.assertEqual(takeover, ['w2', 'done'])
+        self.assertEqual(sorted(StubTwilioHandler.received), [f'+2519000000{i:02d}' for i in (1, 2, 3, 4)])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+        dispatch.refresh_from_db()
+        self.assertEqual((dispatch.sent, dispatch.failed), (3, 1))
+        self.assertFalse(dispatch.deliveries.filter(status__in=['pending', 'sending']).exists())
+
+
+# =========================================================================
+# Member provisioning (one transaction, fixed query budget)
+# =========================================================================
+
+class ProvisioningTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # The region's ID sequence and stats rows already exist, as they do in production
+        # (members 1 and 3 share every stats key, so no rollup row has to be created)
+        make_member(1)
+
+    def test_query_budget(self):
+        member = make_member(3, save=False)
+        # user INSERT, ID reservation (savepoint, SELECT ... FOR UPDATE, UPDATE, release),
+        # member INSERT, 5 stats UPDATEs, 3 search index writes, 2 job INSERTs, + the outer savepoint pair
+        with self.assertNumQueries(18):
+            provision_member(member, base_url='http://testserver/')
+        member.refresh_from_db()
+        self.assertEqual(member.user.username, member.phone_number)
+        self.assertTrue(member.user.check_password('password123'))
+        self.assertEqual(Job.objects.filter(task__in=['send_welcome_sms', 'prerender_id_card']).count(), 2)
+
+    def test_duplicate_phone_leaves_nothing_behind(self):
+        User.objects.create_user('0900000004', password='pw')
+        member = make_member(4, save=False)
+        with self.assertRaises(MemberAlreadyExists):
+            provision_member(member)
+        self.assertIsNone(member.pk)
+        self.assertFalse(Member.objects.filter(phone_number='0900000004').exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_other_clashes_are_not_reported_as_a_taken_phone(self):
+        make_member(5, email='abebe@example.com')
+        member = make_member(6, save=False, email='abebe@example.com')
+        with self.assertRaises(IntegrityError):
+            provision_member(member)
+        self.assertIsNone(member.pk)
+
+    def test_admin_add_form_rejects_a_taken_phone(self):
+        User.objects.create_user('0900000007', password='pw')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(reverse('admin:members_member_add'), {
+            'full_name': 'አበበ በቀለ', 'gender': 'Male', 'date_of_birth': '1990-01-01',
+            'phone_number': '0900000007', 'address_region': 'አማራ', 'address_zone': 'ዞን',
+            'address_woreda': 'ወረዳ', 'address_kebele': '01', 'membership_level': 'Full',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('phone_number', response.context['adminform'].form.errors)
+        self.assertFalse(Member.objects.filter(phone_number='0900000007').exists())
+
+    def test_register_member_view(self):
+        response = self.client.post(reverse('register_member'), {
+            'full_name': 'አበበ በቀለ', 'gender': 'Male', 'date_of_birth': '1990-01-01',
+            'phone_number': '0911223344', 'address_region': 'አማራ', 'address_zone': 'ዞን',
+            'address_woreda': 'ወረዳ', 'address_kebele': '01', 'membership_level': 'Full',
+        })
+        self.assertRedirects(response, reverse('registration_success'))
+        member = Member.objects.get(phone_number='0911223344')
+        self.assertEqual(member.user.username, '0911223344')
+        self.assertEqual(User.objects.filter(username='0911223344').count(), 1)
+
+    def test_register_member_view_logs_unexpected_errors(self):
+        with mock.patch('members.views.provision_member', side_effect=RuntimeError('db down')), \
+                self.assertLogs('members.views', 'ERROR') as logs:
+            response = self.client.post(reverse('register_member'), {
+                'full_name': 'አበበ በቀለ', 'gender': 'Male', 'date_of_birth': '1990-01-01',
+                'phone_number': '0911223344', 'address_region': 'አማራ', 'address_zone': 'ዞን',
+                'address_woreda': 'ወረዳ', 'address_kebele': '01', 'membership_level': 'Full',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db down', logs.output[0])
+
+
+# =========================================================================
+# Meeting check-in
+# =========================================================================
+
+class MeetingCheckinTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.members = [make_member(i) for i in range(1, 6)]
+        cls.meeting = Meeting.objects.create(title='ስብሰባ', meeting_date='2025-01-01T10:00Z', location='አዳራሽ')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def sync(self, scans):
+        return self.client.post(
+            reverse('meeting_checkin_sync', args=[self.meeting.pk]),
+            json.dumps({'scans': scans}), content_type='application/json',
+        )
+
+    def test_batch_upload(self):
+        first, second, third = self.members[:3]
+        qr = f'https://example.org{reverse("member_detail", args=[first.pk])}'
+        scans = [
+            {'payload': qr, 'scanned_at': '2025-01-01T09:55:00Z'},
+            {'payload': qr},  # scanned twice at the door
+            {'payload': second.membership_id.lower()},
+            {'payload': f'http://door-device{reverse("member_detail", args=[third.pk])}'},
+            {'payload': 'not a member'},
+        ]
+        # The same queries for any batch size: session, user, meeting, member pks, membership IDs,
+        # then in one transaction the meeting lock, existing check-ins, the bulk INSERT and the
+        # summary table writes, and the attendee count from the summary table
+        with self.assertNumQueries(17):
+            data = self.sync(scans).json()
+        self.assertEqual((data['recorded'], data['already_checked_in']), (3, 0))
+        self.assertEqual(data['unknown'], ['not a member'])
+
+        # A device re-sending the batch after a dropped response changes nothing
+        data = self.sync(scans).json()
+        self.assertEqual((data['recorded'], data['already_checked_in'], data['attendee_count']), (0, 3, 3))
+        attendance = Attendance.objects.get(meeting=self.meeting, member=first)
+        self.assertEqual(attendance.attended_at.isoformat(), '2025-01-01T09:55:00+00:00')
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.sync('nope').status_code, 400)
+        self.assertEqual(self.sync([{'payload': 'x'}] * 1001).status_code, 413)
+
+    def test_unreadable_scans_are_unknown(self):
+        member = self.members[0]
+        response = self.sync([
+            {'payload': 12345},
+            {'payload': ['AMH-2025-0001']},
+            # A well-formed but impossible time is taken as "now"
+            {'payload': member.membership_id, 'scanned_at': '2025-02-30T10:00Z'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['recorded'], data['unknown']), (1, [12345, ['AMH-2025-0001']]))
+        self.assertTrue(Attendance.objects.filter(meeting=self.meeting, member=member).exists())
+
+
+# =========================================================================
+# Attendance analytics
+# =========================================================================
+
+class AttendanceAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.members = [make_member(i, region='አማራ' if i % 2 else 'ሲዳማ') for i in range(1, 7)]
+        cls.meetings = [
+            Meeting.objects.create(title=f'ስብሰባ {i}', meeting_date=f'2025-0{i}-01T10:00Z', location='አዳራሽ')
+            for i in range(1, 4)
+        ]
+
+    def summary_rows(self):
+        return (
+            sorted(MeetingTurnout.objects.filter(attendees__gt=0).values_list('meeting_id', 'region', 'attendees')),
+            sorted(MemberParticipation.objects.filter(attended__gt=0).values_list('member_id', 'attended', 'last_meeting_date')),
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        first, second, third = self.meetings
+        # Bulk check-ins, single admin rows and a removal all go through the summary tables
+        scans = [{'payload': member.membership_id} for member in self.members[:5]]
+        record_checkins(first, scans)
+        record_checkins(third, scans[:2])
+        Attendance.objects.create(meeting=second, member=self.members[0])
+        Attendance.objects.create(meeting=second, member=self.members[5])
+        Attendance.objects.get(meeting=third, member=self.members[1]).delete()
+
+        incremental = self.summary_rows()
+        analytics.rebuild()
+        self.assertEqual(incremental, self.summary_rows())
+
+        summary = analytics.attendance_summary()
+        self.assertEqual([m['attendees'] for m in summary['meetings']], [1, 2, 5])
+        top = summary['top_participants'][0]
+        self.assertEqual((top['member_id'], top['attended']), (self.members[0].pk, 3))
+        self.assertEqual({row['region']: row['attendances'] for row in summary['by_region']}, {'አማራ': 5, 'ሲዳማ': 3})
+
+    def test_report_view(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('attendance_report'), {'format': 'json', 'region': 'ሲዳማ'})
+        self.assertEqual(response.json()['region'], 'ሲዳማ')
+        self.assertEqual(self.client.get(reverse('attendance_report')).status_code, 200)
+
+
+# =========================================================================
+# Request metrics (middleware, Server-Timing, /app/metrics)
+# =========================================================================
+
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        for i in range(1, 4):
+            make_member(i)
+
+    def setUp(self):
+        request_metrics.histograms.clear()
+
+    @modify_settings(MIDDLEWARE={'prepend': 'members.instrumentation.RequestMetricsMiddleware'})
+    def test_views_are_measured(self):
+        templates = [{**settings.TEMPLATES[0], 'BACKEND': 'members.instrumentation.TimedDjangoTemplates'}]
+        self.enterContext(override_settings(TEMPLATES=templates))
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('member_list'))
+        query_count = len(queries)
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertIn(f'desc="{query_count} queries"', timing['db'])
+        self.assertNotEqual(timing['tpl'], 'dur=0.0')
+
+        export = self.client.get(reverse('export_members_csv'))
+        size = len(b''.join(export.streaming_content))
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(f'members_view_db_queries_sum{{view="member_list"}} {query_count}', body)
+        self.assertIn(f'members_view_response_bytes_sum{{view="export_members_csv"}} {size}', body)
+        self.assertIn('members_view_duration_seconds_count{view="member_list"} 1', body)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+
+    def test_rolling_window(self):
+        histogram = RollingHistogram((1, 10), window=60, slices=6)
+        histogram.observe(0.5, now=1000)
+        histogram.observe(10, now=1030)
+        histogram.observe(50, now=1055)
+        self.assertEqual(histogram.snapshot(now=1059), ([1, 2, 3], 60.5))
+        # The first observation's slice has left the window
+        self.assertEqual(histogram.snapshot(now=1065), ([0, 1, 2], 60.0))
+
+
+# =========================================================================
+# Coordinator scope (resolved once, cached in the session)
+# =========================================================================
+
+class MemberScopeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name=COORDINATOR_GROUP)
+        cls.user = User.objects.create_user('coordinator', password='pw', is_staff=True)
+        cls.user.groups.add(cls.group)
+        cls.profile = make_member(1, region='ሲዳማ', user=cls.user, is_coordinator=True, coordinator_region='ሲዳማ')
+        make_member(2, region='አማራ')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def listed_regions(self):
+        rows = self.client.get(reverse('member_list'), {'format': 'json'}).json()['results']
+        return {row[-1] for row in rows}
+
+    def test_scope_is_resolved_once_per_session(self):
+        self.assertEqual(self.listed_regions(), {'ሲዳማ'})
+        self.assertEqual(self.client.session[SESSION_KEY]['region'], 'ሲዳማ')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('export_members_csv'))
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('auth_user_groups', sql)
+        self.assertNotIn('"is_coordinator"', sql)
+
+    def test_changes_invalidate_the_cached_scope(self):
+        self.assertEqual(self.listed_regions(), {'ሲዳማ'})
+        self.profile.coordinator_region = 'አማራ'
+        self.profile.save()
+        self.assertEqual(self.listed_regions(), {'አማራ'})
+
+        self.profile.is_coordinator = False
+        self.profile.save(update_fields=['is_coordinator'])
+        self.assertEqual(self.listed_regions(), set())
+
+        self.group.user_set.clear()
+        self.assertEqual(self.listed_regions(), {'ሲዳማ', 'አማራ'})
+        self.assertEqual(Member.objects.for_scope(MemberScope(region='አማራ')).count(), 1)
+
+    def test_session_copy_expires(self):
+        self.assertEqual(self.listed_regions(), {'ሲዳማ'})
+        # A change made through another process's (unshared) cache leaves this generation alone
+        Member.objects.filter(pk=self.profile.pk).update(coordinator_region='አማራ')
+        self.assertEqual(self.listed_regions(), {'ሲዳማ'})
+        session = self.client.session
+        session[SESSION_KEY]['resolved'] -= scoping.SESSION_SCOPE_TTL
+        session.save()
+        self.assertEqual(self.listed_regions(), {'አማራ'})
+
+    def test_profile_moved_to_another_login(self):
+        self.assertEqual(self.listed_regions(), {'ሲዳማ'})
+        self.profile.user = User.objects.create_user('someone-else')
+        self.profile.save()
+        # The old login is no longer a coordinator with a profile
+        self.assertEqual(self.listed_regions(), set())
+
+
+# =========================================================================
+# Member filters (validation, exact lookups, canonical cache key)
+# =========================================================================
+
+class MemberFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        today = timezone.localdate()
+        make_member(1, region='አማራ', address_zone='ሰሜን ወሎ', date_of_birth=today.replace(year=today.year - 30))
+        make_member(2, region='አማራ', address_zone='ሰሜን ወሎ', date_of_birth=today.replace(year=today.year - 60))
+        make_member(3, region='አማራ', address_zone='ደቡብ ወሎ', date_of_birth=today.replace(year=today.year - 30))
+        make_member(4, region='አዲስ አበባ', date_of_birth=today.replace(year=today.year - 30))
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, **params):
+        filters = MemberFilters.from_params(params)
+        return sorted(Member.objects.matching(filters).values_list('full_name', flat=True))
+
+    def test_validation_and_canonical_key(self):
+        filters = MemberFilters.from_params({'end_date': '2025-01-01', 'region': 'አማራ', 'gender': '', 'start_date': 'soon'})
+        self.assertEqual(filters.as_params(), {'end_date': '2025-01-01', 'region': 'አማራ'})
+        self.assertEqual(list(filters.errors), ['start_date'])
+        same = MemberFilters.from_params({'region': 'አማራ', 'end_date': '2025-01-01'})
+        self.assertEqual(filters.cache_key(), same.cache_key())
+        self.assertIn('end_date', MemberFilters.from_params({'start_date': '2025-02-01', 'end_date': '2025-01-01'}).errors)
+        self.assertIn('region', MemberFilters.from_params({'region': 'አማ'}).errors)
+
+    def test_exact_and_derived_filters(self):
+        self.assertEqual(self.names(region='አማራ', zone=' ሰሜን  ወሎ '), ['አባል 001', 'አባል 002'])
+        self.assertEqual(self.names(region='አማራ', age_band='26-35'), ['አባል 001', 'አባል 003'])
+        self.assertEqual(self.names(age_band='51-65', gender='Female'), ['አባል 002'])
+
+    def test_list_and_export_share_the_filters(self):
+        self.client.force_login(self.admin)
+        url = reverse('member_list')
+        self.assertEqual(self.client.get(url, {'format': 'json', 'region': 'አማራ'}).json()['count'], 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'region': 'አማራ', 'zone': 'ደቡብ ወሎ', 'format': 'json'})
+        self.assertEqual(response.json()['count'], 1)
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(url, {'format': 'json', 'zone': 'ደቡብ ወሎ', 'region': 'አማራ', 'cursor': ''})
+        self.assertEqual(len(cached), len(queries) - 1)  # the count comes from the cache
+        self.assertEqual(self.client.get(url, {'format': 'json', 'end_date': '2025-13-01'}).status_code, 400)
+
+        export = self.client.get(reverse('export_members_csv'), {'region': 'አዲስ አበባ'})
+        self.assertEqual(len(b''.join(export.streaming_content).decode('utf-8-sig').strip().splitlines()), 2)
+
+
+# =========================================================================
+# Benchmark harness (manage.py bench)
+# =========================================================================
+
+class BenchCommandTests(TestCase):
+
+    def test_small_run_writes_a_comparable_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command('bench', sizes='40', repeat=1, saves=2, years=1, output=path, stdout=io.StringIO())
+            with open(path, encoding='utf-8') as handle:
+                report = json.load(handle)
+        cases = report['sizes']['40']['cases']
+        self.assertLessEqual(cases['dashboard (warm cache)']['queries'], cases['dashboard (cold cache)']['queries'])
+        self.assertGreater(cases['export_members_csv (all)']['bytes'], 0)
+        self.assertEqual(len(list(compare(report, report))), len(cases))
+        self.assertFalse(any(flag for *_, flag in compare(report, report)))
+        # Everything the harness created was rolled back
+        self.assertFalse(Member.objects.exists())
+
+
+# =========================================================================
+# Async (ASGI) views
+# =========================================================================
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.members = [make_member(i, region='ሲዳማ' if i % 3 else 'አማራ') for i in range(1, 8)]
+        Announcement.objects.create(title='ጉባኤ', content='ዓመታዊ ጉባኤ', author=cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        request_metrics.histograms.clear()
+        self.client.force_login(self.admin)
+        self.async_client.force_login(self.admin)
+
+    async def test_member_list_matches_the_sync_view(self):
+        params = {'format': 'json', 'region': 'ሲዳማ', 'page_size': 2}
+        sync_get = sync_to_async(self.client.get)
+        expected = (await sync_get(reverse('member_list'), params)).json()
+        response = await self.async_client.get(reverse('member_list_async'), params)
+        self.assertEqual(response.json(), expected)
+        params['cursor'] = expected['next_cursor']
+        following = await self.async_client.get(reverse('member_list_async'), params)
+        self.assertEqual(following.json(), (await sync_get(reverse('member_list'), params)).json())
+
+        html = await self.async_client.get(reverse('member_list_async'))
+        self.assertContains(html, 'አባል 001')
+
+    async def test_pages_render(self):
+        for url in (reverse('dashboard_async'), reverse('announcements_async'),
+                    reverse('member_detail_async', args=[self.members[0].pk])):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertContains(await self.async_client.get(reverse('announcements_async')), 'ጉባኤ')
+        missing = await self.async_client.get(reverse('member_detail_async', args=[9999]))
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_staff_only(self):
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get(reverse('dashboard_async'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.LOGIN_URL, response['Location'])
+
+    @modify_settings(MIDDLEWARE={'prepend': 'members.instrumentation.RequestMetricsMiddleware'})
+    async def test_streamed_export_is_measured(self):
+        def sync_export():
+            return b''.join(self.client.get(reverse('export_members_csv'), {'gzip': '1'}).streaming_content)
+
+        expected = await sync_to_async(sync_export)()
+        response = await self.async_client.get(reverse('export_members_csv_async'), {'gzip': '1'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(body), gzip.decompress(expected))
+        self.assertIn('queries"', response['Server-Timing'])
+
+        metrics = request_metrics.render_prometheus()
+        self.assertIn(f'members_view_response_bytes_sum{{view="export_members_csv_async"}} {len(body)}', metrics)
+        self.assertNotIn('members_view_db_queries_sum{view="export_members_csv_async"} 0\n', metrics)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+
+    def test_reports_throughput_per_target(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        make_member(1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'load.json')
+            call_command(
+                'loadtest', target=[f'wsgi={self.live_server_url}/app/'], paths=['?format=json', 'dashboard/'],
+                concurrency='2', duration=0.5, output=path, stdout=io.StringIO(),
+            )
+            with open(path, encoding='utf-8') as handle:
+                result = json.load(handle)['results']['wsgi'][0]
+        self.assertGreater(result['requests'], 0)
+        self.assertEqual(result['errors'], {})
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+
+# =========================================================================
+# Announcements: conditional GET, fragment cache and the ?since= feed
+# =========================================================================
+
+class AnnouncementFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='pw')
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        for i in range(12):
+            Announcement.objects.create(title=f'ማስታወቂያ {i:02d}', content='ይዘት', author=cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def announcement_queries(self, queries):
+        return [query['sql'] for query in queries if 'members_announcement' in query['sql']]
+
+    def admin_save(self, announcement):
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        AnnouncementAdmin(Announcement, admin.site).save_model(request, announcement, None, True)
+
+    def test_reload_is_a_304_after_one_aggregate_query(self):
+        first = self.client.get(reverse('announcements'))
+        self.assertContains(first, 'ማስታወቂያ 11')
+        self.assertNotContains(first, 'ማስታወቂያ 01')  # on page 2
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(reverse('announcements'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        sql = self.announcement_queries(queries)
+        self.assertEqual(len(sql), 1)
+        self.assertIn('MAX', sql[0])
+
+        page_two = self.client.get(reverse('announcements'), {'page': 2}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(page_two.status_code, 200)
+        self.assertContains(page_two, 'ማስታወቂያ 01')
+
+        announcement = Announcement.objects.get(title='ማስታወቂያ 11')
+        announcement.title = 'የተስተካከለ ማስታወቂያ'
+        self.admin_save(announcement)
+        changed = self.client.get(reverse('announcements'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, 'የተስተካከለ ማስታወቂያ')
+
+    def test_rendered_list_is_shared_until_an_admin_save(self):
+        self.client.get(reverse('announcements'))
+        other = Client()
+        other.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = other.get(reverse('announcements'))
+        self.assertContains(response, 'ማስታወቂያ 11')
+        # Only the MAX/COUNT query: the list came from the fragment cache
+        self.assertEqual(len(self.announcement_queries(queries)), 1)
+
+        announcement = Announcement.objects.get(title='ማስታወቂያ 11')
+        Announcement.objects.filter(pk=announcement.pk).update(title='ያልታየ ለውጥ')
+        self.assertNotContains(other.get(reverse('announcements')), 'ያልታየ ለውጥ')
+        announcement.refresh_from_db()
+        self.admin_save(announcement)
+        self.assertContains(other.get(reverse('announcements')), 'ያልታየ ለውጥ')
+
+    def test_feed_returns_only_changes_since_the_cursor(self):
+        first = self.client.get(reverse('announcement_feed'), {'limit': 10}).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(first['count'], 12)
+        rest = self.client.get(reverse('announcement_feed'), {'limit': 10, 'since': first['next_since']})
+        self.assertEqual([row['title'] for row in rest.json()['results']], ['ማስታወቂያ 10', 'ማስታወቂያ 11'])
+        cursor = rest.json()['next_since']
+
+        unchanged = self.client.get(reverse('announcement_feed'), {'since': cursor})
+        self.assertEqual(unchanged.json()['results'], [])
+        self.assertEqual(unchanged.json()['next_since'], cursor)
+        cached = self.client.get(reverse('announcement_feed'), {'since': cursor}, HTTP_IF_NONE_MATCH=unchanged['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        announcement = Announcement.objects.get(title='ማስታወቂያ 03')
+        announcement.content = 'አዲስ ይዘት'
+        announcement.save()
+        changed = self.client.get(reverse('announcement_feed'), {'since': cursor}).json()
+        self.assertEqual([row['content'] for row in changed['results']], ['አዲስ ይዘት'])
+
+        self.assertEqual(self.client.get(reverse('announcement_feed'), {'since': 'nonsense'}).status_code, 400)
+        since_date = self.client.get(reverse('announcement_feed'), {'since': '2000-01-01T00:00:00Z'}).json()
+        self.assertEqual(len(since_date['results']), 12)
+
+
+# =========================================================================
+# Membership ID verification (LRU + shared cache, signed answers)
+# =========================================================================
+
+class VerificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('field', password='pw', is_staff=True)
+        cls.members = [make_member(i) for i in range(1, 4)]
+
+    def setUp(self):
+        cache.clear()
+        local_lookups.clear()
+        self.client.force_login(self.staff)
+
+    def test_lookup_is_signed_and_cached(self):
+        member = self.members[0]
+        url = reverse('verify_membership', args=[member.membership_id.lower()])
+        answer = self.client.get(url).json()
+        self.assertEqual(answer['id'], member.membership_id)
+        self.assertTrue(answer['valid'])
+        self.assertEqual((answer['region'], answer['level']), ('አማራ', 'Full'))
+        self.assertTrue(check_signature(answer))
+        self.assertFalse(check_signature({**answer, 'valid': False}))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([query for query in queries if 'members_member' in query['sql']])
+        # Another worker: empty LRU, answered from the shared cache
+        local_lookups.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([query for query in queries if 'members_member' in query['sql']])
+
+        member.is_active = False
+        with self.captureOnCommitCallbacks() as callbacks:
+            member.save()
+            # Until the commit, other requests still see the row as it was: nothing is dropped yet
+            self.assertTrue(self.client.get(url).json()['valid'])
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.client.get(url).json()['valid'])
+
+        unknown = self.client.get(reverse('verify_membership', args=['AMH-1999-9999'])).json()
+        self.assertFalse(unknown['valid'])
+        self.assertIsNone(unknown['region'])
+        self.assertFalse(self.client.get(reverse('verify_membership', args=['not-an-id'])).json()['valid'])
+
+    def test_batch(self):
+        ids = [m.membership_id for m in self.members] + ['AMH-1999-9999', 'junk']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('verify_memberships'), {'ids': ids}, content_type='application/json')
+        self.assertEqual(len([query for query in queries if 'members_member' in query['sql']]), 1)
+        body = response.json()
+        self.assertTrue(check_signature(body))
+        self.assertEqual([row['valid'] for row in body['results']], [True, True, True, False, False])
+        self.assertEqual([row['id'] for row in body['results']], ids)
+
+        too_many = self.client.post(
+            reverse('verify_memberships'), {'ids': ['x'] * (MAX_VERIFY_BATCH + 1)}, content_type='application/json',
+        )
+        self.assertEqual(too_many.status_code, 413)
+        self.assertEqual(self.client.get(reverse('verify_memberships')).status_code, 405)
+
+
+# =========================================================================
+# Offline verification bundles
+# =========================================================================
+
+class VerificationBundleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('door', password='pw', is_staff=True)
+        cls.members = [make_member(i) for i in range(1, 4)] + [make_member(4, region='ኦሮሚያ')]
+        # Past 9999 the string order of IDs is no longer numeric; the bundle must still be sorted
+        cls.members.append(make_member(5, membership_id='AMH-2024-10000'))
+        make_member(6, membership_id='AMH-1850-0001')  # year outside the encoding: skipped
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_login(self.staff)
+
+    def ids(self, sections, index=0):
+        return {bundles.decode_key(code, key) for code, arrays in sections.items() for key in arrays[index]}
+
+    def test_full_bundle_and_delta(self):
+        out = io.StringIO()
+        call_command('build_verification_bundle', stdout=out)
+        self.assertIn('1 active IDs', out.getvalue())
+        first = VerificationBundle.objects.get()
+        response = self.client.get(reverse('verification_bundle'))
+        self.assertEqual(response['X-Bundle-Version'], str(first.pk))
+        full = bundles.read_bundle(response.content)
+        self.assertEqual(full['kind'], bundles.FULL)
+        self.assertEqual(self.ids(full['sections']), {member.membership_id for member in self.members})
+        for added, _ in full['sections'].values():
+            self.assertEqual(list(added), sorted(added))
+        # Nothing changed: no new version
+        self.assertFalse(bundles.build()[1])
+
+        gone = self.members[0]
+        gone.is_active = False
+        gone.save()
+        new = make_member(7, region='ኦሮሚያ')
+        second, created = bundles.build()
+        self.assertTrue(created)
+        response = self.client.get(reverse('verification_bundle'), {'since': first.pk})
+        delta = bundles.read_bundle(response.content)
+        self.assertEqual((delta['kind'], delta['base'], delta['version']), (bundles.DELTA, first.pk, second.pk))
+        self.assertEqual(self.ids(delta['sections']), {new.membership_id})
+        self.assertEqual(self.ids(delta['sections'], index=1), {gone.membership_id})
+        cached = self.client.get(reverse('verification_bundle'), {'since': first.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        oromia = bundles.read_bundle(self.client.get(reverse('verification_bundle'), {'region': 'oro'}).content)
+        self.assertEqual(list(oromia['sections']), ['ORO'])
+        # A version the server no longer has gets the full bundle
+        unknown = bundles.read_bundle(self.client.get(reverse('verification_bundle'), {'since': 999}).content)
+        self.assertEqual(unknown['kind'], bundles.FULL)
+
+    def test_tampered_bundle_is_rejected(self):
+        bundles.build()
+        data = bytearray(self.client.get(reverse('verification_bundle')).content)
+        data[bundles.HEADER.size + 2] ^= 1
+        with self.assertRaises(bundles.BundleError):
+            bundles.read_bundle(bytes(data))
+        self.assertEqual(self.client.get(reverse('verification_bundle'), {'since': 'x'}).status_code, 400)
+
+
+# =========================================================================
+# Write coalescing (profile saves, photos)
+# =========================================================================
+
+def png_upload(color='red', name='me.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 40), color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class WriteCoalescingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('member', password='pw')
+        cls.member = make_member(1, user=cls.user, email='a@example.com')
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        request_metrics.counters.clear()
+        self.client.force_login(self.user)
+
+    def form_data(self, **changes):
+        initial = MemberUpdateForm(instance=Member.objects.get(pk=self.member.pk)).initial
+        data = {name: value for name, value in initial.items() if name != 'photo' and value is not None}
+        data['date_of_birth'] = initial['date_of_birth'].isoformat()
+        data.update(changes)
+        return data
+
+    def member_writes(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "members_member"')]
+
+    def test_only_changed_fields_are_written(self):
+        updated_at = Member.objects.get(pk=self.member.pk).updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('profile_update'), self.form_data())
+        self.assertRedirects(response, reverse('profile'), fetch_redirect_response=False)
+        self.assertEqual(self.member_writes(queries), [])
+        self.assertEqual(Member.objects.get(pk=self.member.pk).updated_at, updated_at)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('profile_update'), self.form_data(profession='መምህር'))
+        [update] = self.member_writes(queries)
+        self.assertIn('"profession"', update)
+        self.assertNotIn('"full_name"', update)
+        self.assertEqual(Member.objects.get(pk=self.member.pk).profession, 'መምህር')
+        self.assertEqual(request_metrics.counters[('members_writes_avoided_total', 'profile')], 1)
+        self.assertEqual(request_metrics.counters[('members_writes_total', 'profile')], 1)
+        self.assertIn('members_writes_avoided_total{kind="profile"} 1', request_metrics.render_prometheus())
+
+    def test_identical_photo_is_not_stored_again(self):
+        self.client.post(reverse('profile_update'), {**self.form_data(), 'photo': png_upload()})
+        member = Member.objects.get(pk=self.member.pk)
+        stored = member.photo.name
+        self.assertTrue(stored)
+        with member.photo.open('rb') as handle:
+            self.assertEqual(member.photo_digest, hashlib.sha256(handle.read()).hexdigest())
+        # The re-upload is compared with the stored digest, not the stored file
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch.object(FileSystemStorage, 'open', side_effect=AssertionError('stored photo read')):
+            self.client.post(reverse('profile_update'), {**self.form_data(), 'photo': png_upload(name='again.png')})
+        self.assertEqual(self.member_writes(queries), [])
+        self.assertEqual(Member.objects.get(pk=self.member.pk).photo.name, stored)
+        self.assertEqual(request_metrics.counters[('members_writes_avoided_total', 'photo')], 1)
+
+        self.client.post(reverse('profile_update'), {**self.form_data(), 'photo': png_upload('blue')})
+        self.assertNotEqual(Member.objects.get(pk=self.member.pk).photo.name, stored)
+
+    def test_every_login_writes_last_login(self):
+        # Password reset tokens hash last_login, so a login has to invalidate them at once
+        User.objects.filter(pk=self.user.pk).update(last_login=timezone.now() - timedelta(minutes=5))
+        token = default_token_generator.make_token(User.objects.get(pk=self.user.pk))
+        self.client.logout()
+        self.assertTrue(self.client.login(username='member', password='pw'))
+        self.assertFalse(default_token_generator.check_token(User.objects.get(pk=self.user.pk), token))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 urlpatterns = [
     path('', views.member_list, name='member_list'),
     path('register/', views.register_member, name='register_member'), # ይህንን አዲስ መስመር ጨምር
@@ -7,9 +7,29 @@ urlpatterns = [
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.profile_update, name='profile_update'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('search/', views.member_search, name='member_search'),
     path('export/csv/', views.export_members_csv, name='export_members_csv'),
     path('login_redirect/', views.login_redirect_view, name='login_redirect'),
     path('announcements/', views.announcement_list, name='announcements'),
+    path('announcements/feed.json', views.announcement_feed, name='announcement_feed'),
     path('register/success/', views.registration_success, name='registration_success'),
     path('<int:pk>/id-card/', views.member_id_card, name='member_id_card'),
+    path('<int:pk>/qr.png', views.member_qr_code, name='member_qr_code'),
+    path('<int:pk>/photo/<str:variant>/', views.member_photo, name='member_photo'),
+    path('id-cards/print/', views.id_card_batch, name='id_card_batch'),
+    path('id-cards/print/<int:pk>/', views.id_card_batch_status, name='id_card_batch_status'),
+    path('id-cards/print/<int:pk>/download/', views.id_card_batch_download, name='id_card_batch_download'),
+    path('attendance/', views.attendance_report, name='attendance_report'),
+    path('meetings/<int:pk>/check-in/', views.meeting_checkin, name='meeting_checkin'),
+    path('meetings/<int:pk>/check-in/sync/', views.meeting_checkin_sync, name='meeting_checkin_sync'),
+    path('metrics', views.metrics, name='metrics'),
+    path('verify/', views.verify_memberships, name='verify_memberships'),
+    path('verify/bundle/', views.verification_bundle, name='verification_bundle'),
+    path('verify/<str:membership_id>/', views.verify_membership, name='verify_membership'),
+    # Async (ASGI) versions of the read-heavy pages, see members/async_views.py
+    path('async/', async_views.member_list, name='member_list_async'),
+    path('async/<int:pk>/', async_views.member_detail, name='member_detail_async'),
+    path('async/dashboard/', async_views.dashboard, name='dashboard_async'),
+    path('async/announcements/', async_views.announcement_list, name='announcements_async'),
+    path('async/export/csv/', async_views.export_members_csv, name='export_members_csv_async'),
 ]
@@ -0,0 +1,192 @@
+# ===================================================================
+#               members/verification.py
+#       Fast, signed "is this membership ID valid?" lookups for ID card checks
+# ===================================================================
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+from .models import MEMBERSHIP_ID_RE, Member
+
+LOOKUP_PREFIX = 'member-lookup'
+# A dedicated cache when configured (see CACHES in settings.py), else the default one
+LOOKUP_CACHE_ALIAS = 'member_lookups' if 'member_lookups' in settings.CACHES else 'default'
+# Shared cache entries are dropped on Member save/delete; the timeout only bounds
+# changes made without signals (queryset.update)
+LOOKUP_CACHE_TIMEOUT = getattr(settings, 'MEMBER_LOOKUP_CACHE_TIMEOUT', 3600)
+# Another worker's in-process copy may lag a save by at most this many seconds
+LOCAL_TTL = getattr(settings, 'MEMBER_LOOKUP_LOCAL_TTL', 30)
+LOCAL_SIZE = getattr(settings, 'MEMBER_LOOKUP_LRU_SIZE', 20000)
+# Unknown IDs are remembered briefly: bulk imports create members without signals
+NOT_FOUND_TIMEOUT = 60
+MAX_VERIFY_BATCH = 1000
+
+# Member fields that make up a lookup answer
+LOOKUP_FIELDS = ('membership_id', 'is_active', 'address_region', 'membership_level')
+
+NOT_FOUND = ()  # cached answer for an unknown membership ID
+SIGNING_SALT = 'members.verification'
+
+
+class LocalLRU:
+    """A small thread-safe LRU with a per-entry time to live (one per worker process)."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires, value)
+
+    def get_many(self, keys, now):
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, values, now):
+        with self.lock:
+            for key, value in values.items():
+                self.entries[key] = (now + self.ttl, value)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_lookups = LocalLRU(LOCAL_SIZE, LOCAL_TTL)
+
+
+def normalize_membership_id(value):
+    """The canonical form of a typed or scanned membership ID, or None if it cannot be one."""
+    value = (value or '').strip().upper() if isinstance(value, str) else ''
+    return value if MEMBERSHIP_ID_RE.match(value) else None
+
+
+def _cache_key(membership_id):
+    return f'{LOOKUP_PREFIX}:{membership_id}'
+
+
+def _shared_cache():
+    return caches[LOOKUP_CACHE_ALIAS]
+
+
+def lookup_many(membership_ids):
+    """
+    {membership_id: (is_active, region, level) or NOT_FOUND} for canonical IDs.
+    In-process LRU first, then one get_many on the shared cache, then one query
+    for whatever is left (the unique membership_id index).
+    """
+    now = time.monotonic()
+    membership_ids = set(membership_ids)
+    found = local_lookups.get_many(membership_ids, now)
+    missing = membership_ids - found.keys()
+    if missing:
+        shared_cache = _shared_cache()
+        shared = shared_cache.get_many([_cache_key(membership_id) for membership_id in missing])
+        from_shared = {
+            membership_id: tuple(shared[_cache_key(membership_id)])
+            for membership_id in missing if _cache_key(membership_id) in shared
+        }
+        missing -= from_shared.keys()
+        from_db = dict.fromkeys(missing, NOT_FOUND)
+        if missing:
+            rows = Member.objects.filter(membership_id__in=missing).values_list(*LOOKUP_FIELDS)
+            for membership_id, is_active, region, level in rows:
+                from_db[membership_id] = (is_active, region, level)
+            shared_cache.set_many({_cache_key(key): value for key, value in from_db.items() if value}, LOOKUP_CACHE_TIMEOUT)
+            shared_cache.set_many({_cache_key(key): value for key, value in from_db.items() if not value}, NOT_FOUND_TIMEOUT)
+        local_lookups.set_many({**from_shared, **from_db}, now)
+        found.update(from_shared)
+        found.update(from_db)
+    return found
+
+
+def forget(*membership_ids):
+    membership_ids = [membership_id for membership_id in membership_ids if membership_id]
+    for membership_id in membership_ids:
+        local_lookups.discard(membership_id)
+    _shared_cache().delete_many([_cache_key(membership_id) for membership_id in membership_ids])
+
+
+# ------------------ Signed answers ------------------
+
+def _signature(payload):
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return signing.Signer(salt=SIGNING_SALT).signature(canonical)
+
+
+def sign(payload):
+    """Adds 'sig': an HMAC (SECRET_KEY) of the rest of the payload, so a shown answer can't be forged."""
+    return {**payload, 'sig': _signature(payload)}
+
+
+def check_signature(signed):
+    payload = {key: value for key, value in signed.items() if key != 'sig'}
+    return constant_time_compare(signed.get('sig', ''), _signature(payload))
+
+
+def answer(membership_id, record):
+    """The compact answer for one ID. valid means the member exists and is active."""
+    is_active, region, level = record or (False, None, None)
+    return {'id': membership_id, 'valid': bool(record) and is_active, 'region': region, 'level': level}
+
+
+def verify(value):
+    """The signed answer for one typed or scanned membership ID."""
+    membership_id = normalize_membership_id(value)
+    record = lookup_many([membership_id])[membership_id] if membership_id else NOT_FOUND
+    return sign({**answer(membership_id or value, record), 'at': int(time.time())})
+
+
+def verify_batch(values):
+    """One signed answer for up to MAX_VERIFY_BATCH IDs, in the order given."""
+    normalized = [normalize_membership_id(value) for value in values]
+    records = lookup_many(membership_id for membership_id in normalized if membership_id)
+    results = [
+        answer(membership_id or value, records.get(membership_id, NOT_FOUND))
+        for value, membership_id in zip(values, normalized)
+    ]
+    return sign({'results': results, 'at': int(time.time())})
+
+
+# ------------------ Signal receivers (connected in MembersConfig.ready) ------------------
+
+@receiver(post_save, sender=Member)
+def forget_on_save(sender, instance, update_fields=None, **kwargs):
+    # Membership IDs are assigned once, so the saved ID is the only one that can be cached
+    if update_fields is not None and not any(field in LOOKUP_FIELDS for field in update_fields):
+        return
+    # After the commit: a lookup made before it would read the old row and cache it again
+    membership_id = instance.membership_id
+    transaction.on_commit(lambda: forget(membership_id))
+
+
+@receiver(post_delete, sender=Member)
+def forget_on_delete(sender, instance, **kwargs):
+    membership_id = instance.membership_id
+    transaction.on_commit(lambda: forget(membership_id))
@@ -5,21 +5,42 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth.models import User # Crucial import
-from django.db.models import Count, Q
-from django.db.models.functions import ExtractYear
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.middleware.csrf import get_token
 from django.urls import reverse 
 import json
-import csv
-from datetime import datetime
-import qrcode
-import io
-import base64
+import logging
+import os
+from urllib.parse import urlencode
 
 # Import models and forms
-from .models import Member, Announcement
+from .models import Member, CardPrintJob, Meeting
 from .forms import MemberCreationForm, MemberUpdateForm
+from .pagination import keyset_page, parse_page_size
+from .exports import streaming_export_response
+from .stats import member_stats
+from .cache import ANNOUNCEMENT_CACHE_TIMEOUT, announcements_generation, get_dashboard_payload, get_member_count
+from .search import ranked_search
+from .id_cards import ensure_qr_code
+from .jobs import enqueue
+from .provisioning import DEFAULT_PASSWORD, MemberAlreadyExists, provision_member
+from .images import CONTENT_TYPES, PHOTO_VARIANTS, ensure_variant
+from .checkin import MAX_SCANS_PER_REQUEST, record_checkins
+from .analytics import attendance_summary, meeting_attendees
+from .instrumentation import registry as request_metrics
+from .scoping import member_scope
+from .filters import MemberFilters
+from .verification import MAX_VERIFY_BATCH, verify, verify_batch
+from .bundles import download as download_bundle
+from .writes import save_profile
+from .announcements import (
+    FEED_PAGE_SIZE, FeedState, add_validators, decode_since, feed_payload, list_page, not_modified,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns shown in the member list table (and returned by its JSON mode)
+MEMBER_LIST_COLUMNS = ('id', 'full_name', 'membership_id', 'phone_number', 'address_region')
 
 # ------------------ Permission Check Function ------------------
 def is_staff_member(user):
@@ -39,46 +60,24 @@ def register_member(request):
         if form.is_valid():
             # 1. Don't save to DB yet, just create a Member instance in memory
             new_member = form.save(commit=False)
-            
             username = new_member.phone_number
-            password = "password123"
 
-            # 2. Check if a User with this phone number already exists
-            if User.objects.filter(username=username).exists():
+            try:
+                # 2. Member, User account, membership ID and follow-up jobs in one transaction
+                provision_member(new_member, base_url=request.build_absolute_uri('/'))
+            except MemberAlreadyExists:
                 messages.error(request, f"በዚህ ስልክ ቁጥር ({username}) የተመዘገበ ተጠቃሚ ከዚህ በፊት አለ። እባክዎ ሌላ ስልክ ቁጥር ይጠቀሙ።")
                 return render(request, 'members/register_form.html', {'form': form, 'page_title': 'አዲስ አባል መመዝገቢያ'})
-
-            try:
-                # 3. Now, save the Member object. This will trigger the model's save() to create the membership_id.
-                new_member.save()
-
-                # 4. Explicitly create the User account here in the view
-                user = User.objects.create_user(
-                    username=username,
-                    password=password,
-                    email=new_member.email if new_member.email else ""
-                )
-                
-                # 5. Link the new User to the Member profile and save again
-                new_member.user = user
-                new_member.save(update_fields=['user'])
-
-                print(f"SUCCESS: View explicitly created and linked user '{username}'.")
-
-                # 6. Pass the confirmed credentials to the success page
+            except Exception:
+                # Nothing was written (the transaction rolled back); inform the user and log the error
+                logger.exception("Member registration failed")
+                messages.error(request, "ምዝገባው ላይ ያልተጠበቀ ስህተት አጋጥሟል። እባክዎ እንደገና ይሞክሩ።")
+            else:
+                # 3. Pass the confirmed credentials to the success page
                 request.session['new_username'] = username
-                request.session['new_password'] = password
-                
+                request.session['new_password'] = DEFAULT_PASSWORD
                 return redirect('registration_success')
 
-            except Exception as e:
-                # If anything goes wrong, inform the user and log the error
-                print(f"CRITICAL ERROR during user creation in view: {e}")
-                # Optional: Delete the created member if user creation fails
-                if new_member.pk:
-                    new_member.delete()
-                messages.error(request, "ምዝገባው ላይ ያልተጠበቀ ስህተት አጋጥሟል። እባክዎ እንደገና ይሞክሩ።")
-
     else: # if request.method is GET
         form = MemberCreationForm()
         
@@ -124,7 +123,8 @@ def profile_update(request):
     if request.method == 'POST':
         form = MemberUpdateForm(request.POST, request.FILES, instance=member_profile)
         if form.is_valid():
-            form.save()
+            # Only changed fields are written; an unchanged submission makes no query
+            save_profile(form)
             messages.success(request, 'የግል መረጃዎ በተሳካ ሁኔታ ተስተካክሏል።')
             return redirect('profile')
     else:
@@ -132,85 +132,286 @@ def profile_update(request):
     context = {'form': form, 'page_title': 'የግል መረጃ ማስተካከያ'}
     return render(request, 'members/profile_update_form.html', context)
 
+def announcement_list_etag(request, state, page_number):
+    # The page embeds the user's name and CSRF token. get_token() creates the CSRF secret now
+    # if it is missing, so the first response's ETag still matches on the next request.
+    get_token(request)
+    return state.etag('html', page_number, request.user.pk, request.META['CSRF_COOKIE'])
+
+
+def announcement_list_context(state, page_number):
+    return {
+        'page': list_page(state, page_number),
+        'fragment_version': announcements_generation(),
+        'fragment_timeout': ANNOUNCEMENT_CACHE_TIMEOUT,
+        'page_title': 'ማስታወቂያዎች እና ዜናዎች',
+    }
+
+
 @login_required
 def announcement_list(request):
-    announcements = Announcement.objects.all()
-    context = {'announcements': announcements, 'page_title': 'ማስታወቂያዎች እና ዜናዎች'}
-    return render(request, 'members/announcement_list.html', context)
+    # One MAX/COUNT query decides between a 304 and the page; the list itself is a cached fragment
+    state = FeedState.current()
+    page_number = request.GET.get('page', 1)
+    etag = announcement_list_etag(request, state, page_number)
+    response = not_modified(request, state, etag)
+    if response is None:
+        response = render(request, 'members/announcement_list.html', announcement_list_context(state, page_number))
+    return add_validators(response, state, etag)
 
-@user_passes_test(is_staff_member)
-def dashboard(request):
-    user = request.user
+
+@login_required
+def announcement_feed(request):
+    """JSON feed of new and changed announcements: ?since=<next_since of the previous call>."""
+    since = None
+    if request.GET.get('since'):
+        since = decode_since(request.GET['since'])
+        if since is None:
+            return JsonResponse({'errors': {'since': ["Invalid cursor."]}}, status=400)
+    limit = parse_page_size(request.GET.get('limit'), default=FEED_PAGE_SIZE)
+    state = FeedState.current()
+    etag = state.etag('feed', request.GET.get('since'), limit)
+    response = not_modified(request, state, etag)
+    if response is None:
+        response = JsonResponse({**feed_payload(since, limit), 'count': state.count},
+                                json_dumps_params={'ensure_ascii': False})
+    return add_validators(response, state, etag)
+
+def build_dashboard_payload(scope_region):
+    """Computes the dashboard numbers for one scope as plain (cacheable) data."""
     base_queryset = Member.objects.filter(is_active=True)
-    if not user.is_superuser and user.groups.filter(name='የክልል አስተባባሪ').exists():
-        try:
-            coordinator_profile = Member.objects.get(user=user, is_coordinator=True)
-            if coordinator_profile.coordinator_region:
-                base_queryset = base_queryset.filter(address_region=coordinator_profile.coordinator_region)
-        except Member.DoesNotExist:
-            base_queryset = Member.objects.none()
-            
-    total_members = base_queryset.count()
-    gender_distribution = base_queryset.values('gender').annotate(count=Count('gender'))
-    members_by_region = base_queryset.values('address_region').annotate(count=Count('address_region')).order_by('-count')
-    recent_members = base_queryset.order_by('-join_date')[:5]
-    members_by_year_data = base_queryset.annotate(year=ExtractYear('join_date')).values('year').annotate(count=Count('id')).order_by('year')
+    if scope_region:
+        base_queryset = base_queryset.filter(address_region=scope_region)
+
+    # Counts come from the pre-aggregated MemberStat rollups, not from scanning Member
+    stats = member_stats(region=scope_region)
+    gender_counts = stats.get('gender', {})
+    region_counts = stats.get('region', {})
+    year_counts = stats.get('year', {})
+
+    gender_distribution = [{'gender': gender, 'count': count} for gender, count in sorted(gender_counts.items())]
+    members_by_region = [
+        {'address_region': region, 'count': count}
+        for region, count in sorted(region_counts.items(), key=lambda item: -item[1])
+    ]
+    recent_members = list(base_queryset.order_by('-join_date').values('pk', 'full_name', 'join_date')[:5])
+    members_by_year_data = [{'year': int(year), 'count': count} for year, count in year_counts.items() if year]
+    members_by_year_data.sort(key=lambda item: item['year'])
+    return {
+        'total_members': sum(stats.get('total', {}).values()),
+        'gender_distribution': gender_distribution,
+        'members_by_region': members_by_region,
+        'recent_members': recent_members,
+        'members_by_year_data': members_by_year_data,
+    }
+
+
+EMPTY_DASHBOARD = {'total_members': 0, 'gender_distribution': [], 'members_by_region': [],
+                   'recent_members': [], 'members_by_year_data': []}
+
+
+def dashboard_context(payload):
+    gender_distribution = payload['gender_distribution']
+    members_by_year_data = payload['members_by_year_data']
     bar_chart_labels = [str(item['year']) for item in members_by_year_data]
     bar_chart_data = [item['count'] for item in members_by_year_data]
     pie_chart_labels = ["ወንድ" if item['gender'] == 'Male' else "ሴት" for item in gender_distribution]
     pie_chart_data = [item['count'] for item in gender_distribution]
-    context = {
+    return {
         'page_title': 'የአስተዳደር ዳሽቦርድ',
-        'total_members': total_members,
+        'total_members': payload['total_members'],
         'gender_distribution': gender_distribution,
-        'members_by_region': members_by_region,
-        'recent_members': recent_members,
+        'members_by_region': payload['members_by_region'],
+        'recent_members': payload['recent_members'],
         'bar_chart_labels': json.dumps(bar_chart_labels),
         'bar_chart_data': json.dumps(bar_chart_data),
         'pie_chart_labels': json.dumps(pie_chart_labels),
         'pie_chart_data': json.dumps(pie_chart_data),
     }
-    return render(request, 'members/dashboard.html', context)
+
+
+def scoped_dashboard_payload(scope):
+    if scope.empty:
+        return EMPTY_DASHBOARD
+    # Cached per scope (national or one region); invalidated when that region's members change
+    return get_dashboard_payload(scope.region, lambda: build_dashboard_payload(scope.region))
+
+
+@user_passes_test(is_staff_member)
+def dashboard(request):
+    payload = scoped_dashboard_payload(member_scope(request))
+    return render(request, 'members/dashboard.html', dashboard_context(payload))
+
+def member_list_queryset(scope, filters):
+    return Member.objects.filter(is_active=True).for_scope(scope).matching(filters).order_by('full_name')
+
+
+def member_list_json(rows, total_count, next_cursor):
+    return JsonResponse({
+        'columns': list(MEMBER_LIST_COLUMNS),
+        'results': [[row[col] for col in MEMBER_LIST_COLUMNS] for row in rows],
+        'count': total_count,
+        'next_cursor': next_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def filter_errors_json(filters):
+    return JsonResponse({'errors': filters.errors}, status=400, json_dumps_params={'ensure_ascii': False})
+
+
+def member_list_context(request, filters, members, total_count, next_cursor):
+    for errors in filters.errors.values():
+        messages.warning(request, ' '.join(errors))
+    next_page_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_page_query = params.urlencode()
+    return {
+        'members': members,
+        'total_count': total_count,
+        'filter_form': filters.form,
+        'filter_params': filters.as_params(),
+        'next_page_query': next_page_query,
+        'first_page_query': urlencode(filters.as_params()),
+        'is_first_page': not request.GET.get('cursor'),
+        'page_title': 'የፓርቲው አባላት ዝርዝር',
+    }
+
 
 @user_passes_test(is_staff_member)
 def member_list(request):
-    user = request.user
-    base_queryset = Member.objects.filter(is_active=True).order_by('full_name')
-    if not user.is_superuser and user.groups.filter(name='የክልል አስተባባሪ').exists():
-        try:
-            coordinator_profile = Member.objects.get(user=user, is_coordinator=True)
-            if coordinator_profile.coordinator_region:
-                base_queryset = base_queryset.filter(address_region=coordinator_profile.coordinator_region)
-        except Member.DoesNotExist:
-            base_queryset = Member.objects.none()
-    query = request.GET.get('query')
-    region = request.GET.get('region')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    if query:
-        base_queryset = base_queryset.filter(Q(full_name__icontains=query) | Q(membership_id__icontains=query))
-    if region:
-        base_queryset = base_queryset.filter(address_region__icontains=region)
-    if start_date:
-        base_queryset = base_queryset.filter(join_date__gte=start_date)
-    if end_date:
-        base_queryset = base_queryset.filter(join_date__lte=end_date)
-    context = {'members': base_queryset, 'page_title': 'የፓርቲው አባላት ዝርዝር'}
+    scope = member_scope(request)
+    filters = MemberFilters.from_params(request.GET)
+    base_queryset = member_list_queryset(scope, filters)
+    # Shared by the HTML and JSON pages (and every page of one filter), until a member in scope changes
+    total_count = get_member_count(scope.region, filters.cache_key(scope), base_queryset.count)
+
+    # --- Keyset pagination: only one capped page is ever loaded ---
+    cursor = request.GET.get('cursor')
+    page_size = parse_page_size(request.GET.get('page_size'))
+
+    if request.GET.get('format') == 'json':
+        if filters.errors:
+            return filter_errors_json(filters)
+        rows, next_cursor = keyset_page(base_queryset.values(*MEMBER_LIST_COLUMNS), cursor, page_size)
+        return member_list_json(rows, total_count, next_cursor)
+
+    members, next_cursor = keyset_page(base_queryset.only(*MEMBER_LIST_COLUMNS), cursor, page_size)
+    context = member_list_context(request, filters, members, total_count, next_cursor)
     return render(request, 'members/member_list.html', context)
 
+@user_passes_test(is_staff_member)
+def member_search(request):
+    """Ranked search-as-you-type (JSON) by name, phone number or membership ID."""
+    base_queryset = Member.objects.filter(is_active=True).for_scope(member_scope(request))
+    limit = parse_page_size(request.GET.get('limit'), default=20)
+    rows = ranked_search(base_queryset, request.GET.get('q', ''), limit=limit).values(*MEMBER_LIST_COLUMNS)
+    return JsonResponse({
+        'columns': list(MEMBER_LIST_COLUMNS),
+        'results': [[row[col] for col in MEMBER_LIST_COLUMNS] for row in rows],
+    }, json_dumps_params={'ensure_ascii': False})
+
 @login_required
 def member_id_card(request, pk):
     member = get_object_or_404(Member, pk=pk)
-    qr_url = request.build_absolute_uri(reverse('member_detail', args=[member.pk]))
-    qr_image = qrcode.make(qr_url, box_size=4, border=1)
-    buffer = io.BytesIO()
-    qr_image.save(buffer, format='PNG')
-    qr_image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # The QR PNG is generated once and stored; the page only links to it
+    _, version = ensure_qr_code(member, request.build_absolute_uri('/'))
     context = {
         'member': member,
-        'qr_image_base64': qr_image_base64,
+        'qr_image_url': f"{reverse('member_qr_code', args=[member.pk])}?v={version}",
     }
-    return render(request, 'members/id_card_template.html', context)  
+    return render(request, 'members/id_card_template.html', context)
+
+@login_required
+def member_qr_code(request, pk):
+    member = get_object_or_404(Member.objects.only('id', 'qr_code'), pk=pk)
+    if not member.qr_code:
+        ensure_qr_code(member, request.build_absolute_uri('/'))
+    # The stored file name already contains the version hash, so it doubles as the ETag
+    etag = '"%s"' % os.path.splitext(os.path.basename(member.qr_code.name))[0]
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(member.qr_code.open('rb'), content_type='image/png')
+    response['ETag'] = etag
+    # The URL changes (?v=) whenever the QR changes, so browsers may keep it forever
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@login_required
+def member_photo(request, pk, variant):
+    """A resized photo variant (list / id_card / detail), generated on first use and cached."""
+    if variant not in PHOTO_VARIANTS:
+        raise Http404
+    member = get_object_or_404(Member.objects.only('id', 'photo'), pk=pk)
+    if not member.photo:
+        raise Http404
+    try:
+        name = ensure_variant(member.photo.name, variant, storage=member.photo.storage)
+    except OSError:
+        # An original Pillow can't read (UnidentifiedImageError is an OSError) is served as stored
+        if not member.photo.storage.exists(member.photo.name):
+            raise Http404
+        name = member.photo.name
+    etag = '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        content_type = CONTENT_TYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+        response = FileResponse(member.photo.storage.open(name, 'rb'), content_type=content_type)
+    response['ETag'] = etag
+    # Links carry ?v=<photo version>, so a new upload gets a new URL and old ones can be cached forever
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@user_passes_test(is_staff_member)
+def id_card_batch(request):
+    """Starts a batch ID card print for the current member_list filters."""
+    if request.method != 'POST':
+        return redirect('member_list')
+    user = request.user
+    filters = MemberFilters.from_params(request.POST).as_params()
+    scope = member_scope(request)
+    if scope.empty:
+        messages.error(request, "የክልል አስተባባሪ መረጃዎ አልተገኘም።")
+        return redirect('member_list')
+    if scope.region:
+        filters['scope_region'] = scope.region
+    filters['base_url'] = request.build_absolute_uri('/')
+    output_format = 'png' if request.POST.get('output_format') == 'png' else 'pdf'
+    job = CardPrintJob.objects.create(created_by=user, filters=filters, output_format=output_format)
+    # Rendered by `run_worker` so the page returns immediately; progress is stored on the job
+    enqueue('print_id_cards', {'job_id': job.pk})
+    return redirect('id_card_batch_status', pk=job.pk)
+
+def _scoped_print_job(request, pk, **lookups):
+    """A CardPrintJob the user may see: a coordinator only gets the jobs printed for their own region."""
+    job = get_object_or_404(CardPrintJob, pk=pk, **lookups)
+    scope = member_scope(request)
+    if scope.empty or (scope.region and job.filters.get('scope_region') != scope.region):
+        raise Http404
+    return job
+
+@user_passes_test(is_staff_member)
+def id_card_batch_status(request, pk):
+    job = _scoped_print_job(request, pk)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': job.status,
+            'total': job.total,
+            'processed': job.processed,
+            'percent': job.progress_percent,
+            'error': job.error,
+            'download_url': reverse('id_card_batch_download', args=[job.pk]) if job.status == 'done' else None,
+        })
+    context = {'job': job, 'page_title': 'የመታወቂያ ካርዶች ህትመት'}
+    return render(request, 'members/id_card_batch_status.html', context)
+
+@user_passes_test(is_staff_member)
+def id_card_batch_download(request, pk):
+    job = _scoped_print_job(request, pk, status='done')
+    return FileResponse(job.output.open('rb'), as_attachment=True, filename=os.path.basename(job.output.name))
 
 @login_required
 def member_detail(request, pk):
@@ -220,32 +421,111 @@ def member_detail(request, pk):
 
 @user_passes_test(is_staff_member)
 def export_members_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="members_report.csv"'
-    response.write(u'\ufeff'.encode('utf8'))
-    writer = csv.writer(response)
-    writer.writerow(['ሙሉ ስም', 'የአባልነት መለያ', 'ስልክ ቁጥር', 'ጾታ', 'ክልል', 'የተቀላቀለበት ቀን'])
-    user = request.user
-    queryset = Member.objects.filter(is_active=True).order_by('full_name')
-    if not user.is_superuser and user.groups.filter(name='የክልል አስተባባሪ').exists():
-        try:
-            coordinator_profile = Member.objects.get(user=user, is_coordinator=True)
-            if coordinator_profile.coordinator_region:
-                queryset = queryset.filter(address_region=coordinator_profile.coordinator_region)
-        except Member.DoesNotExist:
-            queryset = Member.objects.none()
-    query = request.GET.get('query')
-    region = request.GET.get('region')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    if query:
-        queryset = queryset.filter(Q(full_name__icontains=query) | Q(membership_id__icontains=query))
-    if region:
-        queryset = queryset.filter(address_region__icontains=region)
-    if start_date:
-        queryset = queryset.filter(join_date__gte=start_date)
-    if end_date:
-        queryset = queryset.filter(join_date__lte=end_date)
-    for member in queryset:
-        writer.writerow([member.full_name, member.membership_id, member.phone_number, member.get_gender_display(), member.address_region, member.join_date])
+    filters = MemberFilters.from_params(request.GET)
+    if filters.errors:
+        return filter_errors_json(filters)
+    queryset = member_list_queryset(member_scope(request), filters)
+    # ?export=ndjson for JSON lines, ?gzip=1 for a compressed download
+    export_format = request.GET.get('export', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true')
+    return streaming_export_response(queryset, export_format=export_format, compress=compress)
+
+@user_passes_test(is_staff_member)
+def meeting_checkin(request, pk):
+    """Door check-in page: a QR scanner (keyboard-wedge or typed ID) feeding meeting_checkin_sync."""
+    meeting = get_object_or_404(Meeting, pk=pk)
+    context = {
+        'meeting': meeting,
+        'attendee_count': meeting_attendees(meeting),
+        'page_title': 'የስብሰባ መግቢያ ምዝገባ',
+    }
+    return render(request, 'members/meeting_checkin.html', context)
+
+@user_passes_test(is_staff_member)
+def meeting_checkin_sync(request, pk):
+    """
+    POST {"scans": [{"payload": "<QR text or membership ID>", "scanned_at": "<ISO time>"}, ...]}
+    Up to MAX_SCANS_PER_REQUEST scans per request; re-sending a batch is harmless.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    meeting = get_object_or_404(Meeting, pk=pk)
+    try:
+        scans = json.loads(request.body)['scans']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"scans": [...]}'}, status=400)
+    if not isinstance(scans, list) or not all(isinstance(scan, dict) for scan in scans):
+        return JsonResponse({'error': 'Expected {"scans": [...]}'}, status=400)
+    if len(scans) > MAX_SCANS_PER_REQUEST:
+        return JsonResponse({'error': f'At most {MAX_SCANS_PER_REQUEST} scans per request'}, status=413)
+    result = record_checkins(meeting, scans)
+    result['attendee_count'] = meeting_attendees(meeting)
+    return JsonResponse(result)
+
+@user_passes_test(is_staff_member)
+def verify_membership(request, membership_id):
+    """Signed {"id", "valid", "region", "level", "at", "sig"} for one membership ID (ID card checks)."""
+    return JsonResponse(verify(membership_id), json_dumps_params={'ensure_ascii': False})
+
+@user_passes_test(is_staff_member)
+def verify_memberships(request):
+    """POST {"ids": [...]}: up to MAX_VERIFY_BATCH membership IDs checked at once, one signature."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        ids = json.loads(request.body)['ids']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"ids": [...]}'}, status=400)
+    if not isinstance(ids, list):
+        return JsonResponse({'error': 'Expected {"ids": [...]}'}, status=400)
+    if len(ids) > MAX_VERIFY_BATCH:
+        return JsonResponse({'error': f'At most {MAX_VERIFY_BATCH} IDs per request'}, status=413)
+    return JsonResponse(verify_batch(ids), json_dumps_params={'ensure_ascii': False})
+
+@user_passes_test(is_staff_member)
+def verification_bundle(request):
+    """
+    The latest offline verification bundle (members/bundles.py). ?since=<version> the
+    device already has gives only the changes; ?region=AMH,ORO only those regions.
+    """
+    since = request.GET.get('since', '')
+    if since and not since.isdigit():
+        return JsonResponse({'error': 'since must be a bundle version'}, status=400)
+    codes = {code.strip().upper() for code in request.GET.get('region', '').split(',') if code.strip()}
+    result = download_bundle(int(since) if since else None, codes)
+    if result is None:
+        return JsonResponse({'error': 'No verification bundle has been built yet'}, status=404)
+    data, latest = result
+    # Versions never change once built, so the version, base and regions identify the bytes
+    etag = '"vb-%s-%s-%s"' % (latest.pk, since or 'full', ','.join(sorted(codes)) or 'all')
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(data, content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="verification-bundle-{latest.pk}.bin"'
+    response['ETag'] = etag
+    response['X-Bundle-Version'] = str(latest.pk)
+    response['Cache-Control'] = 'private, no-cache'
     return response
+
+@user_passes_test(is_staff_member)
+def attendance_report(request):
+    """Meeting turnout, regional participation, monthly trend and most active members (?format=json for the data)."""
+    scope = member_scope(request)
+    if scope.empty:
+        raise Http404
+    summary = attendance_summary(region=scope.region or request.GET.get('region') or None)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(summary)
+    context = {
+        'summary': summary,
+        'trend_labels': [row['month'] for row in summary['trend']],
+        'trend_data': [row['attendances'] for row in summary['trend']],
+        'page_title': 'የስብሰባ ተሳትፎ ሪፖርት',
+    }
+    return render(request, 'members/attendance_report.html', context)
+
+@user_passes_test(is_staff_member)
+def metrics(request):
+    """Per-view request histograms of this worker process, in Prometheus text format."""
+    return HttpResponse(request_metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,62 @@
+# ===================================================================
+#               members/writes.py
+#       Write coalescing: change-aware profile saves and photo uploads
+# ===================================================================
+#
+# A profile form re-submitted unchanged or the same photo uploaded again used to
+# rewrite the whole Member row (bumping updated_at and the caches keyed on it) and
+# store another copy of the photo. Here only real changes are written. Both kinds of
+# outcome are counted on /app/metrics (members_writes_total / members_writes_avoided_total).
+#
+# last_login is still written on every login by django.contrib.auth: password reset
+# tokens hash it, so skipping a write would keep an already used reset link valid.
+
+from .images import content_digest, process_uploaded_photo
+from .instrumentation import registry as metrics
+
+
+def written(kind):
+    metrics.count('members_writes_total', kind)
+
+
+def avoided(kind):
+    metrics.count('members_writes_avoided_total', kind)
+
+
+def _keep_stored_photo(member, stored):
+    """
+    Normalizes the newly uploaded photo now and compares its digest with the stored
+    photo's (Member.photo_digest, so the stored file isn't read back). A byte-identical
+    re-upload is dropped in favour of the stored file (True).
+    """
+    if not stored or not member.photo or member.photo._committed:
+        return False
+    processed = process_uploaded_photo(member.photo)
+    if processed is None:
+        return False
+    if member.photo_digest and content_digest(processed) == member.photo_digest:
+        member.photo = stored.name
+        avoided('photo')
+        return True
+    member.photo = processed
+    return False
+
+
+def save_profile(form):
+    """
+    Saves a valid member ModelForm, writing only the fields that changed (plus
+    updated_at). Returns the names of the fields written; [] when nothing changed,
+    in which case no query is made.
+    """
+    member = form.instance
+    fields = list(form.changed_data)
+    if 'photo' in fields and _keep_stored_photo(member, form.initial.get('photo')):
+        fields.remove('photo')
+    if not fields:
+        avoided('profile')
+        return []
+    member.save(update_fields=[*fields, 'updated_at'])
+    written('profile')
+    if 'photo' in fields and member.photo:
+        written('photo')
+    return fields
@@ -0,0 +1,24 @@
+# ===================================================================
+#               party_management/gunicorn_asgi.py
+#       ASGI deployment profile (gunicorn + uvicorn workers)
+# ===================================================================
+#
+# Start command:
+#   gunicorn -c party_management/gunicorn_asgi.py party_management.asgi:application
+#
+# Each worker runs an event loop, so a request waiting on the database or feeding a
+# slow mobile client (member_list, CSV exports under /app/async/) holds a coroutine
+# instead of a whole sync worker. Compare the two profiles with `manage.py loadtest`.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Long streamed exports must not be killed by the worker timeout of a sync worker
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Read by settings.py: no persistent DB connections under ASGI (see DATABASES there)
+raw_env = ['DJANGO_ASGI=1']
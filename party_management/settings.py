@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the queries of every other middleware are counted too (see /app/metrics)
+    'members.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     # WhiteNoise is correctly placed here for serving static files
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -68,7 +70,8 @@ ROOT_URLCONF = 'party_management.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing each render for RequestMetricsMiddleware
+        'BACKEND': 'members.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -99,10 +102,65 @@ DATABASES = {
 
 # PRODUCTION/RENDER DATABASE CONFIGURATION (Overrides local settings)
 # This will pull the database URL from the DATABASE_URL environment variable (used by Render)
-DB_FROM_ENV = dj_database_url.config(conn_max_age=600)
+# Set by the ASGI profile (party_management/gunicorn_asgi.py). Under ASGI the sync DB work of
+# each request runs on its own thread, so persistent connections would never be reused; put a
+# pooler (PgBouncer) in front of Postgres instead.
+SERVE_ASGI = os.environ.get('DJANGO_ASGI', '') == '1'
+DB_FROM_ENV = dj_database_url.config(conn_max_age=0 if SERVE_ASGI else 600)
 DATABASES['default'].update(DB_FROM_ENV)
 
 
+# =========================================================================
+# --- Cache Configuration (dashboard & other computed pages) ---
+# =========================================================================
+
+# CACHE_BACKEND: 'locmem' (default, per process), 'file' (shared by workers on one machine)
+# or 'db' (shared by every server; run `python manage.py createcachetable` once).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'members_cache',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.django_cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'party-management',
+        }
+    }
+
+# Membership ID lookups (members/verification.py): many tiny entries, kept in their own
+# cache so they can't evict the dashboards (every backend culls at MAX_ENTRIES)
+CACHES['member_lookups'] = {
+    **CACHES['default'],
+    'LOCATION': {
+        'db': 'members_lookup_cache',
+        'file': os.path.join(CACHES['default']['LOCATION'], 'member-lookups'),
+    }.get(CACHE_BACKEND, 'member-lookups'),
+    'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('MEMBER_LOOKUP_CACHE_ENTRIES', 20000))},
+}
+
+# Seconds a staff session keeps its resolved member scope (members/scoping.py); bounds how long a
+# group or coordinator change can go unnoticed by workers that don't share the cache
+MEMBER_SCOPE_SESSION_TTL = int(os.environ.get('MEMBER_SCOPE_SESSION_TTL', 300))
+
+# Seconds a computed dashboard stays cached (it is also invalidated whenever members change)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+# Seconds a rendered page of announcements stays cached (dropped whenever one is saved in the admin)
+ANNOUNCEMENT_CACHE_TIMEOUT = int(os.environ.get('ANNOUNCEMENT_CACHE_TIMEOUT', 3600))
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -169,6 +227,14 @@ else:
     os.makedirs(MEDIA_ROOT, exist_ok=True)
 
 
+# Uploaded member photos are rotated per EXIF, capped to this size and re-encoded (WEBP or JPEG)
+MEMBER_PHOTO_MAX_SIZE = int(os.environ.get('MEMBER_PHOTO_MAX_SIZE', 1600))
+MEMBER_PHOTO_FORMAT = os.environ.get('MEMBER_PHOTO_FORMAT', 'WEBP')
+
+# TrueType font with Ge'ez glyphs (e.g. AbyssinicaSIL-Regular.ttf) for server-rendered ID cards
+ID_CARD_FONT_PATH = os.environ.get('ID_CARD_FONT_PATH')
+
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -196,6 +262,22 @@ else:
     TWILIO_AUTH_TOKEN = None
     TWILIO_PHONE_NUMBER = None
 
+# SMS sender (dotted path). Unset: Twilio when its credentials are set, otherwise SMS are only logged.
+# Tests use 'members.sms.FakeSMSSender'.
+SMS_BACKEND = os.environ.get('SMS_BACKEND') or None
+# Announcement fan-out (members/notifications.py): messages per second and requests in flight
+SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', 10))
+SMS_MAX_CONCURRENCY = int(os.environ.get('SMS_MAX_CONCURRENCY', 10))
+
+# Background jobs (members/jobs.py) are run by `python manage.py run_worker`.
+# JOB_QUEUE_EAGER=True runs them right after the request's commit instead (local dev without a worker).
+JOB_QUEUE_EAGER = os.environ.get('JOB_QUEUE_EAGER', '') == '1'
+# Defers the MemberStat rollup updates of single member saves to the worker
+MEMBER_STATS_DEFERRED = os.environ.get('MEMBER_STATS_DEFERRED', '') == '1'
+
+# Request metrics (members/instrumentation.py): seconds of history kept in the /app/metrics histograms
+REQUEST_METRICS_WINDOW = int(os.environ.get('REQUEST_METRICS_WINDOW', 3600))
+
 # Crispy Forms Settings
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"